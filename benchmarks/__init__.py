@@ -0,0 +1 @@
+"""Micro-benchmarks for the bot's hot functions; run with ``python -m benchmarks``."""
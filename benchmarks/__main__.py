@@ -0,0 +1,92 @@
+"""
+Micro-benchmarks for the bot's hot functions.
+
+    python -m benchmarks                         # print one JSON line per benchmark
+    python -m benchmarks --save-baseline         # record benchmarks/baseline.json
+    python -m benchmarks --compare --threshold 0.25   # exit 1 on a >25% median regression
+    python -m benchmarks -k storage -k i18n      # only names containing these substrings
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import AsyncExitStack
+
+from benchmarks import bench_doprax, bench_storage, bench_text
+from benchmarks.harness import (
+    Result,
+    compare,
+    env_mismatch,
+    load_baseline,
+    log,
+    measure,
+    result_line,
+    save_baseline,
+)
+
+SUITES = (bench_storage, bench_doprax, bench_text)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n")[1])
+    p.add_argument("-k", dest="filters", action="append", default=[], help="name substring")
+    p.add_argument("--rounds", type=int, default=7)
+    p.add_argument("--min-time", type=float, default=0.05, help="seconds per timed batch")
+    p.add_argument("--baseline", default=DEFAULT_BASELINE)
+    p.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    p.add_argument("--compare", action="store_true", help="compare against --baseline")
+    p.add_argument(
+        "--threshold", type=float, default=0.25, help="regression threshold as a fraction"
+    )
+    return p.parse_args(argv)
+
+
+async def _run(filters: list[str], rounds: int, min_time: float) -> list[Result]:
+    results = []
+    for suite in SUITES:
+        async with AsyncExitStack() as stack:
+            for case in await suite.cases(stack):
+                if filters and not any(f in case.name for f in filters):
+                    continue
+                results.append(await measure(case, rounds, min_time))
+                log(f"  {case.name}: {results[-1].median_ns} ns")
+    return sorted(results, key=lambda r: r.name)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if args.compare and not os.path.exists(args.baseline):
+        log(f"no baseline at {args.baseline}; record one with --save-baseline first")
+        return 2
+    results = asyncio.run(_run(args.filters, args.rounds, args.min_time))
+
+    if not args.compare:
+        for r in results:
+            print(result_line(r))
+    else:
+        baseline = load_baseline(args.baseline)
+        for mismatch in env_mismatch(baseline):
+            log(f"warning: baseline recorded on a different environment ({mismatch})")
+        comparisons = compare(results, baseline, args.threshold)
+        for r, c in zip(results, comparisons, strict=True):
+            print(result_line(r, c))
+        regressed = [c for c in comparisons if c.status == "regressed"]
+        for c in regressed:
+            log(f"REGRESSION {c.name}: {c.baseline_ns} -> {c.median_ns} ns ({c.change:+.0%})")
+        if regressed:
+            log(f"{len(regressed)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        log(f"no regressions above {args.threshold:.0%}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        log(f"baseline written to {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Doprax client work that is pure CPU once the catalog is cached."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from typing import Any
+
+import httpx
+
+from benchmarks.harness import Case
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.fakes.doprax import FakeDoprax, FleetConfig
+
+LOCATION_COUNTS = (10, 100, 1000)
+OS_PROVIDERS = 6
+OS_SLUGS = (10, 100)
+
+
+def _os_payload(slugs: int) -> dict[str, Any]:
+    # Every provider lists the same images, as the real endpoint does, so dedupe has work.
+    items = [{"slug": f"os_{i:04d}", "name": f"OS {i}"} for i in range(slugs)]
+    data = {f"provider{p}": list(reversed(items)) for p in range(OS_PROVIDERS)}
+    return {"success": True, "data": data}
+
+
+def _serving(payload: Any) -> Callable[..., Awaitable[Any]]:
+    async def request(method: str, url: str, json_data: Any = None) -> Any:
+        return payload
+
+    return request
+
+
+async def _client(stack: AsyncExitStack, fake: FakeDoprax) -> DopraxClient:
+    http = await stack.enter_async_context(
+        httpx.AsyncClient(transport=fake.transport(), base_url="https://fake.local")
+    )
+    return DopraxClient(
+        DopraxConfig(base_url="https://fake.local", api_key="k", dry_run=False), client=http
+    )
+
+
+async def cases(stack: AsyncExitStack) -> list[Case]:
+    out = []
+    for n in LOCATION_COUNTS:
+        dop = await _client(stack, FakeDoprax(fleet=FleetConfig(vms=1, locations=n)))
+        await dop.get_locations()  # warm the catalog cache; only resolution is timed
+
+        async def resolve(dop: DopraxClient = dop) -> None:
+            await dop.resolve_location_and_machine_codes("H1", "Frankfurt, Germany")
+
+        out.append(Case(f"doprax.resolve_location[locations={n}]", resolve, is_async=True))
+
+    for n in OS_SLUGS:
+        dop = DopraxClient(DopraxConfig(base_url="https://fake.local", api_key="k", dry_run=False))
+        # Skip HTTP entirely: the raw payload goes straight into normalization.
+        dop._request = _serving(_os_payload(n))  # type: ignore[method-assign]
+        out.append(
+            Case(
+                f"doprax.os_list_normalize[slugs={n}x{OS_PROVIDERS}]",
+                dop._fetch_os_list,
+                is_async=True,
+            )
+        )
+    return out
@@ -0,0 +1,39 @@
+"""SQLite storage calls made on every update (``_preprocess``) and in the create wizard."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import AsyncExitStack
+
+from benchmarks.harness import Case
+from bot.states import State
+from bot.storage import Storage
+
+USER = 424242
+
+
+async def cases(stack: AsyncExitStack) -> list[Case]:
+    tmp = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-"))
+    storage = Storage(os.path.join(tmp, "bench.db"))
+    await storage.open()
+    stack.push_async_callback(storage.close)
+    await storage.ensure_user(USER)
+
+    async def set_state() -> None:
+        await storage.set_state(USER, State.CREATE_NAME)
+
+    async def update_draft() -> None:
+        await storage.update_draft(USER, plan="H1", vm_name="web-1")
+
+    async def ratelimit_check() -> None:
+        # Cooldown 0 always passes, so every call takes the write path.
+        await storage.ratelimit_check(USER, cooldown_seconds=0)
+
+    return [
+        Case("storage.ensure_user", lambda: storage.ensure_user(USER), is_async=True),
+        Case("storage.get_session", lambda: storage.get_session(USER), is_async=True),
+        Case("storage.set_state", set_state, is_async=True),
+        Case("storage.update_draft", update_draft, is_async=True),
+        Case("storage.ratelimit_check", ratelimit_check, is_async=True),
+    ]
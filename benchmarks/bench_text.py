@@ -0,0 +1,70 @@
+"""Translation lookups, keyboard builders and structured logging."""
+
+from __future__ import annotations
+
+import logging
+import os
+from contextlib import AsyncExitStack
+
+from benchmarks.harness import Case
+from bot import keyboards
+from bot.i18n import I18N
+from bot.keyboards import create_os_inline, main_reply_keyboard, vm_list_page_inline
+from bot.utils import json_log, redact_secrets
+
+_SECRETS = {
+    "TELEGRAM_BOT_TOKEN": "123456:bench-token-abcdefghijklmnop",
+    "DOPRAX_API_KEY": "bench-doprax-key-0123456789",
+    "WEBHOOK_SECRET": "bench-webhook-secret",
+    "DOPRAX_ACCOUNTS": "team=bench-team-key-1,ops=bench-ops-key-2",
+}
+_PAGE = [(f"web-{i} — RUNNING", f"vm_{i:06d}") for i in range(8)]
+_OS = ["ubuntu_22_04", "ubuntu_24_04", "ubuntu_20_04", "centos_stream_9"]
+_LINE = "status vm_000001 for 123456:bench-token-abcdefghijklmnop took 120ms"
+
+
+def _set_env(stack: AsyncExitStack) -> None:
+    saved = {k: os.environ.get(k) for k in _SECRETS}
+
+    def restore() -> None:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+    os.environ.update(_SECRETS)
+    stack.callback(restore)
+
+
+def _quiet_logger() -> logging.Logger:
+    # Records are still created and handled; only the output is discarded.
+    logger = logging.getLogger("benchmarks.quiet")
+    logger.handlers = [logging.NullHandler()]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+async def cases(stack: AsyncExitStack) -> list[Case]:
+    _set_env(stack)
+    logger = _quiet_logger()
+    build_page = keyboards._vm_list_page_inline.__wrapped__
+    build_os = keyboards._create_os_inline.__wrapped__
+    return [
+        Case("i18n.t", lambda: I18N.t("fa", "menu_title")),
+        Case("i18n.t_format", lambda: I18N.t("en", "create_name_set", name="web-1")),
+        Case("i18n.t_missing_key", lambda: I18N.t("fa", "no_such_key")),
+        Case("keyboards.main_reply[cached]", lambda: main_reply_keyboard("en")),
+        Case("keyboards.vm_list_page[cached]", lambda: vm_list_page_inline("en", _PAGE, 1, 3)),
+        Case("keyboards.vm_list_page[build]", lambda: build_page("en", tuple(_PAGE), 1, 3)),
+        Case("keyboards.create_os[cached]", lambda: create_os_inline("en", _OS, _OS)),
+        Case("keyboards.create_os[build]", lambda: build_os("en", tuple(_OS))),
+        Case("log.redact_secrets", lambda: redact_secrets(_LINE)),
+        Case(
+            "log.json_log",
+            lambda: json_log(
+                logger, logging.INFO, "doprax_request", endpoint="/api/v1/vms/", ms=120.5
+            ),
+        ),
+    ]
@@ -0,0 +1,152 @@
+"""
+Timing, reporting and baseline comparison for the micro-benchmarks.
+
+Each case runs in batches sized so one batch takes at least ``min_time`` seconds, with the
+garbage collector off (as ``timeit`` does). The reported figure is the median per-call time
+over ``rounds`` batches; the minimum is kept as a noise reference.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+SCHEMA = 1
+
+
+@dataclass(frozen=True)
+class Case:
+    """One benchmark: ``fn`` is called (and awaited when ``is_async``) once per iteration."""
+
+    name: str
+    fn: Callable[[], Any]
+    is_async: bool = False
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+    median_ns: int
+    min_ns: int
+    loops: int
+    rounds: int
+
+
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    median_ns: int
+    baseline_ns: int | None
+    change: float | None
+    status: str  # "ok", "regressed", "improved" or "new"
+
+
+async def _batch(case: Case, loops: int) -> int:
+    fn = case.fn
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if case.is_async:
+            call: Callable[[], Awaitable[Any]] = fn
+            started = time.perf_counter_ns()
+            for _ in range(loops):
+                await call()
+        else:
+            started = time.perf_counter_ns()
+            for _ in range(loops):
+                fn()
+        return time.perf_counter_ns() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+async def measure(case: Case, rounds: int = 7, min_time: float = 0.05) -> Result:
+    loops = 1
+    # Calibration doubles as warmup: grow the batch until it is long enough to time.
+    while await _batch(case, loops) < min_time * 1e9 and loops < 1 << 24:
+        loops *= 2
+    per_call = [await _batch(case, loops) / loops for _ in range(max(1, rounds))]
+    return Result(
+        name=case.name,
+        median_ns=round(statistics.median(per_call)),
+        min_ns=round(min(per_call)),
+        loops=loops,
+        rounds=len(per_call),
+    )
+
+
+def environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def result_line(result: Result, comparison: Comparison | None = None) -> str:
+    """One JSON object per benchmark; keys in a fixed order so runs diff cleanly."""
+    row: dict[str, Any] = asdict(result)
+    if comparison is not None:
+        row["baseline_ns"] = comparison.baseline_ns
+        row["change"] = None if comparison.change is None else round(comparison.change, 4)
+        row["status"] = comparison.status
+    return json.dumps(row, ensure_ascii=False)
+
+
+def save_baseline(path: str, results: list[Result]) -> None:
+    doc = {
+        "schema": SCHEMA,
+        "env": environment(),
+        "results": {r.name: asdict(r) for r in sorted(results, key=lambda r: r.name)},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("schema") != SCHEMA:
+        raise ValueError(f"{path}: unsupported baseline schema {doc.get('schema')!r}")
+    return doc
+
+
+def compare(results: list[Result], baseline: dict[str, Any], threshold: float) -> list[Comparison]:
+    """Classify each result against the baseline's median; ``threshold`` is a fraction."""
+    saved = baseline.get("results", {})
+    out = []
+    for r in results:
+        old = saved.get(r.name)
+        if old is None:
+            out.append(Comparison(r.name, r.median_ns, None, None, "new"))
+            continue
+        base = int(old["median_ns"])
+        change = r.median_ns / base - 1 if base > 0 else 0.0
+        if change > threshold:
+            status = "regressed"
+        elif change < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        out.append(Comparison(r.name, r.median_ns, base, change, status))
+    return out
+
+
+def env_mismatch(baseline: dict[str, Any]) -> list[str]:
+    saved = baseline.get("env", {})
+    current = environment()
+    return [f"{k}: {saved.get(k)} -> {v}" for k, v in current.items() if saved.get(k) != v]
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
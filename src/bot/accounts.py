@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+from collections.abc import Callable, Mapping
+
+from bot.config import DEFAULT_ACCOUNT
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.storage import Storage
+
+
+class DopraxClientPool:
+    """
+    Lazily created Doprax clients keyed by account.
+
+    Each account gets its own ``DopraxClient`` and therefore its own HTTP connection pool,
+    rate budget, catalog cache and circuit breaker, so a slow or failing account never
+    blocks the others. Clients unused for ``idle_seconds`` are closed on the next lookup.
+    """
+
+    def __init__(
+        self,
+        base: DopraxConfig,
+        accounts: Mapping[str, str],
+        storage: Storage,
+        default_account: str = DEFAULT_ACCOUNT,
+        idle_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+        client_factory: Callable[[DopraxConfig], DopraxClient] = DopraxClient,
+    ) -> None:
+        if default_account not in accounts:
+            raise ValueError(f"Unknown default Doprax account: {default_account}")
+        self._base = base
+        self._accounts = dict(accounts)
+        self._storage = storage
+        self.default_account = default_account
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+        self._client_factory = client_factory
+        self._clients: dict[str, DopraxClient] = {}
+        self._last_used: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._last_sweep = clock()
+
+    @property
+    def accounts(self) -> list[str]:
+        return sorted(self._accounts)
+
+    @property
+    def open_accounts(self) -> list[str]:
+        return sorted(self._clients)
+
+    def has_account(self, name: str) -> bool:
+        return name in self._accounts
+
+    async def get(self, account: str) -> DopraxClient:
+        if account not in self._accounts:
+            account = self.default_account
+        now = self._clock()
+        client = self._clients.get(account)
+        if client is None:
+            async with self._lock:
+                client = self._clients.get(account)
+                if client is None:
+                    cfg = dataclasses.replace(self._base, api_key=self._accounts[account])
+                    client = self._client_factory(cfg)
+                    await client.open()
+                    self._clients[account] = client
+        self._last_used[account] = now
+        if now - self._last_sweep >= self._idle_seconds / 4:
+            await self.evict_idle()
+        return client
+
+    async def for_user(self, user_id: int | None) -> DopraxClient:
+        account = None
+        if user_id is not None:
+            account = await self._storage.get_account(user_id)
+        return await self.get(account or self.default_account)
+
+    async def account_for_user(self, user_id: int) -> str:
+        account = await self._storage.get_account(user_id)
+        return account if account in self._accounts else self.default_account
+
+    async def evict_idle(self) -> list[str]:
+        """Close clients that have been idle longer than ``idle_seconds``."""
+        now = self._clock()
+        self._last_sweep = now
+        idle = [
+            name
+            for name in self._clients
+            if now - self._last_used.get(name, now) >= self._idle_seconds
+        ]
+        for name in idle:
+            client = self._clients.pop(name)
+            self._last_used.pop(name, None)
+            await client.close()
+        return idle
+
+    async def close(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._last_used.clear()
+        for client in clients:
+            await client.close()
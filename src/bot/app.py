@@ -0,0 +1,869 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import dataclasses
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from telegram import Bot, BotCommand, Update
+from telegram.constants import ParseMode
+from telegram.error import TelegramError
+from telegram.ext import (
+    Application,
+    ApplicationBuilder,
+    CallbackQueryHandler,
+    CommandHandler,
+    ContextTypes,
+    ExtBot,
+    InlineQueryHandler,
+    JobQueue,
+    MessageHandler,
+    TypeHandler,
+    filters,
+)
+
+from bot.accounts import DopraxClientPool
+from bot.backlog import UpdateDedupe, replay_backlog
+from bot.callbacks import CallbackRouter, choice, route_name, uint
+from bot.config import Config
+from bot.doprax_client import DopraxClient, DopraxConfig, write_catalog_snapshot
+from bot.handlers.common import (
+    HandlerDeps,
+    enforce_ratelimit,
+    get_lang,
+    json_log,
+    reset_if_timed_out,
+    safe_answer_callback,
+    user_id_from_update,
+)
+from bot.handlers.text_router import TextRouter
+from bot.i18n import I18N
+from bot.keyboards import CB, VM_MGMT_ACTIONS, main_reply_keyboard
+from bot.metrics import log_metrics_periodically
+from bot.ordering import UserOrderedProcessor
+from bot.outbound import FloodLimiter
+from bot.profiling import DEFAULT_SECONDS, SamplingProfiler
+from bot.provisioning import ProvisioningTracker
+from bot.recording import UpdateRecorder
+from bot.search import InventorySearch
+from bot.startup import LazyHandler, StartupProfile, lazy
+from bot.states import State
+from bot.storage import Storage
+from bot.tracing import note_handler
+from bot.utils import new_correlation_id, redact_secrets, setup_logging
+from bot.watch import WatchPoller
+from bot.webhook import WebhookServer
+from bot.workers import WORKER_PATH, Supervisor, WorkerProcess, WorkerSlot
+
+LOGGER = logging.getLogger("doprax_telegram_bot")
+
+# What ApplicationBuilder builds with default context types.
+BotApp = Application[
+    ExtBot[Any],
+    ContextTypes.DEFAULT_TYPE,
+    dict[Any, Any],
+    dict[Any, Any],
+    dict[Any, Any],
+    JobQueue[ContextTypes.DEFAULT_TYPE],
+]
+
+# Handler name -> module under bot.handlers. A module is imported the first time one of its
+# handlers runs, so startup only loads what it uses (see bot.startup.lazy).
+_HANDLER_MODULES = {
+    "account_cmd": "account",
+    "cancel_cmd": "create_vm",
+    "create_back_callback": "create_vm",
+    "create_cancel_callback": "create_vm",
+    "create_confirm_callback": "create_vm",
+    "create_plan_callback": "create_vm",
+    "create_provider_callback": "create_vm",
+    "create_vm_cmd": "create_vm",
+    "location_pick_callback": "create_vm",
+    "os_pick_callback": "create_vm",
+    "health_cmd": "health",
+    "help_cmd": "help",
+    "inline_search": "inline_search",
+    "list_vms_callback": "list_vms",
+    "list_vms_cmd": "list_vms",
+    "locations_cmd": "locations",
+    "menu_cmd": "menu",
+    "os_cmd": "os_list",
+    "profile_cmd": "profile",
+    "settings_callback": "settings",
+    "settings_cmd": "settings",
+    "lang_callback": "start",
+    "start_cmd": "start",
+    "status_callback": "status",
+    "status_cmd": "status",
+    "status_prompt": "status",
+    "status_refresh_callback": "status",
+    "vm_mgmt_cmd": "vm_mgmt",
+    "unwatch_cmd": "watch",
+    "watch_cmd": "watch",
+}
+
+
+def _handler(name: str) -> LazyHandler:
+    return lazy(f"bot.handlers.{_HANDLER_MODULES[name]}:{name}")
+
+
+async def _set_commands(app: BotApp) -> None:
+    commands = [
+        BotCommand("start", "Start"),
+        BotCommand("help", "Help"),
+        BotCommand("lang", "Change language"),
+        BotCommand("menu", "Show menu"),
+        BotCommand("list_vms", "List VMs"),
+        BotCommand("create_vm", "Create VM wizard"),
+        BotCommand("status", "VM status"),
+        BotCommand("locations", "Locations & plans"),
+        BotCommand("os", "OS list"),
+        BotCommand("cancel", "Cancel wizard"),
+        BotCommand("health", "Health check"),
+        BotCommand("account", "Doprax account"),
+        BotCommand("watch", "Watch VM status"),
+        BotCommand("unwatch", "Stop watching a VM"),
+    ]
+    try:
+        await app.bot.set_my_commands(commands)
+    except TelegramError as e:
+        # The previous command list stays in place; not worth failing startup over.
+        json_log(LOGGER, logging.WARNING, "set_commands_failed", error=type(e).__name__)
+
+
+async def _preprocess(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    deps: HandlerDeps = context.application.bot_data["deps"]
+    storage: Storage = deps.storage
+    uid = user_id_from_update(update)
+    if uid is None:
+        return True
+
+    # Ensure user exists
+    await storage.ensure_user(uid)
+
+    # Timeout recovery
+    expired = await reset_if_timed_out(storage, uid, deps.session_timeout_seconds)
+    if expired:
+        lang = await get_lang(storage, uid)
+        if update.effective_chat:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=I18N.t(lang, "timeout_reset"),
+                reply_markup=main_reply_keyboard(lang),
+                parse_mode=ParseMode.MARKDOWN,
+            )
+
+    # Rate limiting (skip for /start and language selection callbacks)
+    is_start_cmd = bool(
+        update.message and update.message.text and update.message.text.strip().startswith("/start")
+    )
+    is_lang_cb = bool(update.callback_query and route_name(update.callback_query.data) == CB.LANG)
+    # Inline queries arrive per keystroke and are served from memory.
+    is_inline = update.inline_query is not None
+
+    if not (is_start_cmd or is_lang_cb or is_inline):
+        allowed = await enforce_ratelimit(storage, uid, deps.ratelimit_cooldown_seconds)
+        if not allowed and update.effective_chat:
+            lang = await get_lang(storage, uid)
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=I18N.t(lang, "rate_limited"),
+                reply_markup=main_reply_keyboard(lang),
+                parse_mode=ParseMode.MARKDOWN,
+            )
+            return False
+
+    return True
+
+
+async def _unknown(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    note_handler("unknown")
+    deps: HandlerDeps = context.application.bot_data["deps"]
+    uid = user_id_from_update(update)
+    if uid is None:
+        return
+    lang = await get_lang(deps.storage, uid)
+    if update.effective_chat:
+        await context.bot.send_message(
+            chat_id=update.effective_chat.id,
+            text=I18N.t(lang, "unknown_input"),
+            reply_markup=main_reply_keyboard(lang),
+            parse_mode=ParseMode.MARKDOWN,
+        )
+
+
+async def _error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    deps: HandlerDeps = context.application.bot_data["deps"]
+    ref = new_correlation_id()
+    err = context.error
+    # Log stack trace to stdout, but redact secrets
+    LOGGER.exception(redact_secrets(f"[{ref}] Unhandled error: {err}"))
+
+    if isinstance(update, Update):
+        uid = user_id_from_update(update)
+        lang = "en"
+        if uid is not None:
+            try:
+                lang = await get_lang(deps.storage, uid)
+                await deps.storage.set_state(uid, State.IDLE)
+                await deps.storage.reset_draft(uid)
+                await deps.storage.set_create_lock(uid, False)
+            except Exception:
+                lang = "en"
+        if update.effective_chat:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=I18N.t(lang, "something_wrong", ref=ref),
+                reply_markup=main_reply_keyboard(lang),
+                parse_mode=ParseMode.MARKDOWN,
+            )
+
+
+class _UserDoprax:
+    """Placeholder handler argument, resolved per update to the user's DopraxClient."""
+
+
+USER_DOPRAX = _UserDoprax()
+
+
+def _wrap(
+    handler: Callable[..., Coroutine[Any, Any, None]],
+    *args: Any,
+    **kwargs: Any,
+) -> Callable[[Update, ContextTypes.DEFAULT_TYPE], Coroutine[Any, Any, None]]:
+    needs_doprax = any(a is USER_DOPRAX for a in args)
+    # Routers (TextRouter) are named by the handler they pick; see bot.tracing.
+    name = handler.name if isinstance(handler, LazyHandler) else ""
+
+    async def _inner(update: Update, context: ContextTypes.DEFAULT_TYPE, *params: Any) -> None:
+        if name:
+            note_handler(name)
+        if not await _preprocess(update, context):
+            return
+        call_args = args
+        if needs_doprax:
+            pool: DopraxClientPool = context.application.bot_data["doprax_pool"]
+            doprax = await pool.for_user(user_id_from_update(update))
+            call_args = tuple(doprax if a is USER_DOPRAX else a for a in args)
+        # Decoded callback parameters (see CallbackRouter) follow the bound arguments.
+        await handler(update, context, *call_args, *params, **kwargs)
+
+    return _inner
+
+
+async def _dispatch_vm_mgmt(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, action: str
+) -> None:
+    deps: HandlerDeps = context.application.bot_data["deps"]
+    pool: DopraxClientPool = context.application.bot_data["doprax_pool"]
+    await safe_answer_callback(update)
+    if action == "list_vms":
+        doprax = await pool.for_user(user_id_from_update(update))
+        await _handler("list_vms_cmd")(update, context, deps, doprax)
+    elif action == "status_prompt":
+        await _handler("status_prompt")(update, context, deps)
+    elif action == "refresh_vm_mgmt":
+        await _handler("vm_mgmt_cmd")(update, context, deps)
+
+
+async def _shutdown(app: BotApp) -> None:
+    # Runs from the drain sequence and from PTB's run_* helpers; close resources only once.
+    if app.bot_data.get("closed"):
+        return
+    app.bot_data["closed"] = True
+    deps: HandlerDeps = app.bot_data["deps"]
+    pool: DopraxClientPool = app.bot_data["doprax_pool"]
+    dedupe: UpdateDedupe = app.bot_data["dedupe"]
+    recorder: UpdateRecorder | None = app.bot_data.get("recorder")
+    profiler: SamplingProfiler = app.bot_data["profiler"]
+    await profiler.close()
+    await pool.close()
+    if deps.storage.is_open:
+        await dedupe.flush()
+    await deps.storage.close()
+    if recorder is not None:
+        recorder.close()
+
+
+def _doprax_config(cfg: Config) -> DopraxConfig:
+    return DopraxConfig(
+        base_url=cfg.doprax_base_url,
+        api_key=cfg.doprax_api_key,
+        dry_run=cfg.dry_run,
+        record_path=cfg.doprax_record_path,
+        replay_path=cfg.doprax_replay_path,
+        replay_speed=cfg.doprax_replay_speed,
+        hedge=cfg.doprax_hedge,
+        hedge_budget_pct=cfg.doprax_hedge_budget_pct,
+        rate_per_second=cfg.doprax_rate_per_second,
+        catalog_ttl=cfg.doprax_catalog_ttl,
+        status_ttl=cfg.doprax_status_ttl,
+        inventory_ttl=cfg.doprax_inventory_ttl,
+    )
+
+
+def _catalog_snapshot_path(cfg: Config) -> str:
+    return os.path.join(os.path.dirname(cfg.db_path) or ".", "catalog.json")
+
+
+def build_app(cfg: Config, slot: WorkerSlot | None = None) -> BotApp:
+    """Build the bot; ``slot`` is set when running as one process of worker mode."""
+    storage = Storage(cfg.db_path)
+    base = _doprax_config(cfg)
+    owns = slot.owns if slot is not None else None
+    if slot is not None:
+        base = dataclasses.replace(base, catalog_snapshot=_catalog_snapshot_path(cfg))
+    pool = DopraxClientPool(
+        base,
+        cfg.doprax_accounts,
+        storage,
+        default_account=cfg.doprax_default_account,
+        idle_seconds=cfg.doprax_pool_idle_seconds,
+    )
+    provisioning = ProvisioningTracker(
+        storage, pool, LOGGER, tick_seconds=cfg.provisioning_poll_seconds, owns=owns
+    )
+    watcher = WatchPoller(
+        storage,
+        pool,
+        LOGGER,
+        tick_seconds=cfg.provisioning_poll_seconds,
+        min_interval=cfg.watch_min_interval,
+        max_interval=cfg.watch_max_interval,
+        owns_vm=slot.owns_vm if slot is not None else None,
+    )
+    deps = HandlerDeps(storage=storage, logger=LOGGER, provisioning=provisioning)
+    # Workers share the database, so each keeps its own window of processed update ids.
+    dedupe = UpdateDedupe(
+        storage,
+        LOGGER,
+        name=f"worker-{slot.index}" if slot is not None else "main",
+        size=cfg.dedupe_window,
+    )
+
+    app = (
+        ApplicationBuilder()
+        .token(cfg.telegram_bot_token)
+        .base_url(cfg.telegram_api_url)
+        .concurrent_updates(
+            UserOrderedProcessor(
+                max_concurrent_updates=cfg.max_concurrent_updates,
+                max_pending=cfg.user_queue_size,
+                stale_callback_seconds=cfg.callback_stale_seconds,
+            )
+        )
+        .rate_limiter(
+            FloodLimiter(
+                # Workers share the bot's global send budget.
+                global_rate=cfg.telegram_global_rate / (slot.count if slot else 1),
+                chat_rate=cfg.telegram_chat_rate,
+                max_wait=cfg.telegram_max_send_wait,
+            )
+        )
+        .build()
+    )
+    app.bot_data["deps"] = deps
+    app.bot_data["doprax_pool"] = pool
+    app.bot_data["provisioning"] = provisioning
+    app.bot_data["watcher"] = watcher
+    app.bot_data["dedupe"] = dedupe
+    app.bot_data["search"] = InventorySearch(pool, result_ttl=cfg.inline_cache_seconds)
+    app.bot_data["version"] = _safe_version()
+    app.bot_data["dry_run"] = cfg.dry_run
+    app.bot_data["admin_ids"] = cfg.admin_user_ids
+    app.bot_data["profiler"] = SamplingProfiler(os.path.dirname(cfg.db_path) or ".", LOGGER)
+    # In worker mode the supervisor records, so the file keeps arrival order.
+    if cfg.update_record_path and slot is None:
+        app.bot_data["recorder"] = UpdateRecorder(cfg.update_record_path)
+
+    app.post_shutdown = _shutdown
+
+    return app
+
+
+def _safe_version() -> str:
+    # importlib.metadata scans installed distributions; only pay for it when building the app.
+    from importlib.metadata import version as pkg_version
+
+    try:
+        return pkg_version("doprax-telegram-bot")
+    except Exception:
+        return "0.0.0"
+
+
+async def _warm_catalog(pool: DopraxClientPool) -> None:
+    try:
+        await (await pool.get(pool.default_account)).catalog()
+    except Exception as e:
+        # The wizard fetches it on demand instead.
+        json_log(LOGGER, logging.WARNING, "catalog_warmup_failed", error=type(e).__name__)
+
+
+async def _open_resources(app: BotApp, cfg: Config, profile: StartupProfile) -> None:
+    """
+    Bring the bot up with independent steps overlapped: the database, the default Doprax
+    client and PTB's initialize (``getMe``) first, then state loading, catalog warmup and
+    ``set_my_commands``. Jobs are scheduled last.
+    """
+    deps: HandlerDeps = app.bot_data["deps"]
+    pool: DopraxClientPool = app.bot_data["doprax_pool"]
+    watcher: WatchPoller = app.bot_data["watcher"]
+    dedupe: UpdateDedupe = app.bot_data["dedupe"]
+    provisioning: ProvisioningTracker = app.bot_data["provisioning"]
+
+    os.makedirs(os.path.dirname(cfg.db_path) or ".", exist_ok=True)
+    with profile.phase("open resources"):
+        await asyncio.gather(
+            profile.timed("  open database", deps.storage.open()),
+            # Other accounts' clients open lazily on first use.
+            profile.timed("  open Doprax client", pool.get(pool.default_account)),
+            profile.timed("  initialize bot (getMe)", app.initialize()),
+        )
+    with profile.phase("load state"):
+        await asyncio.gather(
+            # Resume tracking VMs that were still provisioning before a restart.
+            profile.timed("  provisioning tracker", provisioning.load()),
+            profile.timed("  watch poller", watcher.load()),
+            profile.timed("  dedupe window", dedupe.load()),
+            profile.timed("  catalog warmup", _warm_catalog(pool)),
+            profile.timed("  set_my_commands", _set_commands(app)),
+        )
+    if app.job_queue is not None:
+        provisioning.schedule(app.job_queue)
+        watcher.schedule(app.job_queue)
+        dedupe.schedule(app.job_queue)
+
+
+def _register_handlers(app: BotApp) -> None:
+    deps: HandlerDeps = app.bot_data["deps"]
+    pool: DopraxClientPool = app.bot_data["doprax_pool"]
+    watcher: WatchPoller = app.bot_data["watcher"]
+    search: InventorySearch = app.bot_data["search"]
+    doprax = USER_DOPRAX
+    ver: str = app.bot_data["version"]
+    dry_run: bool = app.bot_data["dry_run"]
+    profiler: SamplingProfiler = app.bot_data["profiler"]
+    admins: frozenset[int] = app.bot_data["admin_ids"]
+    # Every button press goes through one trie lookup; see bot.callbacks.
+    callbacks = CallbackRouter()
+
+    # Recording sees every update, redeliveries included, as Telegram sent them.
+    if "recorder" in app.bot_data:
+        app.add_handler(TypeHandler(Update, app.bot_data["recorder"]), group=-2)
+    # Redelivered updates stop here, before any handler group runs.
+    app.add_handler(TypeHandler(Update, app.bot_data["dedupe"]), group=-1)
+
+    # /start + language
+    app.add_handler(CommandHandler("start", _wrap(_handler("start_cmd"), deps)))
+    callbacks.add(CB.LANG, _wrap(_handler("lang_callback"), deps), choice("fa", "en"))
+
+    # /help /menu /lang (lang uses same start screen)
+    app.add_handler(CommandHandler("help", _wrap(_handler("help_cmd"), deps)))
+    app.add_handler(CommandHandler("menu", _wrap(_handler("menu_cmd"), deps)))
+    app.add_handler(CommandHandler("lang", _wrap(_handler("start_cmd"), deps)))
+
+    # VM management
+    app.add_handler(CommandHandler("vm_mgmt", _wrap(_handler("vm_mgmt_cmd"), deps)))
+    callbacks.add(CB.MENU, _dispatch_vm_mgmt, choice(*VM_MGMT_ACTIONS))
+
+    # List / status
+    app.add_handler(CommandHandler("list_vms", _wrap(_handler("list_vms_cmd"), deps, doprax)))
+    callbacks.add(CB.VM_LIST, _wrap(_handler("list_vms_callback"), deps, doprax), uint)
+    callbacks.add(
+        f"{CB.VM_LIST}:r", _wrap(_handler("list_vms_callback"), deps, doprax, refresh=True), uint
+    )
+    app.add_handler(CommandHandler("status", _wrap(_handler("status_cmd"), deps, doprax)))
+    callbacks.add(CB.VM_STATUS, _wrap(_handler("status_callback"), deps, doprax), str)
+    callbacks.add(CB.VM_REFRESH, _wrap(_handler("status_refresh_callback"), deps, doprax), str)
+    # Free text: reply keyboard buttons, then wizard / status input by FSM state
+    app.add_handler(
+        MessageHandler(filters.TEXT & ~filters.COMMAND, _wrap(TextRouter(), deps, pool))
+    )
+
+    # Doprax account binding
+    app.add_handler(CommandHandler("account", _wrap(_handler("account_cmd"), deps, pool)))
+    app.add_handler(CommandHandler("watch", _wrap(_handler("watch_cmd"), deps, doprax, watcher)))
+    app.add_handler(CommandHandler("unwatch", _wrap(_handler("unwatch_cmd"), deps, watcher)))
+    app.add_handler(InlineQueryHandler(_wrap(_handler("inline_search"), deps, search)))
+
+    # Locations / OS
+    app.add_handler(CommandHandler("locations", _wrap(_handler("locations_cmd"), deps, doprax)))
+    app.add_handler(CommandHandler("os", _wrap(_handler("os_cmd"), deps, doprax)))
+
+    # Create wizard
+    app.add_handler(CommandHandler("create_vm", _wrap(_handler("create_vm_cmd"), deps, doprax)))
+    app.add_handler(CommandHandler("cancel", _wrap(_handler("cancel_cmd"), deps)))
+    callbacks.add(f"{CB.CREATE}:cancel", _wrap(_handler("create_cancel_callback"), deps))
+    callbacks.add(f"{CB.CREATE}:back", _wrap(_handler("create_back_callback"), deps, doprax))
+    callbacks.add(f"{CB.CREATE}:prov", _wrap(_handler("create_provider_callback"), deps), str)
+    callbacks.add(f"{CB.CREATE}:plan", _wrap(_handler("create_plan_callback"), deps), str)
+    callbacks.add(
+        f"{CB.CREATE}:confirm",
+        _wrap(_handler("create_confirm_callback"), deps, doprax),
+        choice("create", "edit"),
+    )
+    callbacks.add(CB.LOC_PICK, _wrap(_handler("location_pick_callback"), deps), str)
+    callbacks.add(CB.OS_PICK, _wrap(_handler("os_pick_callback"), deps, doprax), str)
+
+    # Settings
+    app.add_handler(CommandHandler("settings", _wrap(_handler("settings_cmd"), deps)))
+    callbacks.add(
+        CB.SETTINGS,
+        _wrap(_handler("settings_callback"), deps, ver),
+        choice("lang", "verbose", "about"),
+    )
+
+    # Health
+    app.add_handler(CommandHandler("health", _wrap(_handler("health_cmd"), deps, doprax, dry_run)))
+
+    # Admin-only, not in the command list
+    app.add_handler(
+        CommandHandler("profile", _wrap(_handler("profile_cmd"), deps, profiler, admins))
+    )
+
+    app.add_handler(CallbackQueryHandler(callbacks))
+
+    # Fallback unknown
+    app.add_handler(MessageHandler(filters.ALL, _unknown))
+
+    # Global error handler
+    app.add_error_handler(_error_handler)
+
+
+UpdateForwarder = Callable[[dict[str, Any]], Coroutine[Any, Any, None]]
+
+
+def _update_dispatcher(app: BotApp) -> UpdateForwarder:
+    async def _dispatch(payload: dict[str, Any]) -> None:
+        update = Update.de_json(payload, app.bot)
+        # Same path the polling fetcher takes, so the update processor's limits still apply.
+        await app.update_processor.process_update(update, app.process_update(update))
+
+    return _dispatch
+
+
+def _recording(recorder: UpdateRecorder, forward: UpdateForwarder) -> UpdateForwarder:
+    async def _record_and_forward(payload: dict[str, Any]) -> None:
+        recorder.record(payload)
+        await forward(payload)
+
+    return _record_and_forward
+
+
+def _webhook_server(app: BotApp, cfg: Config) -> WebhookServer:
+    return WebhookServer(
+        _update_dispatcher(app),
+        cfg.webhook_secret,
+        LOGGER,
+        path=cfg.webhook_path,
+        host=cfg.webhook_listen,
+        port=cfg.webhook_port,
+        queue_size=cfg.webhook_queue_size,
+        workers=app.update_processor.max_concurrent_updates,
+    )
+
+
+def _profile_on_signal(profiler: SamplingProfiler) -> None:
+    """``kill -USR1 <pid>`` opens a profiling window of ``DEFAULT_SECONDS``."""
+    sig = getattr(signal, "SIGUSR1", None)
+    if sig is None:
+        # Windows
+        return
+
+    def _start() -> None:
+        if profiler.running:
+            json_log(LOGGER, logging.WARNING, "profile_busy")
+        else:
+            profiler.start(DEFAULT_SECONDS)
+
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(sig, _start)
+
+
+def _stop_on_signals(*sigs: signal.Signals) -> asyncio.Event:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in sigs:
+        # Not supported on Windows.
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop_event.set)
+    return stop_event
+
+
+async def _drain(app: BotApp, timeout: float, webhook: WebhookServer | None = None) -> None:
+    """
+    Graceful stop: stop taking updates, give running handlers and queued background sends up
+    to ``timeout`` seconds in total, cancel what is left, then close resources once.
+    """
+    started = time.monotonic()
+
+    def remaining() -> float:
+        return max(0.0, started + timeout - time.monotonic())
+
+    if webhook is not None:
+        await webhook.close(drain_timeout=remaining())
+    elif app.updater is not None and app.updater.running:
+        await app.updater.stop()
+        # Updates already fetched are confirmed to Telegram; let them finish.
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(app.update_queue.join(), timeout=remaining())
+    abandoned_updates = 0
+    processor = app.update_processor
+    if isinstance(processor, UserOrderedProcessor):
+        abandoned_updates = await processor.drain(remaining())
+    await app.stop()
+
+    sends: set[asyncio.Task[Any]] = set(app.bot_data.get("background_sends", ()))
+    late: set[asyncio.Task[Any]] = set()
+    if sends:
+        _, late = await asyncio.wait(sends, timeout=remaining())
+        for task in late:
+            task.cancel()
+        await asyncio.gather(*late, return_exceptions=True)
+
+    await app.shutdown()
+    await _shutdown(app)
+    json_log(
+        LOGGER,
+        logging.INFO,
+        "shutdown_drained",
+        seconds=round(time.monotonic() - started, 3),
+        abandoned_updates=abandoned_updates,
+        abandoned_sends=len(late),
+    )
+
+
+def _worker_entry(index: int, count: int, port: int, secret: str) -> None:
+    """Process target for one worker of worker mode."""
+    cfg = Config.load()
+    setup_logging(cfg.log_level)
+    # Ctrl-C reaches the whole process group; let the supervisor decide when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_run_worker(cfg, WorkerSlot(index, count), port, secret))
+
+
+async def _run_worker(cfg: Config, slot: WorkerSlot, port: int, secret: str) -> None:
+    app = build_app(cfg, slot)
+    _register_handlers(app)
+    stop_event = _stop_on_signals(signal.SIGTERM)
+    _profile_on_signal(app.bot_data["profiler"])
+    await _open_resources(app, cfg, StartupProfile())
+    await app.start()
+    server = WebhookServer(
+        _update_dispatcher(app),
+        secret,
+        LOGGER,
+        path=WORKER_PATH,
+        host="127.0.0.1",
+        port=port,
+        queue_size=cfg.webhook_queue_size,
+        workers=app.update_processor.max_concurrent_updates,
+    )
+    await server.start()
+    json_log(LOGGER, logging.INFO, "worker_started", worker=slot.index, port=port)
+    metrics_task: asyncio.Task[None] | None = None
+    if cfg.metrics_log_interval > 0:
+        metrics_task = asyncio.create_task(
+            log_metrics_periodically(LOGGER, cfg.metrics_log_interval)
+        )
+
+    await stop_event.wait()
+
+    if metrics_task is not None:
+        metrics_task.cancel()
+    await _drain(app, cfg.drain_timeout, server)
+
+
+def _spawn_worker(slot: WorkerSlot, port: int, secret: str) -> WorkerProcess:
+    ctx = multiprocessing.get_context("spawn")
+    process = ctx.Process(
+        target=_worker_entry,
+        args=(slot.index, slot.count, port, secret),
+        name=f"bot-worker-{slot.index}",
+        daemon=True,
+    )
+    process.start()
+    return process
+
+
+async def _catalog_snapshot_loop(doprax: DopraxClient, path: str, interval: float) -> None:
+    while True:
+        try:
+            write_catalog_snapshot(path, await doprax.catalog())
+        except Exception as e:
+            json_log(LOGGER, logging.WARNING, "catalog_snapshot_failed", error=type(e).__name__)
+        await asyncio.sleep(interval)
+
+
+async def _poll_updates(bot: Bot, forward: UpdateForwarder) -> None:
+    offset = 0
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=25, allowed_updates=Update.ALL_TYPES
+            )
+        except TelegramError as e:
+            json_log(LOGGER, logging.WARNING, "get_updates_failed", error=type(e).__name__)
+            await asyncio.sleep(1.0)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            await forward(update.to_dict())
+
+
+async def run_supervisor(cfg: Config) -> None:
+    """Worker mode: receive updates here and hand them to WORKERS processes by user id."""
+    os.makedirs(os.path.dirname(cfg.db_path) or ".", exist_ok=True)
+    stop_event = _stop_on_signals(signal.SIGINT, signal.SIGTERM)
+
+    # Workers read the catalog from this snapshot instead of each fetching it.
+    doprax = DopraxClient(
+        dataclasses.replace(
+            _doprax_config(cfg),
+            api_key=cfg.doprax_accounts[cfg.doprax_default_account],
+            catalog_ttl=0.0,
+        )
+    )
+    await doprax.open()
+    snapshot_path = _catalog_snapshot_path(cfg)
+    interval = max(30.0, cfg.doprax_catalog_ttl / 2)
+    tasks = [asyncio.create_task(_catalog_snapshot_loop(doprax, snapshot_path, interval))]
+
+    supervisor = Supervisor(
+        _spawn_worker,
+        cfg.workers,
+        LOGGER,
+        base_port=cfg.worker_base_port,
+        health_interval=cfg.worker_health_interval,
+        queue_size=cfg.webhook_queue_size,
+    )
+    await supervisor.start()
+    forward: UpdateForwarder = supervisor.forward
+    recorder: UpdateRecorder | None = None
+    if cfg.update_record_path:
+        recorder = UpdateRecorder(cfg.update_record_path)
+        forward = _recording(recorder, forward)
+
+    bot = Bot(cfg.telegram_bot_token, base_url=cfg.telegram_api_url)
+    await bot.initialize()
+    webhook: WebhookServer | None = None
+    if cfg.webhook:
+        webhook = WebhookServer(
+            forward,
+            cfg.webhook_secret,
+            LOGGER,
+            path=cfg.webhook_path,
+            host=cfg.webhook_listen,
+            port=cfg.webhook_port,
+            queue_size=cfg.webhook_queue_size,
+        )
+        await webhook.start()
+        if cfg.webhook_url:
+            await bot.set_webhook(
+                url=cfg.webhook_url,
+                secret_token=cfg.webhook_secret,
+                drop_pending_updates=not cfg.backlog_replay,
+            )
+    else:
+        await bot.delete_webhook(drop_pending_updates=not cfg.backlog_replay)
+        if cfg.backlog_replay:
+            # Workers dedupe and order per user; forwarding only queues, so no extra bound.
+            await replay_backlog(bot, forward, LOGGER, batch_size=cfg.backlog_batch_size)
+        tasks.append(asyncio.create_task(_poll_updates(bot, forward)))
+    if cfg.metrics_log_interval > 0:
+        tasks.append(
+            asyncio.create_task(log_metrics_periodically(LOGGER, cfg.metrics_log_interval))
+        )
+
+    await stop_event.wait()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if webhook is not None:
+        await webhook.close()
+    await supervisor.close(drain_timeout=cfg.drain_timeout)
+    await bot.shutdown()
+    await doprax.close()
+    if recorder is not None:
+        recorder.close()
+
+
+async def run(
+    cfg: Config, profile: StartupProfile | None = None, exit_when_ready: bool = False
+) -> None:
+    """Single-process mode: start, serve until SIGINT/SIGTERM, then drain."""
+    profile = profile or StartupProfile()
+    with profile.phase("build app"):
+        app = build_app(cfg)
+        _register_handlers(app)
+
+    # Graceful shutdown signals
+    stop_event = _stop_on_signals(signal.SIGINT, signal.SIGTERM)
+    _profile_on_signal(app.bot_data["profiler"])
+
+    await _open_resources(app, cfg, profile)
+    with profile.phase("start"):
+        await app.start()
+        webhook: WebhookServer | None = None
+        # With exit_when_ready, stop short of taking updates from Telegram.
+        if exit_when_ready:
+            pass
+        elif cfg.webhook:
+            webhook = _webhook_server(app, cfg)
+            await webhook.start()
+            if cfg.webhook_url:
+                await app.bot.set_webhook(
+                    url=cfg.webhook_url,
+                    secret_token=cfg.webhook_secret,
+                    drop_pending_updates=not cfg.backlog_replay,
+                )
+        elif app.updater is not None:
+            if cfg.backlog_replay:
+                await app.bot.delete_webhook(drop_pending_updates=False)
+                await replay_backlog(
+                    app.bot,
+                    _update_dispatcher(app),
+                    LOGGER,
+                    batch_size=cfg.backlog_batch_size,
+                    concurrency=cfg.backlog_concurrency,
+                    dedupe=app.bot_data["dedupe"],
+                )
+            await app.updater.start_polling(drop_pending_updates=not cfg.backlog_replay)
+    json_log(LOGGER, logging.INFO, "startup_ready", seconds=round(profile.mark_ready(), 3))
+
+    metrics_task: asyncio.Task[None] | None = None
+    if cfg.metrics_log_interval > 0:
+        metrics_task = asyncio.create_task(
+            log_metrics_periodically(LOGGER, cfg.metrics_log_interval)
+        )
+
+    if exit_when_ready:
+        stop_event.set()
+    await stop_event.wait()
+
+    if metrics_task is not None:
+        metrics_task.cancel()
+    await _drain(app, cfg.drain_timeout, webhook)
+
+
+async def open_app(cfg: Config) -> tuple[BotApp, UpdateForwarder]:
+    """
+    Start the bot without a source of updates: the caller hands update dicts to the returned
+    forwarder (the replay harness does). Stop it with :func:`close_app`.
+    """
+    app = build_app(cfg)
+    _register_handlers(app)
+    await _open_resources(app, cfg, StartupProfile())
+    await app.start()
+    return app, _update_dispatcher(app)
+
+
+async def close_app(app: BotApp, timeout: float) -> None:
+    await _drain(app, timeout)
@@ -0,0 +1,231 @@
+"""
+Update deduplication and startup backlog replay.
+
+``UpdateWindow`` remembers which of the last ``size`` update ids were processed in a ring
+bitmap, so checking or recording an id is O(1) (amortized over consecutive ids) and the whole
+window fits in ``size / 8`` bytes. ``UpdateDedupe`` gates every update through it and persists
+the window in SQLite, so updates Telegram redelivers after a crash or restart are skipped.
+``replay_backlog`` drains what queued up while the bot was down instead of dropping it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from telegram import Bot, Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes, Job, JobQueue
+
+from bot.metrics import METRICS
+from bot.storage import Storage
+from bot.utils import json_log
+from bot.workers import routing_key
+
+
+class UpdateWindow:
+    """Processed update ids among the ``size`` ids up to the highest one recorded."""
+
+    def __init__(self, size: int = 4096) -> None:
+        self.size = max(8, size - size % 8)
+        self.high = -1
+        self._bits = bytearray(self.size // 8)
+
+    def is_reset(self, update_id: int) -> bool:
+        """
+        True for an id more than ``size`` below the highest one: Telegram never redelivers
+        that far back, so the bot's update sequence was reset (new token, webhook re-set).
+        """
+        return self.high >= 0 and update_id < self.high - self.size
+
+    def seen(self, update_id: int) -> bool:
+        if update_id > self.high or self.is_reset(update_id):
+            return False
+        if update_id == self.high - self.size:
+            # Shares its slot with ``high``: long since confirmed to Telegram, never replayed.
+            return True
+        i = update_id % self.size
+        return bool(self._bits[i >> 3] & (1 << (i & 7)))
+
+    def add(self, update_id: int) -> None:
+        if update_id > self.high or self.is_reset(update_id):
+            if self.high < 0 or not 0 < update_id - self.high < self.size:
+                self._bits[:] = bytes(len(self._bits))
+            else:
+                # Slots between the old and new high now belong to ids nobody has sent yet.
+                for j in range(self.high + 1, update_id):
+                    k = j % self.size
+                    self._bits[k >> 3] &= ~(1 << (k & 7)) & 0xFF
+            self.high = update_id
+        elif update_id == self.high - self.size:
+            return
+        i = update_id % self.size
+        self._bits[i >> 3] |= 1 << (i & 7)
+
+    def dump(self) -> tuple[int, bytes]:
+        return self.high, bytes(self._bits)
+
+    def restore(self, high: int, bits: bytes) -> None:
+        self.high = high
+        if len(bits) == len(self._bits):
+            self._bits[:] = bits
+        else:
+            # Window size changed: err on the side of skipping rather than re-running.
+            self._bits[:] = b"\xff" * len(self._bits)
+
+
+class UpdateDedupe:
+    """
+    Handler-group gate that stops updates whose ``update_id`` was already processed.
+
+    Ids are recorded when an update is let through (at most once, so a redelivered "create
+    VM" confirmation cannot run twice). The window is saved to storage under ``name`` every
+    ``flush_seconds`` when it changed, after each replayed batch and on shutdown.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        logger: logging.Logger,
+        name: str = "main",
+        size: int = 4096,
+        flush_seconds: float = 5.0,
+    ) -> None:
+        self.storage = storage
+        self.logger = logger
+        self.name = name
+        self.flush_seconds = flush_seconds
+        self.window = UpdateWindow(size)
+        self._dirty = False
+
+    async def load(self) -> None:
+        saved = await self.storage.load_update_window(self.name)
+        if saved is not None:
+            self.window.restore(*saved)
+
+    def check(self, update_id: int) -> bool:
+        """Record ``update_id``; False if it was already processed."""
+        if self.window.is_reset(update_id):
+            json_log(
+                self.logger,
+                logging.WARNING,
+                "update_sequence_reset",
+                update_id=update_id,
+                previous_high=self.window.high,
+            )
+        if self.window.seen(update_id):
+            METRICS.counter("update_duplicate_total").inc()
+            return False
+        self.window.add(update_id)
+        self._dirty = True
+        return True
+
+    async def __call__(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if isinstance(update, Update) and not self.check(update.update_id):
+            json_log(self.logger, logging.INFO, "update_duplicate", update_id=update.update_id)
+            raise ApplicationHandlerStop
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        await self.storage.save_update_window(self.name, *self.window.dump())
+
+    def schedule(self, job_queue: JobQueue[Any]) -> Job[Any]:
+        return job_queue.run_repeating(
+            self._job, interval=self.flush_seconds, first=self.flush_seconds, name="dedupe"
+        )
+
+    async def _job(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        await self.flush()
+
+
+def _supersede_key(payload: dict[str, Any]) -> tuple[Any, ...] | None:
+    query = payload.get("callback_query")
+    if isinstance(query, dict):
+        message = query.get("message") or {}
+        return ("tap", message.get("message_id"), query.get("inline_message_id"), query.get("data"))
+    message = payload.get("message")
+    if isinstance(message, dict) and isinstance(message.get("text"), str):
+        return ("text", message["text"])
+    return None
+
+
+def collapse(payloads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Drop updates superseded by the same user's next update: repeated taps of one button on
+    one message, or the same text sent again. Only back-to-back repeats per user collapse,
+    so wizard steps are never reordered; the latest copy is kept, in arrival order.
+    """
+    kept: list[dict[str, Any] | None] = []
+    last: dict[int, tuple[int, tuple[Any, ...] | None]] = {}
+    for payload in payloads:
+        user = routing_key(payload)
+        key = _supersede_key(payload)
+        prev = last.get(user)
+        if key is not None and prev is not None and prev[1] == key:
+            kept[prev[0]] = None
+        last[user] = (len(kept), key)
+        kept.append(payload)
+    return [p for p in kept if p is not None]
+
+
+Dispatch = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+async def replay_backlog(
+    bot: Bot,
+    dispatch: Dispatch,
+    logger: logging.Logger,
+    batch_size: int = 100,
+    concurrency: int = 32,
+    dedupe: UpdateDedupe | None = None,
+) -> int:
+    """
+    Fetch updates queued while the bot was down in batches of ``batch_size``, collapse
+    superseded ones and dispatch each batch with at most ``concurrency`` in flight. One
+    user's updates are dispatched one after another, so a long backlog never overflows that
+    user's queue in the update processor and nothing is dropped. Fetching the next batch
+    confirms the previous one to Telegram. Returns the number of updates dispatched.
+    """
+    started = time.monotonic()
+    limit = asyncio.Semaphore(concurrency)
+    offset = 0
+    total = 0
+
+    async def _run(payloads: list[dict[str, Any]]) -> None:
+        for payload in payloads:
+            async with limit:
+                await dispatch(payload)
+
+    while True:
+        updates = await bot.get_updates(
+            offset=offset, limit=batch_size, timeout=0, allowed_updates=Update.ALL_TYPES
+        )
+        if not updates:
+            break
+        offset = updates[-1].update_id + 1
+        payloads = [u.to_dict() for u in updates]
+        batch = collapse(payloads)
+        METRICS.counter("backlog_updates_total", outcome="collapsed").inc(
+            len(payloads) - len(batch)
+        )
+        METRICS.counter("backlog_updates_total", outcome="dispatched").inc(len(batch))
+        per_user: dict[int, list[dict[str, Any]]] = {}
+        for payload in batch:
+            per_user.setdefault(routing_key(payload), []).append(payload)
+        await asyncio.gather(*(_run(p) for p in per_user.values()))
+        total += len(batch)
+        if dedupe is not None:
+            await dedupe.flush()
+        if len(updates) < batch_size:
+            break
+    if offset:
+        # Confirm the final batch so the regular fetcher starts after it.
+        await bot.get_updates(offset=offset, limit=1, timeout=0)
+    elapsed = time.monotonic() - started
+    METRICS.histogram("backlog_replay_seconds").observe(elapsed)
+    json_log(logger, logging.INFO, "backlog_replayed", updates=total, seconds=round(elapsed, 3))
+    return total
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Small LRU cache with a per-entry TTL and single-flight loading.
+
+    Concurrent misses for the same key share one loader call; loader errors propagate to
+    every waiter and are not cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        maxsize: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._inflight: dict[K, asyncio.Future[tuple[V, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> tuple[V, float] | None:
+        """Return (value, age in seconds) if present and fresh."""
+        hit = self._data.get(key)
+        if hit is None:
+            return None
+        value, stored_at = hit
+        age = self._clock() - stored_at
+        if age > self.ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value, age
+
+    def put(self, key: K, value: V) -> None:
+        self._data[key] = (value, self._clock())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: K | None = None) -> None:
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    async def fetch(self, key: K, loader: Callable[[], Awaitable[V]]) -> tuple[V, float]:
+        """Return (value, age), loading it once on a miss."""
+        hit = self.get(key)
+        if hit is not None:
+            return hit
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        fut: asyncio.Future[tuple[V, float]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await loader()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                fut.set_exception(e)
+                # Mark retrieved so an unobserved failure does not log "never retrieved".
+                fut.exception()
+            else:
+                fut.cancel()
+            raise
+        else:
+            self.put(key, value)
+            fut.set_result((value, 0.0))
+            return value, 0.0
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        value, _ = await self.fetch(key, loader)
+        return value
@@ -0,0 +1,154 @@
+"""
+Callback-data codec and router.
+
+Payloads are ``<version>:<route...>:<params...>``, e.g. ``1:VMREF:vm_123``. ``pack`` refuses
+anything that would not fit Telegram's 64-byte ``callback_data`` limit, and ``unpack`` drops
+payloads from another version (buttons left in chats by an older deployment) or of the wrong
+shape. ``CallbackRouter`` resolves the route with one walk down a prefix trie of segments and
+converts the remaining segments with the route's typed parameter converters, so malformed or
+stale presses are answered before any handler (and therefore any storage access) runs.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.i18n import I18N
+from bot.metrics import METRICS
+from bot.utils import json_log
+
+LOGGER = logging.getLogger("doprax_telegram_bot")
+
+VERSION = "1"
+SEP = ":"
+MAX_BYTES = 64
+
+Converter = Callable[[str], Any]
+CallbackHandler = Callable[..., Awaitable[None]]
+
+
+def pack(*parts: str | int) -> str:
+    """Encode route segments and parameters; raises ``ValueError`` if it cannot be sent."""
+    fields = [VERSION, *(str(p) for p in parts)]
+    for f in fields:
+        if not f or SEP in f:
+            raise ValueError(f"invalid callback segment: {f!r}")
+    data = SEP.join(fields)
+    if len(data.encode()) > MAX_BYTES:
+        raise ValueError(f"callback data exceeds {MAX_BYTES} bytes: {data!r}")
+    return data
+
+
+def unpack(data: str | None) -> list[str] | None:
+    """Segments after the version, or None for empty, oversized or other-version payloads."""
+    if not data or len(data.encode()) > MAX_BYTES:
+        return None
+    version, _, rest = data.partition(SEP)
+    if version != VERSION or not rest:
+        return None
+    return rest.split(SEP)
+
+
+def choice(*allowed: str) -> Converter:
+    """Converter that only accepts one of ``allowed``."""
+    options = frozenset(allowed)
+
+    def _convert(value: str) -> str:
+        if value not in options:
+            raise ValueError(value)
+        return value
+
+    return _convert
+
+
+def uint(value: str) -> int:
+    """Converter for non-negative integers (page numbers and the like)."""
+    if not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+
+@dataclass(frozen=True)
+class _Route:
+    handler: CallbackHandler
+    params: tuple[Converter, ...]
+
+
+@dataclass
+class _Node:
+    children: dict[str, _Node] = field(default_factory=dict)
+    route: _Route | None = None
+
+
+class CallbackRouter:
+    """
+    Dispatches callback queries to ``handler(update, context, *params)``.
+
+    Routes are registered by path (``"CREATE:prov"``) with one converter per trailing
+    parameter (``str``, :func:`uint`, :func:`choice`). Lookup follows the longest registered
+    path, then requires exactly ``len(params)`` remaining segments that all convert.
+    """
+
+    def __init__(self) -> None:
+        self._root = _Node()
+
+    def add(self, path: str, handler: CallbackHandler, *params: Converter) -> None:
+        node = self._root
+        for segment in path.split(SEP):
+            node = node.children.setdefault(segment, _Node())
+        if node.route is not None:
+            raise ValueError(f"duplicate callback route: {path}")
+        node.route = _Route(handler, params)
+
+    def resolve(self, data: str | None) -> tuple[CallbackHandler, list[Any]] | None:
+        segments = unpack(data)
+        if segments is None:
+            return None
+        node, route, rest = self._root, None, segments
+        for i, segment in enumerate(segments):
+            node = node.children.get(segment)  # type: ignore[assignment]
+            if node is None:
+                break
+            if node.route is not None:
+                route, rest = node.route, segments[i + 1 :]
+        if route is None or len(rest) != len(route.params):
+            return None
+        try:
+            args = [convert(value) for convert, value in zip(route.params, rest, strict=True)]
+        except ValueError:
+            return None
+        return route.handler, args
+
+    async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        query = update.callback_query
+        if query is None:
+            return
+        resolved = self.resolve(query.data)
+        if resolved is None:
+            await self._reject(update, query.data)
+            return
+        handler, args = resolved
+        await handler(update, context, *args)
+
+    async def _reject(self, update: Update, data: str | None) -> None:
+        METRICS.counter("callback_rejected_total").inc()
+        json_log(LOGGER, logging.INFO, "callback_rejected", data=(data or "")[:MAX_BYTES])
+        # Pick the language from the Telegram client rather than storage: rejects stay cheap.
+        user = update.effective_user
+        lang = "fa" if user and (user.language_code or "").startswith("fa") else "en"
+        try:
+            await update.callback_query.answer(I18N.t(lang, "button_expired"))  # type: ignore[union-attr]
+        except Exception:
+            return
+
+
+def route_name(data: str | None) -> str:
+    """First route segment of ``data`` (``""`` if it does not decode)."""
+    segments: Sequence[str] = unpack(data) or ("",)
+    return segments[0]
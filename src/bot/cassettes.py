@@ -0,0 +1,193 @@
+"""
+Record/replay cassettes for Doprax API traffic.
+
+A cassette is a newline-delimited JSON file, one request/response pair per line:
+
+    {"method": "GET", "path": "/api/v1/vms/", "status": 200, "elapsed_ms": 183.4, "body": {...}}
+
+Credentials never reach the file: request headers are not stored, known secrets are redacted
+from every line and sensitive fields (passwords, keys, tokens) are masked recursively.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import IO, Any
+
+import httpx
+
+from bot.utils import endpoint_template, redact_secrets
+
+REDACTED = "***REDACTED***"
+REDACT_FIELDS = frozenset(
+    {
+        "password",
+        "root_password",
+        "rootPassword",
+        "ssh_key",
+        "sshKey",
+        "token",
+        "api_key",
+        "apiKey",
+        "secret",
+    }
+)
+
+
+def redact_fields(value: Any) -> Any:
+    """Recursively mask sensitive fields in a decoded JSON value."""
+    if isinstance(value, dict):
+        return {k: REDACTED if k in REDACT_FIELDS else redact_fields(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact_fields(v) for v in value]
+    return value
+
+
+def _decode_body(content: bytes) -> Any:
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
+
+
+@dataclass(frozen=True)
+class CassetteEntry:
+    method: str
+    path: str
+    status: int
+    elapsed_ms: float
+    body: Any
+    request_body: Any = None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "method": self.method,
+                "path": self.path,
+                "status": self.status,
+                "elapsed_ms": round(self.elapsed_ms, 3),
+                "request_body": self.request_body,
+                "body": self.body,
+            },
+            ensure_ascii=False,
+        )
+
+    @staticmethod
+    def from_json(line: str) -> CassetteEntry:
+        d = json.loads(line)
+        return CassetteEntry(
+            method=str(d["method"]),
+            path=str(d["path"]),
+            status=int(d["status"]),
+            elapsed_ms=float(d.get("elapsed_ms") or 0.0),
+            body=d.get("body"),
+            request_body=d.get("request_body"),
+        )
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Pass-through transport that appends redacted request/response pairs to a cassette."""
+
+    def __init__(self, path: str, inner: httpx.AsyncBaseTransport | None = None) -> None:
+        self._inner = inner or httpx.AsyncHTTPTransport()
+        self._fh: IO[str] = open(path, "a", encoding="utf-8")  # noqa: SIM115
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        content = await response.aread()
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+        entry = CassetteEntry(
+            method=request.method,
+            path=request.url.path,
+            status=response.status_code,
+            elapsed_ms=elapsed_ms,
+            body=redact_fields(_decode_body(content)),
+            request_body=redact_fields(_decode_body(request.content)),
+        )
+        self._fh.write(redact_secrets(entry.to_json()) + "\n")
+        self._fh.flush()
+
+        # Content is already decoded, so drop transfer-level headers.
+        headers = [
+            (k, v)
+            for k, v in response.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        self._fh.close()
+        await self._inner.aclose()
+
+
+class Cassette:
+    """Loaded cassette; serves matching entries round-robin by exact path, then by template."""
+
+    def __init__(self, entries: list[CassetteEntry]) -> None:
+        self.entries = entries
+        self._exact: dict[tuple[str, str], list[CassetteEntry]] = defaultdict(list)
+        self._templated: dict[tuple[str, str], list[CassetteEntry]] = defaultdict(list)
+        self._cursor: dict[tuple[str, str, bool], int] = defaultdict(int)
+        for e in entries:
+            self._exact[(e.method, e.path)].append(e)
+            self._templated[(e.method, endpoint_template(e.path))].append(e)
+
+    @staticmethod
+    def load(path: str) -> Cassette:
+        with open(path, encoding="utf-8") as fh:
+            return Cassette([CassetteEntry.from_json(line) for line in fh if line.strip()])
+
+    def match(self, method: str, path: str) -> CassetteEntry | None:
+        for exact, table, key in (
+            (True, self._exact, path),
+            (False, self._templated, endpoint_template(path)),
+        ):
+            hits = table.get((method, key))
+            if hits:
+                i = self._cursor[(method, key, exact)]
+                self._cursor[(method, key, exact)] = i + 1
+                return hits[i % len(hits)]
+        return None
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Serve responses from a cassette instead of the network.
+
+    ``speed`` scales recorded latency: 1.0 replays original timing, 2.0 is twice as fast,
+    0 disables the delay entirely.
+    """
+
+    def __init__(self, cassette: Cassette, speed: float = 1.0) -> None:
+        self._cassette = cassette
+        self._speed = speed
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry = self._cassette.match(request.method, request.url.path)
+        if entry is None:
+            return httpx.Response(
+                404,
+                json={"success": False, "msg": "not in cassette"},
+                request=request,
+            )
+        if self._speed > 0 and entry.elapsed_ms > 0:
+            await asyncio.sleep(entry.elapsed_ms / 1000.0 / self._speed)
+        if entry.body is None:
+            return httpx.Response(entry.status, request=request)
+        if isinstance(entry.body, str):
+            return httpx.Response(entry.status, text=entry.body, request=request)
+        return httpx.Response(entry.status, json=entry.body, request=request)
@@ -1,8 +1,39 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from os import getenv
 
+DEFAULT_ACCOUNT = "default"
+
+
+def parse_accounts(raw: str) -> dict[str, str]:
+    """Parse ``DOPRAX_ACCOUNTS`` (``name=api_key,name2=api_key2``)."""
+    out: dict[str, str] = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, key = item.partition("=")
+        name, key = name.strip(), key.strip()
+        if not sep or not name or not key:
+            raise ValueError(f"Invalid DOPRAX_ACCOUNTS entry: {name or item!r}")
+        out[name] = key
+    return out
+
+
+def parse_user_ids(raw: str) -> frozenset[int]:
+    """Parse a comma-separated list of Telegram user ids (``ADMIN_USER_IDS``)."""
+    out: set[int] = set()
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            out.add(int(item))
+        except ValueError:
+            raise ValueError(f"Invalid ADMIN_USER_IDS entry: {item!r}") from None
+    return frozenset(out)
+
 
 @dataclass(frozen=True)
 class Config:
@@ -14,6 +45,48 @@ class Config:
     log_level: str
     db_path: str
     dry_run: bool
+    doprax_record_path: str
+    doprax_replay_path: str
+    doprax_replay_speed: float
+    metrics_log_interval: int
+    doprax_hedge: bool
+    doprax_hedge_budget_pct: float
+    doprax_rate_per_second: float
+    doprax_catalog_ttl: float
+    doprax_status_ttl: float
+    doprax_inventory_ttl: float
+    inline_cache_seconds: float
+    doprax_pool_idle_seconds: float
+    provisioning_poll_seconds: float
+    watch_min_interval: float
+    watch_max_interval: float
+    telegram_global_rate: float
+    telegram_chat_rate: float
+    telegram_max_send_wait: float
+    webhook: bool
+    webhook_url: str
+    webhook_secret: str
+    webhook_listen: str
+    webhook_port: int
+    webhook_path: str
+    webhook_queue_size: int
+    max_concurrent_updates: int
+    user_queue_size: int
+    callback_stale_seconds: float
+    workers: int
+    worker_base_port: int
+    worker_health_interval: float
+    backlog_replay: bool
+    backlog_batch_size: int
+    backlog_concurrency: int
+    dedupe_window: int
+    drain_timeout: float
+    telegram_api_url: str
+    update_record_path: str
+    admin_user_ids: frozenset[int]
+    # account name -> API key; DOPRAX_API_KEY is the "default" account.
+    doprax_accounts: dict[str, str] = field(default_factory=dict)
+    doprax_default_account: str = DEFAULT_ACCOUNT
 
     @staticmethod
     def load() -> "Config":
@@ -25,13 +98,86 @@ class Config:
         log_level = (getenv("LOG_LEVEL") or "INFO").strip().upper()
         db_path = (getenv("DB_PATH") or "./data/bot.db").strip()
         dry_run = (getenv("DRY_RUN") or "0").strip() == "1"
+        doprax_record_path = (getenv("DOPRAX_RECORD_PATH") or "").strip()
+        doprax_replay_path = (getenv("DOPRAX_REPLAY_PATH") or "").strip()
+        doprax_replay_speed = float((getenv("DOPRAX_REPLAY_SPEED") or "1").strip())
+        metrics_log_interval = int((getenv("METRICS_LOG_INTERVAL") or "60").strip())
+        doprax_hedge = (getenv("DOPRAX_HEDGE") or "0").strip() == "1"
+        doprax_hedge_budget_pct = float((getenv("DOPRAX_HEDGE_BUDGET_PCT") or "5").strip())
+        doprax_rate_per_second = float((getenv("DOPRAX_RATE_PER_SECOND") or "5").strip())
+        doprax_catalog_ttl = float((getenv("DOPRAX_CATALOG_TTL") or "300").strip())
+        doprax_status_ttl = float((getenv("DOPRAX_STATUS_TTL") or "3").strip())
+        doprax_inventory_ttl = float((getenv("DOPRAX_INVENTORY_TTL") or "60").strip())
+        inline_cache_seconds = float((getenv("INLINE_CACHE_SECONDS") or "5").strip())
+        doprax_pool_idle_seconds = float((getenv("DOPRAX_POOL_IDLE_SECONDS") or "900").strip())
+        provisioning_poll_seconds = float((getenv("PROVISIONING_POLL_SECONDS") or "5").strip())
+        watch_min_interval = float((getenv("WATCH_MIN_INTERVAL") or "15").strip())
+        watch_max_interval = float((getenv("WATCH_MAX_INTERVAL") or "300").strip())
+        telegram_global_rate = float((getenv("TELEGRAM_GLOBAL_RATE") or "30").strip())
+        telegram_chat_rate = float((getenv("TELEGRAM_CHAT_RATE") or "1").strip())
+        telegram_max_send_wait = float((getenv("TELEGRAM_MAX_SEND_WAIT") or "30").strip())
+        webhook = (getenv("WEBHOOK") or "0").strip() == "1"
+        webhook_url = (getenv("WEBHOOK_URL") or "").strip()
+        webhook_secret = (getenv("WEBHOOK_SECRET") or "").strip()
+        webhook_listen = (getenv("WEBHOOK_LISTEN") or "0.0.0.0").strip()
+        webhook_port = int((getenv("WEBHOOK_PORT") or "8443").strip())
+        webhook_path = (getenv("WEBHOOK_PATH") or "/telegram").strip()
+        webhook_queue_size = int((getenv("WEBHOOK_QUEUE_SIZE") or "1000").strip())
+        max_concurrent_updates = int((getenv("MAX_CONCURRENT_UPDATES") or "256").strip())
+        user_queue_size = int((getenv("USER_QUEUE_SIZE") or "8").strip())
+        callback_stale_seconds = float((getenv("CALLBACK_STALE_SECONDS") or "10").strip())
+        workers = int((getenv("WORKERS") or "0").strip())
+        worker_base_port = int((getenv("WORKER_BASE_PORT") or "8600").strip())
+        worker_health_interval = float((getenv("WORKER_HEALTH_INTERVAL") or "5").strip())
+        backlog_replay = (getenv("BACKLOG_REPLAY") or "0").strip() == "1"
+        backlog_batch_size = int((getenv("BACKLOG_BATCH_SIZE") or "100").strip())
+        backlog_concurrency = int((getenv("BACKLOG_CONCURRENCY") or "32").strip())
+        dedupe_window = int((getenv("DEDUPE_WINDOW") or "4096").strip())
+        drain_timeout = float((getenv("DRAIN_TIMEOUT") or "15").strip())
+        telegram_api_url = (getenv("TELEGRAM_API_URL") or "https://api.telegram.org/bot").strip()
+        update_record_path = (getenv("UPDATE_RECORD_PATH") or "").strip()
+        admin_user_ids = parse_user_ids(getenv("ADMIN_USER_IDS") or "")
+
+        doprax_accounts = parse_accounts(getenv("DOPRAX_ACCOUNTS") or "")
+        if doprax_api_key:
+            doprax_accounts.setdefault(DEFAULT_ACCOUNT, doprax_api_key)
+        if not doprax_accounts:
+            # DRY_RUN / replay: a keyless default account.
+            doprax_accounts[DEFAULT_ACCOUNT] = ""
+        doprax_default_account = (
+            DEFAULT_ACCOUNT if DEFAULT_ACCOUNT in doprax_accounts else next(iter(doprax_accounts))
+        )
 
         if not telegram_bot_token:
             raise ValueError("TELEGRAM_BOT_TOKEN is required")
 
-        # In DRY_RUN mode, allow missing DOPRAX_API_KEY.
-        if not dry_run and not doprax_api_key:
-            raise ValueError("DOPRAX_API_KEY is required unless DRY_RUN=1")
+        # In DRY_RUN or replay mode, allow missing DOPRAX_API_KEY.
+        has_key = any(doprax_accounts.values())
+        if not dry_run and not doprax_replay_path and not has_key:
+            raise ValueError(
+                "DOPRAX_API_KEY (or DOPRAX_ACCOUNTS) is required unless DRY_RUN=1 "
+                "or DOPRAX_REPLAY_PATH is set"
+            )
+        if doprax_record_path and doprax_replay_path:
+            raise ValueError("DOPRAX_RECORD_PATH and DOPRAX_REPLAY_PATH are mutually exclusive")
+        if not 0 <= doprax_hedge_budget_pct <= 100:
+            raise ValueError("DOPRAX_HEDGE_BUDGET_PCT must be between 0 and 100")
+        if not 0 < watch_min_interval <= watch_max_interval:
+            raise ValueError("WATCH_MIN_INTERVAL must be > 0 and <= WATCH_MAX_INTERVAL")
+        if webhook and not webhook_secret:
+            raise ValueError("WEBHOOK_SECRET is required when WEBHOOK=1")
+        if webhook_queue_size < 1:
+            raise ValueError("WEBHOOK_QUEUE_SIZE must be >= 1")
+        if max_concurrent_updates < 1 or user_queue_size < 1:
+            raise ValueError("MAX_CONCURRENT_UPDATES and USER_QUEUE_SIZE must be >= 1")
+        if workers < 0:
+            raise ValueError("WORKERS must be >= 0")
+        if not 1 <= backlog_batch_size <= 100:
+            raise ValueError("BACKLOG_BATCH_SIZE must be between 1 and 100")
+        if backlog_concurrency < 1 or dedupe_window < 8:
+            raise ValueError("BACKLOG_CONCURRENCY must be >= 1 and DEDUPE_WINDOW >= 8")
+        if doprax_replay_speed < 0:
+            raise ValueError("DOPRAX_REPLAY_SPEED must be >= 0")
 
         return Config(
             telegram_bot_token=telegram_bot_token,
@@ -40,4 +186,45 @@ class Config:
             log_level=log_level,
             db_path=db_path,
             dry_run=dry_run,
+            doprax_record_path=doprax_record_path,
+            doprax_replay_path=doprax_replay_path,
+            doprax_replay_speed=doprax_replay_speed,
+            metrics_log_interval=metrics_log_interval,
+            doprax_hedge=doprax_hedge,
+            doprax_hedge_budget_pct=doprax_hedge_budget_pct,
+            doprax_rate_per_second=doprax_rate_per_second,
+            doprax_catalog_ttl=doprax_catalog_ttl,
+            doprax_status_ttl=doprax_status_ttl,
+            doprax_inventory_ttl=doprax_inventory_ttl,
+            inline_cache_seconds=inline_cache_seconds,
+            doprax_pool_idle_seconds=doprax_pool_idle_seconds,
+            provisioning_poll_seconds=provisioning_poll_seconds,
+            watch_min_interval=watch_min_interval,
+            watch_max_interval=watch_max_interval,
+            telegram_global_rate=telegram_global_rate,
+            telegram_chat_rate=telegram_chat_rate,
+            telegram_max_send_wait=telegram_max_send_wait,
+            webhook=webhook,
+            webhook_url=webhook_url,
+            webhook_secret=webhook_secret,
+            webhook_listen=webhook_listen,
+            webhook_port=webhook_port,
+            webhook_path=webhook_path if webhook_path.startswith("/") else f"/{webhook_path}",
+            webhook_queue_size=webhook_queue_size,
+            max_concurrent_updates=max_concurrent_updates,
+            user_queue_size=user_queue_size,
+            callback_stale_seconds=callback_stale_seconds,
+            workers=workers,
+            worker_base_port=worker_base_port,
+            worker_health_interval=worker_health_interval,
+            backlog_replay=backlog_replay,
+            backlog_batch_size=backlog_batch_size,
+            backlog_concurrency=backlog_concurrency,
+            dedupe_window=dedupe_window,
+            drain_timeout=drain_timeout,
+            telegram_api_url=telegram_api_url,
+            update_record_path=update_record_path,
+            admin_user_ids=admin_user_ids,
+            doprax_accounts=doprax_accounts,
+            doprax_default_account=doprax_default_account,
         )
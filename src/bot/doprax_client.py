@@ -1,21 +1,30 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import os
 import time
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from typing import Any, Iterable, Optional, Tuple
 
 import httpx
 
+from bot.cache import TTLCache
+from bot.cassettes import Cassette, RecordingTransport, ReplayTransport
 from bot.errors import (
     DopraxAuthError,
+    DopraxCircuitOpen,
+    DopraxError,
     DopraxNetworkError,
     DopraxNotFound,
     DopraxRateLimited,
     DopraxServerError,
     DopraxValidationError,
 )
-from bot.utils import safe_get
+from bot.metrics import METRICS, Histogram
+from bot.resilience import CircuitBreaker, TokenBucket
+from bot.utils import endpoint_template, safe_get
 
 
 @dataclass(frozen=True)
@@ -23,6 +32,47 @@ class DopraxConfig:
     base_url: str
     api_key: str
     dry_run: bool
+    # Cassettes: record live traffic to record_path, or serve it back from replay_path.
+    record_path: str = ""
+    replay_path: str = ""
+    replay_speed: float = 1.0
+    # Hedging (GET only): fire a backup request once the primary is slower than the
+    # endpoint's observed wait-time quantile, capped at hedge_budget_pct of GET traffic.
+    hedge: bool = False
+    hedge_budget_pct: float = 5.0
+    hedge_quantile: float = 0.95
+    hedge_min_delay: float = 0.05
+    hedge_min_samples: int = 20
+    # Per-client (per-account) protection: request rate budget, catalog cache, breaker.
+    rate_per_second: float = 0.0
+    rate_burst: float = 10.0
+    catalog_ttl: float = 300.0
+    # Read-only catalog snapshot written by the worker-mode supervisor ("" disables).
+    catalog_snapshot: str = ""
+    # Short-lived VM status cache shared by every user of this account (0 disables).
+    status_ttl: float = 0.0
+    # Inventory (VM list) snapshot reused for paging through the list (0 disables).
+    inventory_ttl: float = 0.0
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 30.0
+
+
+class HedgeBudget:
+    """Token bucket that earns ``ratio`` tokens per request; each hedge spends one."""
+
+    def __init__(self, ratio: float, burst: float = 10.0) -> None:
+        self._ratio = ratio
+        self._burst = max(1.0, burst)
+        self._tokens = 0.0
+
+    def on_request(self) -> None:
+        self._tokens = min(self._burst, self._tokens + self._ratio)
+
+    def try_acquire(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
 
 
 class DopraxClient:
@@ -34,11 +84,29 @@ class DopraxClient:
         self._cfg = cfg
         self._client = client
         self._owned_client = client is None
+        self._hedge_budget = HedgeBudget(cfg.hedge_budget_pct / 100.0)
+        # This client's (so this account's) GET wait times per endpoint, for the hedge delay.
+        self._get_waits: dict[str, Histogram] = {}
+        self._rate = TokenBucket(cfg.rate_per_second, cfg.rate_burst)
+        self._breaker = CircuitBreaker(cfg.breaker_threshold, cfg.breaker_cooldown)
+        self._catalog: TTLCache[str, list[dict[str, Any]]] = TTLCache(cfg.catalog_ttl, maxsize=8)
+        self._status: TTLCache[str, dict[str, Any]] = TTLCache(cfg.status_ttl, maxsize=1024)
+        self._inventory: TTLCache[str, list[dict[str, Any]]] = TTLCache(
+            cfg.inventory_ttl, maxsize=1
+        )
 
     async def open(self) -> None:
         if self._client is None:
+            transport: Optional[httpx.AsyncBaseTransport] = None
+            if self._cfg.replay_path:
+                transport = ReplayTransport(
+                    Cassette.load(self._cfg.replay_path), speed=self._cfg.replay_speed
+                )
+            elif self._cfg.record_path:
+                transport = RecordingTransport(self._cfg.record_path)
             self._client = httpx.AsyncClient(
                 base_url=self._cfg.base_url,
+                transport=transport,
                 follow_redirects=True,
                 headers={
                     "X-API-Key": self._cfg.api_key,
@@ -67,31 +135,153 @@ class DopraxClient:
         retries = 3
         backoff = 0.5
         last_exc: Exception | None = None
+        endpoint = endpoint_template(url)
 
         for attempt in range(retries + 1):
+            if attempt:
+                METRICS.counter("doprax_retries_total", method=method, endpoint=endpoint).inc()
+            if not self._breaker.allow():
+                _count_outcome(method, endpoint, "breaker", DopraxCircuitOpen.__name__)
+                raise DopraxCircuitOpen(
+                    message_key="something_wrong", details=f"circuit open ({endpoint})"
+                )
+            await self._rate.acquire()
             try:
-                resp = await self.client.request(method, url, json=json_data)
-                return self._handle_response(resp)
-            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                resp = await self._send(method, url, json_data, endpoint)
+            except httpx.HTTPError as e:
+                self._breaker.record_failure()
+                _count_outcome(method, endpoint, "network", type(e).__name__)
                 last_exc = e
                 if attempt >= retries:
                     break
                 await asyncio.sleep(backoff * (2**attempt))
+                continue
+            except BaseException:
+                # Cancelled (or a bug): no verdict on Doprax, but a half-open trial must not
+                # stay taken or the breaker never closes again.
+                self._breaker.release()
+                raise
+
+            status_class = f"{resp.status_code // 100}xx"
+            if resp.status_code >= 500 or resp.status_code == 429:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+            try:
+                data = self._handle_response(resp, endpoint)
             except DopraxRateLimited as e:
+                _count_outcome(method, endpoint, status_class, type(e).__name__)
                 last_exc = e
                 if attempt >= retries:
                     break
                 await asyncio.sleep(backoff * (2**attempt))
+                continue
+            except DopraxError as e:
+                _count_outcome(method, endpoint, status_class, type(e).__name__)
+                raise
+            _count_outcome(method, endpoint, status_class, "ok")
+            return data
         raise DopraxNetworkError(
             message_key="something_wrong", details=str(last_exc or "network_error")
         )
 
-    def _handle_response(self, resp: httpx.Response) -> Any:
+    async def _send(
+        self, method: str, url: str, json_data: Any | None, endpoint: str
+    ) -> httpx.Response:
+        if method == "GET" and self._cfg.hedge:
+            return await self._send_hedged(url, endpoint)
+        return await self._send_once(method, url, json_data, endpoint)
+
+    def _get_wait(self, endpoint: str) -> Histogram:
+        h = self._get_waits.get(endpoint)
+        if h is None:
+            h = self._get_waits[endpoint] = Histogram()
+        return h
+
+    def _hedge_delay(self, endpoint: str) -> float | None:
+        h = self._get_waits.get(endpoint)
+        if h is None or h.samples < self._cfg.hedge_min_samples:
+            return None
+        q = h.quantile(self._cfg.hedge_quantile)
+        return None if q is None else max(self._cfg.hedge_min_delay, q)
+
+    async def _send_hedged(self, url: str, endpoint: str) -> httpx.Response:
+        """Idempotent GET with one backup request; the first reply wins, the loser is cancelled."""
+        self._hedge_budget.on_request()
+        delay = self._hedge_delay(endpoint)
+        primary = asyncio.create_task(self._send_once("GET", url, None, endpoint))
+        tasks = [primary]
+        try:
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._hedge_budget.try_acquire():
+                return await primary
+
+            METRICS.counter("doprax_hedges_total", endpoint=endpoint).inc()
+            backup = asyncio.create_task(self._send_once("GET", url, None, endpoint))
+            tasks.append(backup)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        if t is backup:
+                            METRICS.counter("doprax_hedge_wins_total", endpoint=endpoint).inc()
+                        return t.result()
+            # Both attempts failed: surface the primary's error to the retry loop.
+            return primary.result()
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+    async def _send_once(
+        self, method: str, url: str, json_data: Any | None, endpoint: str
+    ) -> httpx.Response:
+        """One HTTP attempt, recording connect and wait (time to response headers) time."""
+        marks: dict[str, float] = {}
+
+        async def trace(event: str, info: dict[str, Any]) -> None:
+            marks[event] = time.perf_counter()
+
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(
+                method, url, json=json_data, extensions={"trace": trace}
+            )
+        except asyncio.CancelledError:
+            if method == "GET":
+                # A hedge loser: it took at least this long. Leaving it out would pull the
+                # quantile towards the winners and hedge ever earlier.
+                self._get_wait(endpoint).observe(time.perf_counter() - started)
+            raise
+        total = time.perf_counter() - started
+
+        connect = _span(marks, "connection.connect_tcp") + _span(marks, "connection.start_tls")
+        wait = _span(marks, "send_request_headers", "receive_response_headers", proto=True)
+        if not wait:
+            # Transports without tracing (mocks, replay) only give us the total.
+            wait = max(0.0, total - connect)
+        METRICS.histogram("doprax_connect_seconds", method=method, endpoint=endpoint).observe(
+            connect
+        )
+        METRICS.histogram("doprax_wait_seconds", method=method, endpoint=endpoint).observe(wait)
+        if method == "GET":
+            self._get_wait(endpoint).observe(wait)
+        return resp
+
+    def _handle_response(self, resp: httpx.Response, endpoint: str = "") -> Any:
         status = resp.status_code
+        started = time.perf_counter()
         try:
             data = resp.json() if resp.content else {}
         except Exception:
             data = {}
+        if endpoint:
+            METRICS.histogram("doprax_decode_seconds", endpoint=endpoint).observe(
+                time.perf_counter() - started
+            )
 
         if 200 <= status < 300:
             return data
@@ -154,6 +344,9 @@ class DopraxClient:
                     ],
                 },
             ]
+        if "/status/" in url and method == "GET":
+            vm_code = url.split("/api/v1/vms/")[1].split("/status/")[0]
+            return {"vm_code": vm_code, "status": "RUNNING", "isActive": True}
         if url.startswith("/api/v1/vms/") and method == "GET":
             return [
                 {
@@ -176,9 +369,6 @@ class DopraxClient:
                 "vm_code": "vm_created_dryrun",
                 "status": "PROVISIONING",
             }
-        if "/status/" in url and method == "GET":
-            vm_code = url.split("/api/v1/vms/")[1].split("/status/")[0]
-            return {"vm_code": vm_code, "status": "RUNNING", "isActive": True}
         return {}
 
     async def list_vms(self) -> list[dict[str, Any]]:
@@ -186,10 +376,31 @@ class DopraxClient:
         data = self._unwrap(raw)
         return data if isinstance(data, list) else []
 
+    async def list_vms_snapshot(self, refresh: bool = False) -> tuple[list[dict[str, Any]], float]:
+        """
+        Return (VMs, age in seconds) from a shared inventory snapshot kept for ``inventory_ttl``.
+
+        Paging reads from the same snapshot so pages stay consistent and cost no API calls;
+        ``refresh`` forces a new snapshot. The list is shared; treat it as read-only.
+        """
+        if self._cfg.inventory_ttl <= 0:
+            return await self.list_vms(), 0.0
+        if refresh:
+            self._inventory.invalidate()
+        return await self._inventory.fetch("vms", self.list_vms)
+
+    def cached_vms(self) -> list[dict[str, Any]] | None:
+        """The current inventory snapshot if one is fresh, without ever calling the API."""
+        hit = self._inventory.get("vms")
+        return None if hit is None else hit[0]
+
     async def create_vm(self, payload: dict[str, Any]) -> dict[str, Any]:
         raw = await self._request("POST", "/api/v1/vms/", json_data=payload)
 
         # طبق داک: {"success": true, "vm": {...}, "msg": {...}}
+        # A create changes what the account looks like; drop cached statuses and inventory.
+        self.invalidate_status()
+        self._inventory.invalidate()
         if isinstance(raw, dict) and "vm" in raw and isinstance(raw["vm"], dict):
             return raw["vm"]
 
@@ -197,11 +408,66 @@ class DopraxClient:
         return data if isinstance(data, dict) else {}
 
     async def get_vm_status(self, vm_code: str) -> dict[str, Any]:
+        """Fetch a fresh status; the result also refreshes the status cache."""
+        data = await self._fetch_vm_status(vm_code)
+        if self._cfg.status_ttl > 0:
+            self._status.put(vm_code, data)
+        return data
+
+    async def get_vm_status_cached(self, vm_code: str) -> tuple[dict[str, Any], float]:
+        """
+        Return (status, age in seconds), reusing a status fetched within ``status_ttl``.
+
+        Concurrent misses for the same VM share one request.
+        """
+        if self._cfg.status_ttl <= 0:
+            return await self._fetch_vm_status(vm_code), 0.0
+        return await self._status.fetch(vm_code, lambda: self._fetch_vm_status(vm_code))
+
+    def invalidate_status(self, vm_code: Optional[str] = None) -> None:
+        self._status.invalidate(vm_code)
+
+    async def _fetch_vm_status(self, vm_code: str) -> dict[str, Any]:
         raw = await self._request("GET", f"/api/v1/vms/{vm_code}/status/")
         data = self._unwrap(raw)
         return data if isinstance(data, dict) else {}
 
+    @property
+    def breaker_state(self) -> str:
+        return self._breaker.state
+
+    async def _cached_catalog(
+        self, key: str, loader: Callable[[], Awaitable[list[dict[str, Any]]]]
+    ) -> list[dict[str, Any]]:
+        # Cached lists are shared between callers; treat them as read-only.
+        if self._cfg.catalog_snapshot:
+            loader = self._snapshot_loader(key, loader)
+        if self._cfg.catalog_ttl <= 0:
+            return await loader()
+        return await self._catalog.get_or_load(key, loader)
+
+    def _snapshot_loader(
+        self, key: str, loader: Callable[[], Awaitable[list[dict[str, Any]]]]
+    ) -> Callable[[], Awaitable[list[dict[str, Any]]]]:
+        async def _load() -> list[dict[str, Any]]:
+            max_age = self._cfg.catalog_ttl if self._cfg.catalog_ttl > 0 else float("inf")
+            shared = read_catalog_snapshot(self._cfg.catalog_snapshot, max_age).get(key)
+            if shared is not None:
+                METRICS.counter("doprax_catalog_snapshot_total", outcome="hit").inc()
+                return shared
+            METRICS.counter("doprax_catalog_snapshot_total", outcome="miss").inc()
+            return await loader()
+
+        return _load
+
+    async def catalog(self) -> dict[str, list[dict[str, Any]]]:
+        """Everything ``read_catalog_snapshot`` serves, keyed like the catalog cache."""
+        return {"locations": await self.get_locations(), "os": await self.get_os_list()}
+
     async def get_locations(self) -> list[dict[str, Any]]:
+        return await self._cached_catalog("locations", self._fetch_locations)
+
+    async def _fetch_locations(self) -> list[dict[str, Any]]:
         raw = await self._request("GET", "/api/v1/vlocations/")
         data = self._unwrap(raw)
 
@@ -253,6 +519,9 @@ class DopraxClient:
         return data if isinstance(data, list) else []
 
     async def get_os_list(self) -> list[dict[str, Any]]:
+        return await self._cached_catalog("os", self._fetch_os_list)
+
+    async def _fetch_os_list(self) -> list[dict[str, Any]]:
         raw = await self._request("GET", "/api/v1/os/")
         data = self._unwrap(raw)
 
@@ -356,6 +625,49 @@ class DopraxClient:
         )
 
 
+def write_catalog_snapshot(path: str, catalog: dict[str, list[dict[str, Any]]]) -> None:
+    """Atomically replace the shared catalog snapshot at ``path``."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"written_at": time.time(), "catalog": catalog}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def read_catalog_snapshot(path: str, max_age: float) -> dict[str, list[dict[str, Any]]]:
+    """Catalog lists from ``path`` if it exists and is younger than ``max_age``, else {}."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or time.time() - float(data.get("written_at", 0)) > max_age:
+        return {}
+    catalog = data.get("catalog")
+    return catalog if isinstance(catalog, dict) else {}
+
+
+def _count_outcome(method: str, endpoint: str, status_class: str, outcome: str) -> None:
+    METRICS.counter(
+        "doprax_requests_total",
+        method=method,
+        endpoint=endpoint,
+        status_class=status_class,
+        outcome=outcome,
+    ).inc()
+
+
+def _span(marks: dict[str, float], start: str, end: str = "", proto: bool = False) -> float:
+    """Duration between two httpcore trace events (``<start>.started`` -> ``<end>.complete``)."""
+    end = end or start
+    prefixes = ("http11.", "http2.") if proto else ("",)
+    for p in prefixes:
+        a = marks.get(f"{p}{start}.started")
+        b = marks.get(f"{p}{end}.complete")
+        if a is not None and b is not None:
+            return max(0.0, b - a)
+    return 0.0
+
+
 def _tokens(s: str) -> list[str]:
     return [t for t in "".join(ch if ch.isalnum() else " " for ch in s).split()]
 
@@ -37,3 +37,7 @@ class DopraxServerError(DopraxError):
 
 class DopraxNetworkError(DopraxError):
     pass
+
+
+class DopraxCircuitOpen(DopraxError):
+    pass
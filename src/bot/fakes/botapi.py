@@ -0,0 +1,278 @@
+"""
+Telegram Bot API stand-in.
+
+Serves the handful of methods the bot uses (``getMe``, long-polling ``getUpdates``,
+``sendMessage``, ``editMessageText``, ``answerCallbackQuery``, ``setMyCommands`` and a few
+no-ops) so the real polling and sending path can be load-tested without touching Telegram.
+Tests and the swarm generator push updates with :meth:`FakeBotAPI.push` and observe what the
+bot sends per chat with :meth:`FakeBotAPI.subscribe`. Point the bot at it with::
+
+    python -m bot.fakes.botapi --port 8082
+    TELEGRAM_API_URL=http://127.0.0.1:8082/bot TELEGRAM_BOT_TOKEN=1:fake DRY_RUN=1 \\
+        python -m bot.main
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import time
+from collections import Counter, deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import parse_qsl
+
+from bot.fakes.doprax import LatencyModel
+from bot.httpserver import HttpRequest, HttpResponse, HttpServer, json_response
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_doprax_bot"}
+# Sent form-encoded by PTB; every other value is JSON-encoded.
+_STRING_FIELDS = frozenset({"text", "parse_mode", "callback_query_id", "inline_message_id"})
+_NOOP_METHODS = frozenset(
+    {
+        "setMyCommands",
+        "deleteMyCommands",
+        "deleteWebhook",
+        "setWebhook",
+        "answerInlineQuery",
+        "sendChatAction",
+        "deleteMessage",
+        "close",
+        "logOut",
+    }
+)
+MAX_POLL_SECONDS = 50.0
+
+
+@dataclass(frozen=True)
+class BotCall:
+    """One Bot API call the bot made that concerns ``chat_id``."""
+
+    method: str
+    chat_id: int
+    params: dict[str, Any]
+    at: float
+
+
+Listener = Callable[[BotCall], None]
+
+
+def _decode(req: HttpRequest) -> dict[str, Any]:
+    content_type = req.headers.get("content-type", "")
+    if "json" in content_type:
+        return req.json() or {}
+    params: dict[str, Any] = {}
+    for key, value in parse_qsl(req.body.decode("utf-8"), keep_blank_values=True):
+        if key in _STRING_FIELDS:
+            params[key] = value
+            continue
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+def _ok(result: Any) -> HttpResponse:
+    return json_response(200, {"ok": True, "result": result})
+
+
+def _error(code: int, description: str, **parameters: Any) -> HttpResponse:
+    payload: dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+    if parameters:
+        payload["parameters"] = parameters
+    return json_response(code, payload)
+
+
+class FakeBotAPI:
+    """
+    In-memory Bot API.
+
+    ``latency`` uses the same specs as the Doprax stand-in (``fixed:<ms>``, ``exp:<mean>``,
+    ...) and applies to every call except ``getUpdates``. ``rate_429`` answers that share
+    of sends with ``429 Too Many Requests`` and ``retry_after``, like a flooded bot.
+    """
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 1,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._rng = random.Random(seed)
+        self._latency = LatencyModel(latency, self._rng)
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self._clock = clock
+        self._updates: deque[dict[str, Any]] = deque()
+        self.next_update_id = 1
+        self._arrived = asyncio.Event()
+        self._message_ids: dict[int, int] = {}
+        self._query_chats: dict[str, int] = {}
+        self._listeners: dict[int, Listener] = {}
+        self.calls: Counter[str] = Counter()
+        self.commands: list[dict[str, Any]] = []
+        # Set once the bot is long-polling, i.e. ready to take updates.
+        self.polling = asyncio.Event()
+        self._closed = False
+
+    # ---- test / generator side ------------------------------------------------
+
+    def push(self, update: dict[str, Any]) -> int:
+        """Queue ``update`` for ``getUpdates``; its ``update_id`` is assigned here."""
+        update_id = self.next_update_id
+        self.next_update_id += 1
+        update = {**update, "update_id": update_id}
+        query = update.get("callback_query")
+        if query is not None:
+            self._query_chats[query["id"]] = query["from"]["id"]
+        self._updates.append(update)
+        self._arrived.set()
+        return update_id
+
+    @property
+    def pending(self) -> int:
+        return len(self._updates)
+
+    def close(self) -> None:
+        """Answer pending and future long polls at once, so the server can shut down."""
+        self._closed = True
+        self._arrived.set()
+
+    def subscribe(self, chat_id: int, listener: Listener) -> None:
+        self._listeners[chat_id] = listener
+
+    def unsubscribe(self, chat_id: int) -> None:
+        self._listeners.pop(chat_id, None)
+
+    def _notify(self, method: str, chat_id: int | None, params: dict[str, Any]) -> None:
+        if chat_id is None:
+            return
+        listener = self._listeners.get(chat_id)
+        if listener is not None:
+            listener(BotCall(method, chat_id, params, self._clock()))
+
+    # ---- HTTP side --------------------------------------------------------------
+
+    async def handle(self, req: HttpRequest) -> HttpResponse:
+        """HTTP front end (used by :class:`HttpServer`): ``/bot<token>/<method>``."""
+        prefix, _, method = req.path.rpartition("/")
+        if not prefix.startswith("/bot") or not method:
+            return _error(404, "Not Found")
+        try:
+            params = _decode(req)
+        except ValueError:
+            return _error(400, "Bad Request: invalid body")
+        self.calls[method] += 1
+        if method == "getUpdates":
+            return _ok(await self._get_updates(params))
+        await asyncio.sleep(self._latency.sample())
+        if method in ("sendMessage", "editMessageText") and self._rng.random() < self.rate_429:
+            return _error(
+                429,
+                f"Too Many Requests: retry after {self.retry_after}",
+                retry_after=self.retry_after,
+            )
+        handler: Callable[[dict[str, Any]], HttpResponse] | None = getattr(
+            self, f"_m_{method}", None
+        )
+        if handler is not None:
+            return handler(params)
+        if method in _NOOP_METHODS:
+            if method == "setMyCommands":
+                self.commands = list(params.get("commands") or [])
+            return _ok(True)
+        return _error(404, "Not Found: method not found")
+
+    async def _get_updates(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        self.polling.set()
+        offset = int(params.get("offset") or 0)
+        # Updates below the offset are confirmed and never returned again.
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and not self._closed:
+            self._arrived.clear()
+            timeout = min(float(params.get("timeout") or 0), MAX_POLL_SECONDS)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._arrived.wait(), timeout=timeout)
+        limit = int(params.get("limit") or 100)
+        return [u for _, u in zip(range(limit), self._updates, strict=False)]
+
+    def _message(self, chat_id: int, params: dict[str, Any], message_id: int) -> dict[str, Any]:
+        message: dict[str, Any] = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": str(params.get("text", "")),
+        }
+        markup = params.get("reply_markup")
+        # Telegram only echoes inline keyboards back on the message.
+        if isinstance(markup, dict) and "inline_keyboard" in markup:
+            message["reply_markup"] = markup
+        return message
+
+    def _m_getMe(self, params: dict[str, Any]) -> HttpResponse:
+        return _ok(BOT_USER)
+
+    def _m_sendMessage(self, params: dict[str, Any]) -> HttpResponse:
+        chat_id = int(params["chat_id"])
+        message_id = self._message_ids.get(chat_id, 0) + 1
+        self._message_ids[chat_id] = message_id
+        params = {**params, "message_id": message_id}
+        self._notify("sendMessage", chat_id, params)
+        return _ok(self._message(chat_id, params, message_id))
+
+    def _m_editMessageText(self, params: dict[str, Any]) -> HttpResponse:
+        if "inline_message_id" in params:
+            return _ok(True)
+        chat_id = int(params["chat_id"])
+        self._notify("editMessageText", chat_id, params)
+        return _ok(self._message(chat_id, params, int(params["message_id"])))
+
+    def _m_editMessageReplyMarkup(self, params: dict[str, Any]) -> HttpResponse:
+        return self._m_editMessageText(params)
+
+    def _m_answerCallbackQuery(self, params: dict[str, Any]) -> HttpResponse:
+        chat_id = self._query_chats.pop(str(params.get("callback_query_id")), None)
+        self._notify("answerCallbackQuery", chat_id, params)
+        return _ok(True)
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="python -m bot.fakes.botapi", description="Telegram Bot API stand-in."
+    )
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8082)
+    p.add_argument(
+        "--latency",
+        default="fixed:0",
+        help="fixed:<ms> | uniform:<lo>:<hi> | exp:<mean> | lognormal:<median>:<sigma>",
+    )
+    p.add_argument("--rate-429", type=float, default=0.0)
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    fake = FakeBotAPI(latency=args.latency, rate_429=args.rate_429)
+    server = HttpServer(fake.handle, host=args.host, port=args.port)
+
+    async def _run() -> None:
+        await server.start()
+        print(f"Fake Bot API listening on {server.url}/bot<token>/", flush=True)
+        await server.serve_forever()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
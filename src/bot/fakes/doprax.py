@@ -0,0 +1,385 @@
+"""
+Doprax-compatible API stand-in.
+
+Run it as a module and point the bot at it (with DRY_RUN=0) to exercise the real client
+path (HTTP stack, retries, error mapping) end to end:
+
+    python -m bot.fakes.doprax --port 8081 --vms 2000 --latency lognormal:150:0.5 --rate-429 0.02
+    DOPRAX_BASE_URL=http://127.0.0.1:8081 DOPRAX_API_KEY=local python -m bot.main
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+import httpx
+
+from bot.httpserver import HttpRequest, HttpResponse, HttpServer, json_response
+
+_STATUSES = ("RUNNING", "RUNNING", "RUNNING", "STOPPED", "PROVISIONING")
+_CITIES = (
+    ("Germany", "Frankfurt"),
+    ("Netherlands", "Amsterdam"),
+    ("Finland", "Helsinki"),
+    ("France", "Paris"),
+    ("United Kingdom", "London"),
+    ("United States", "New York"),
+    ("Canada", "Toronto"),
+    ("Singapore", "Singapore"),
+    ("Japan", "Tokyo"),
+    ("Poland", "Warsaw"),
+)
+_PROVIDERS = {
+    "Digitalocean": ("DO1", "DO2", "DO3"),
+    "Hetzner": ("H1", "H2"),
+    "Gcore": ("g1a", "g1b"),
+    "Vultr": ("V1", "V2"),
+    "Scaleway": ("SW1", "SW2"),
+}
+_OS_SLUGS = ("ubuntu_20_04", "ubuntu_22_04", "ubuntu_24_04", "debian_12", "centos_stream_9")
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a compact spec (all values in milliseconds):
+
+    - ``fixed:<ms>``
+    - ``uniform:<lo>:<hi>``
+    - ``exp:<mean>``
+    - ``lognormal:<median>:<sigma>``
+    """
+
+    def __init__(self, spec: str, rng: random.Random) -> None:
+        self.spec = spec
+        self._rng = rng
+        kind, *raw = spec.split(":")
+        args = [float(x) for x in raw]
+        self._kind = kind
+        self._args = args
+        if kind == "fixed" and len(args) == 1:
+            return
+        if kind == "uniform" and len(args) == 2 and args[0] <= args[1]:
+            return
+        if kind == "exp" and len(args) == 1 and args[0] > 0:
+            return
+        if kind == "lognormal" and len(args) == 2 and args[0] > 0:
+            return
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+
+    def sample(self) -> float:
+        """Return a latency sample in seconds."""
+        a = self._args
+        if self._kind == "fixed":
+            ms = a[0]
+        elif self._kind == "uniform":
+            ms = self._rng.uniform(a[0], a[1])
+        elif self._kind == "exp":
+            ms = self._rng.expovariate(1.0 / a[0])
+        else:
+            ms = self._rng.lognormvariate(math.log(a[0]), a[1])
+        return max(0.0, ms) / 1000.0
+
+
+@dataclass(frozen=True)
+class ChaosConfig:
+    latency: str = "fixed:0"
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    rate_timeout: float = 0.0
+    # How long a "timeout" request hangs before the server gives up with 504.
+    timeout_seconds: float = 30.0
+
+
+@dataclass(frozen=True)
+class FleetConfig:
+    vms: int = 50
+    locations: int = 6
+    # Seconds a newly created VM stays PROVISIONING before it turns RUNNING.
+    provision_seconds: float = 20.0
+    seed: int = 42
+
+
+class Outcome(StrEnum):
+    OK = "ok"
+    RATE_LIMITED = "429"
+    SERVER_ERROR = "5xx"
+    TIMEOUT = "timeout"
+
+
+@dataclass
+class _VM:
+    name: str
+    vm_code: str
+    status: str
+    location: str
+    location_code: str
+    created_at: float = field(default_factory=time.time)
+
+
+class FakeDoprax:
+    """In-memory Doprax API with a synthetic fleet and injectable faults."""
+
+    def __init__(
+        self,
+        fleet: FleetConfig | None = None,
+        chaos: ChaosConfig | None = None,
+        api_key: str = "",
+    ) -> None:
+        self.fleet = fleet or FleetConfig()
+        self.chaos = chaos or ChaosConfig()
+        self._api_key = api_key
+        self._rng = random.Random(self.fleet.seed)
+        self._latency = LatencyModel(self.chaos.latency, self._rng)
+        self._locations = self._build_locations()
+        self._vms: dict[str, _VM] = {}
+        self._created = 0
+        self.requests = 0
+        for i in range(self.fleet.vms):
+            loc = self._locations[i % len(self._locations)]
+            vm = _VM(
+                name=f"vm-{i:05d}",
+                vm_code=f"vm_{i:06d}",
+                status=self._rng.choice(_STATUSES),
+                location=loc["name"],
+                location_code=loc["locationCode"],
+                created_at=0.0,
+            )
+            self._vms[vm.vm_code] = vm
+
+    def _build_locations(self) -> list[dict[str, Any]]:
+        out: list[dict[str, Any]] = []
+        n = max(1, self.fleet.locations)
+        for i in range(n):
+            country, city = _CITIES[i % len(_CITIES)]
+            suffix = f" {i // len(_CITIES) + 1}" if i >= len(_CITIES) else ""
+            provider = list(_PROVIDERS)[i % len(_PROVIDERS)]
+            out.append(
+                {
+                    "locationCode": f"loc-{i:03d}",
+                    "name": f"{country}, {city}{suffix}",
+                    "provider": provider,
+                }
+            )
+        return out
+
+    def set_status(self, vm_code: str, status: str) -> None:
+        """Force a VM's status (e.g. to drive provisioning/watch flows in tests)."""
+        self._vms[vm_code].status = status
+
+    # ---- fault injection -------------------------------------------------
+
+    def decide(self) -> Outcome:
+        r = self._rng.random()
+        c = self.chaos
+        if r < c.rate_timeout:
+            return Outcome.TIMEOUT
+        r -= c.rate_timeout
+        if r < c.rate_429:
+            return Outcome.RATE_LIMITED
+        r -= c.rate_429
+        if r < c.rate_5xx:
+            return Outcome.SERVER_ERROR
+        return Outcome.OK
+
+    # ---- routing -----------------------------------------------------------
+
+    def route(self, method: str, path: str, headers: dict[str, str], body: Any) -> tuple[int, Any]:
+        """Serve one request from the in-memory state; returns (status, json payload)."""
+        if self._api_key and headers.get("x-api-key") != self._api_key:
+            return 401, {"success": False, "msg": "Invalid API key"}
+
+        if path == "/api/v1/os/" and method == "GET":
+            return 200, self._os_payload()
+        if path == "/api/v1/vlocations/" and method == "GET":
+            return 200, self._locations_payload()
+        if path == "/api/v1/vms/" and method == "GET":
+            self._advance()
+            return 200, {"success": True, "data": [self._vm_dict(v) for v in self._vms.values()]}
+        if path == "/api/v1/vms/" and method == "POST":
+            return self._create(body if isinstance(body, dict) else {})
+        if path.startswith("/api/v1/vms/") and path.endswith("/status/") and method == "GET":
+            vm_code = path[len("/api/v1/vms/") : -len("/status/")]
+            self._advance()
+            vm = self._vms.get(vm_code)
+            if vm is None:
+                return 404, {"success": False, "msg": "VM not found"}
+            return 200, {
+                "success": True,
+                "data": {
+                    "vm_code": vm.vm_code,
+                    "status": vm.status,
+                    "isActive": vm.status == "RUNNING",
+                },
+            }
+        return 404, {"success": False, "msg": "Not found"}
+
+    def _os_payload(self) -> dict[str, Any]:
+        data = {
+            provider: [{"slug": slug, "name": slug.replace("_", " ")} for slug in _OS_SLUGS]
+            for provider in _PROVIDERS
+        }
+        return {"success": True, "data": data}
+
+    def _locations_payload(self) -> dict[str, Any]:
+        mapping = {
+            loc["locationCode"]: {
+                "machineTypeList": [
+                    {"name": plan, "machineCode": f"m-{plan.lower()}-{loc['locationCode']}"}
+                    for plan in _PROVIDERS[loc["provider"]]
+                ]
+            }
+            for loc in self._locations
+        }
+        return {
+            "success": True,
+            "data": {
+                "locationsList": [
+                    {"locationCode": loc["locationCode"], "name": loc["name"]}
+                    for loc in self._locations
+                ],
+                "locationMachineTypeMapping": mapping,
+            },
+        }
+
+    def _create(self, body: dict[str, Any]) -> tuple[int, Any]:
+        name = str(body.get("name") or "")
+        loc_code = str(body.get("location_code") or "")
+        loc = next((x for x in self._locations if x["locationCode"] == loc_code), None)
+        if not name or loc is None or not body.get("machine_type_code"):
+            return 400, {"success": False, "msg": "Invalid payload"}
+        self._created += 1
+        vm = _VM(
+            name=name,
+            vm_code=f"vm_new_{self._created:06d}",
+            status="PROVISIONING",
+            location=loc["name"],
+            location_code=loc_code,
+        )
+        self._vms[vm.vm_code] = vm
+        return 200, {"success": True, "vm": self._vm_dict(vm), "msg": {"en": "VM created"}}
+
+    def _advance(self) -> None:
+        now = time.time()
+        for vm in self._vms.values():
+            if (
+                vm.status == "PROVISIONING"
+                and vm.created_at
+                and now - vm.created_at >= self.fleet.provision_seconds
+            ):
+                vm.status = "RUNNING"
+
+    @staticmethod
+    def _vm_dict(vm: _VM) -> dict[str, Any]:
+        return {
+            "name": vm.name,
+            "vm_code": vm.vm_code,
+            "status": vm.status,
+            "location": vm.location,
+            "locationCode": vm.location_code,
+        }
+
+    # ---- front ends ----------------------------------------------------------
+
+    async def handle(self, req: HttpRequest) -> HttpResponse:
+        """HTTP front end (used by :class:`HttpServer`)."""
+        self.requests += 1
+        outcome = self.decide()
+        await asyncio.sleep(self._latency.sample())
+        if outcome is Outcome.TIMEOUT:
+            await asyncio.sleep(self.chaos.timeout_seconds)
+            return json_response(504, {"success": False, "msg": "Gateway timeout"})
+        if outcome is Outcome.RATE_LIMITED:
+            return json_response(429, {"success": False, "msg": "Too many requests"})
+        if outcome is Outcome.SERVER_ERROR:
+            return json_response(503, {"success": False, "msg": "Service unavailable"})
+        try:
+            body = req.json()
+        except ValueError:
+            return json_response(400, {"success": False, "msg": "Invalid JSON"})
+        status, payload = self.route(req.method, req.path, req.headers, body)
+        return json_response(status, payload)
+
+    def transport(self) -> httpx.MockTransport:
+        """In-process httpx transport; injected timeouts raise ``httpx.ReadTimeout``."""
+
+        async def _handler(request: httpx.Request) -> httpx.Response:
+            self.requests += 1
+            outcome = self.decide()
+            await asyncio.sleep(self._latency.sample())
+            if outcome is Outcome.TIMEOUT:
+                raise httpx.ReadTimeout("injected timeout", request=request)
+            if outcome is Outcome.RATE_LIMITED:
+                return httpx.Response(429, json={"success": False, "msg": "Too many requests"})
+            if outcome is Outcome.SERVER_ERROR:
+                return httpx.Response(503, json={"success": False, "msg": "Service unavailable"})
+            body = json.loads(request.content) if request.content else None
+            headers = {k.lower(): v for k, v in request.headers.items()}
+            status, payload = self.route(request.method, request.url.path, headers, body)
+            return httpx.Response(status, json=payload)
+
+        return httpx.MockTransport(_handler)
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="python -m bot.fakes.doprax", description="Doprax-compatible API stand-in."
+    )
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8081)
+    p.add_argument("--api-key", default="", help="Require this X-API-Key (default: accept any)")
+    p.add_argument("--vms", type=int, default=FleetConfig.vms)
+    p.add_argument("--locations", type=int, default=FleetConfig.locations)
+    p.add_argument("--provision-seconds", type=float, default=FleetConfig.provision_seconds)
+    p.add_argument("--seed", type=int, default=FleetConfig.seed)
+    p.add_argument(
+        "--latency",
+        default=ChaosConfig.latency,
+        help="fixed:<ms> | uniform:<lo>:<hi> | exp:<mean> | lognormal:<median>:<sigma>",
+    )
+    p.add_argument("--rate-429", type=float, default=0.0)
+    p.add_argument("--rate-5xx", type=float, default=0.0)
+    p.add_argument("--rate-timeout", type=float, default=0.0)
+    p.add_argument("--timeout-seconds", type=float, default=ChaosConfig.timeout_seconds)
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    fake = FakeDoprax(
+        fleet=FleetConfig(
+            vms=args.vms,
+            locations=args.locations,
+            provision_seconds=args.provision_seconds,
+            seed=args.seed,
+        ),
+        chaos=ChaosConfig(
+            latency=args.latency,
+            rate_429=args.rate_429,
+            rate_5xx=args.rate_5xx,
+            rate_timeout=args.rate_timeout,
+            timeout_seconds=args.timeout_seconds,
+        ),
+        api_key=args.api_key,
+    )
+    server = HttpServer(fake.handle, host=args.host, port=args.port)
+
+    async def _run() -> None:
+        await server.start()
+        print(f"Fake Doprax API listening on {server.url} ({args.vms} VMs)", flush=True)
+        await server.serve_forever()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Replay a recording of real traffic through the bot's handler stack.
+
+Reads a file written with ``UPDATE_RECORD_PATH`` (see :mod:`bot.recording`), starts the bot
+in-process against the fake Bot API and either ``DRY_RUN`` or the Doprax stand-in (or a
+Doprax cassette), and feeds every update in at its recorded offset, scaled by ``--speed``.
+Each update is traced from dispatch until its handler returns, including the time it waited
+behind the same user's earlier updates, and reported per handler along with its storage round
+trips::
+
+    python -m bot.fakes.replay data/updates.ndjson                 # original timing
+    python -m bot.fakes.replay data/updates.ndjson --speed 10      # 10x faster
+    python -m bot.fakes.replay data/updates.ndjson --speed max --doprax stand-in
+
+At higher speeds users type faster than the bot's 2s input cooldown allows, so more updates
+end in the rate-limit reply, as they would in production.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from bot.app import UpdateForwarder, close_app, open_app
+from bot.config import DEFAULT_ACCOUNT, Config
+from bot.fakes.botapi import FakeBotAPI
+from bot.fakes.doprax import ChaosConfig, FakeDoprax, FleetConfig
+from bot.fakes.swarm import percentile
+from bot.httpserver import HttpServer
+from bot.recording import load_recording
+from bot.tracing import TRACE, UpdateTrace
+from bot.utils import setup_logging
+
+TOKEN = "123456:replay"
+# Updates no handler claimed: duplicates, updates the per-user queue dropped, free text that
+# matched no button or wizard step.
+UNROUTED = "(none)"
+
+
+@dataclass
+class ReplayStats:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    round_trips: dict[str, list[int]] = field(default_factory=lambda: defaultdict(list))
+    errors: int = 0
+    updates: int = 0
+    recorded_span: float = 0.0
+    elapsed: float = 0.0
+
+    def record(self, trace: UpdateTrace, seconds: float) -> None:
+        name = trace.handler or UNROUTED
+        self.latencies[name].append(seconds)
+        self.round_trips[name].append(trace.storage_round_trips)
+
+
+def parse_speed(value: str) -> float:
+    """``max`` (no waiting, returned as 0) or a positive factor."""
+    if value == "max":
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be > 0 or 'max'")
+    return speed
+
+
+async def replay(
+    forward: UpdateForwarder, recording: Sequence[tuple[float, dict[str, Any]]], speed: float
+) -> ReplayStats:
+    """Dispatch each update at its recorded offset divided by ``speed`` (0: all at once)."""
+    stats = ReplayStats(updates=len(recording))
+    if not recording:
+        return stats
+    first = recording[0][0]
+    stats.recorded_span = recording[-1][0] - first
+
+    async def one(payload: dict[str, Any]) -> None:
+        trace = UpdateTrace()
+        TRACE.set(trace)
+        started = time.perf_counter()
+        try:
+            await forward(payload)
+        except Exception:
+            stats.errors += 1
+        stats.record(trace, time.perf_counter() - started)
+
+    t0 = time.perf_counter()
+    tasks = []
+    for ts, payload in recording:
+        if speed > 0:
+            delay = t0 + (ts - first) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(payload)))
+    await asyncio.gather(*tasks)
+    stats.elapsed = time.perf_counter() - t0
+    return stats
+
+
+def report(stats: ReplayStats, bot_calls: Counter[str] | None = None) -> str:
+    width = max([len(h) for h in stats.latencies] + [len("handler")])
+    columns = ("n", "p50", "p90", "p99", "max", "db/upd")
+    lines = [f"{'handler':<{width}}  " + "  ".join(f"{c:>7}" for c in columns)]
+    for name in sorted(stats.latencies, key=lambda h: -len(stats.latencies[h])):
+        samples = stats.latencies[name]
+        ms = [percentile(samples, q) * 1000 for q in (0.5, 0.9, 0.99, 1.0)]
+        trips = stats.round_trips[name]
+        cells = "  ".join(f"{v:7.1f}" for v in ms)
+        lines.append(f"{name:<{width}}  {len(samples):>7}  {cells}  {sum(trips) / len(trips):7.1f}")
+    elapsed = max(stats.elapsed, 1e-9)
+    lines.append(
+        f"updates: {stats.updates} in {stats.elapsed:.1f}s ({stats.updates / elapsed:.1f}/s; "
+        f"recorded over {stats.recorded_span:.1f}s), errors: {stats.errors}"
+    )
+    if bot_calls:
+        lines.append(
+            "bot api calls: " + ", ".join(f"{k}={v}" for k, v in sorted(bot_calls.items()))
+        )
+    return "\n".join(lines)
+
+
+def replay_config(api_url: str, db_path: str, doprax_url: str = "", cassette: str = "") -> Config:
+    """Bot settings for a replay: fake Telegram, a fresh database, no background chatter."""
+    # Only the fake is ever contacted; these just satisfy Config.load's checks.
+    os.environ.update(TELEGRAM_BOT_TOKEN=TOKEN, DRY_RUN="1")
+    cfg = dataclasses.replace(
+        Config.load(),
+        telegram_bot_token=TOKEN,
+        telegram_api_url=api_url,
+        db_path=db_path,
+        dry_run=not doprax_url and not cassette,
+        doprax_record_path="",
+        doprax_replay_path=cassette,
+        metrics_log_interval=0,
+        webhook=False,
+        workers=0,
+        backlog_replay=False,
+        update_record_path="",
+    )
+    if doprax_url:
+        cfg = dataclasses.replace(
+            cfg,
+            doprax_base_url=doprax_url,
+            doprax_accounts={DEFAULT_ACCOUNT: "local"},
+            doprax_default_account=DEFAULT_ACCOUNT,
+        )
+    return cfg
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="python -m bot.fakes.replay", description="Replay recorded updates through the bot."
+    )
+    p.add_argument("recording", help="file written with UPDATE_RECORD_PATH")
+    p.add_argument("--speed", type=parse_speed, default=1.0, help="1, N (x faster) or max")
+    p.add_argument(
+        "--doprax",
+        choices=("dry-run", "stand-in"),
+        default="dry-run",
+        help="DRY_RUN=1, or an in-process Doprax stand-in with real HTTP",
+    )
+    p.add_argument("--doprax-latency", default="lognormal:150:0.5")
+    p.add_argument("--cassette", default="", help="serve Doprax from this cassette instead")
+    p.add_argument("--api-latency", default="fixed:0", help="fake Bot API latency spec")
+    p.add_argument("--log-level", default="WARNING")
+    return p.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    recording = load_recording(args.recording)
+    api = FakeBotAPI(latency=args.api_latency)
+    servers = [HttpServer(api.handle)]
+    doprax_url = ""
+    if args.doprax == "stand-in" and not args.cassette:
+        fake = FakeDoprax(fleet=FleetConfig(), chaos=ChaosConfig(latency=args.doprax_latency))
+        servers.append(HttpServer(fake.handle))
+    for server in servers:
+        await server.start()
+    if len(servers) > 1:
+        doprax_url = servers[1].url
+
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        cfg = replay_config(
+            f"{servers[0].url}/bot", os.path.join(tmp, "bot.db"), doprax_url, args.cassette
+        )
+        app, forward = await open_app(cfg)
+        try:
+            print(f"Replaying {len(recording)} updates from {args.recording}...", flush=True)
+            stats = await replay(forward, recording, args.speed)
+        finally:
+            await close_app(app, cfg.drain_timeout)
+            api.close()
+            for server in servers:
+                await server.close()
+    print(report(stats, api.calls), flush=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    setup_logging(args.log_level.upper())
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
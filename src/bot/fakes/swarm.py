@@ -0,0 +1,396 @@
+"""
+Scripted user swarm against the fake Bot API.
+
+Starts :class:`~bot.fakes.botapi.FakeBotAPI` (and optionally the Doprax stand-in), spawns the
+bot pointed at them, then has ``--users`` simulated users walk real journeys (onboarding,
+creating a VM, listing and refreshing status) with lognormal think times between steps. Each
+step is timed from the moment its update is offered to ``getUpdates`` until the bot's reply
+for that chat reaches the fake, so the numbers cover polling, routing, handlers, Doprax calls
+and outbound flood control together. Users never act faster than the bot's per-user input
+cooldown (``--min-gap``); a reply saying they did counts as ``rate_limited``::
+
+    python -m bot.fakes.swarm --users 200 --duration 60 --doprax stand-in
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from bot.callbacks import unpack
+from bot.fakes.botapi import BotCall, FakeBotAPI
+from bot.fakes.doprax import ChaosConfig, FakeDoprax, FleetConfig
+from bot.fakes.updates import callback_update, message_update
+from bot.httpserver import HttpServer
+from bot.i18n import I18N
+
+FIRST_USER_ID = 100_000
+TOKEN = "123456:swarm"
+RATE_LIMITED_TEXT = I18N.t("en", "rate_limited")
+
+
+@dataclass(frozen=True)
+class Step:
+    """Send ``text``, or tap the first button whose route starts with ``tap`` segments."""
+
+    name: str
+    text: str = ""
+    tap: tuple[str, ...] = ()
+
+
+def _say(name: str, text: str) -> Step:
+    return Step(name, text=text)
+
+
+def _tap(name: str, *route: str) -> Step:
+    return Step(name, tap=route)
+
+
+JOURNEYS: dict[str, tuple[Step, ...]] = {
+    "onboard": (_say("start", "/start"), _tap("pick_lang", "LANG", "en")),
+    "create": (
+        _say("create", "/create_vm"),
+        _tap("provider", "CREATE", "prov"),
+        _tap("plan", "CREATE", "plan"),
+        _say("location", "Frankfurt"),
+        _say("name", "{name}"),
+        _tap("os", "OSPICK"),
+        _tap("confirm", "CREATE", "confirm", "create"),
+    ),
+    "browse": (
+        _say("list", "/list_vms"),
+        _tap("status", "VMSTAT"),
+        _tap("refresh", "VMREF"),
+        _tap("refresh", "VMREF"),
+    ),
+}
+# After onboarding, each user picks its next journey with these weights.
+_MIX_JOURNEYS: tuple[str, ...] = ("browse", "create")
+_MIX_WEIGHTS: tuple[float, ...] = (3, 1)
+
+
+class StepFailed(Exception):
+    """The step got no usable reply; the rest of the journey is abandoned."""
+
+
+@dataclass
+class SwarmStats:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    timeouts: Counter[str] = field(default_factory=Counter)
+    rate_limited: Counter[str] = field(default_factory=Counter)
+    journeys: Counter[str] = field(default_factory=Counter)
+    stuck: Counter[str] = field(default_factory=Counter)
+    updates: int = 0
+    elapsed: float = 0.0
+
+    def record(self, step: str, seconds: float) -> None:
+        self.latencies[step].append(seconds)
+
+    @property
+    def replies(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of ``samples`` (``q`` in 0..1)."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+def report(stats: SwarmStats, bot_calls: Counter[str] | None = None) -> str:
+    width = max([len(s) for s in stats.latencies] + [len("step")])
+    columns = ("n", "p50", "p90", "p99", "max")
+    lines = [f"{'step':<{width}}  " + "  ".join(f"{c:>7}" for c in columns) + "  timeouts  limited"]
+    for step in sorted(set(stats.latencies) | set(stats.timeouts) | set(stats.rate_limited)):
+        samples = stats.latencies.get(step) or [math.nan]
+        ms = [percentile(samples, q) * 1000 for q in (0.5, 0.9, 0.99, 1.0)]
+        count = len(stats.latencies.get(step, ()))
+        cells = "  ".join(f"{v:7.1f}" for v in ms)
+        lines.append(
+            f"{step:<{width}}  {count:>7}  {cells}  "
+            f"{stats.timeouts[step]:>8}  {stats.rate_limited[step]:>7}"
+        )
+    elapsed = max(stats.elapsed, 1e-9)
+    lines.append(
+        f"updates: {stats.updates} in {stats.elapsed:.1f}s ({stats.updates / elapsed:.1f}/s), "
+        f"replies: {stats.replies} ({stats.replies / elapsed:.1f}/s)"
+    )
+    done = ", ".join(f"{k}={v}" for k, v in sorted(stats.journeys.items())) or "none"
+    stuck = ", ".join(f"{k}={v}" for k, v in sorted(stats.stuck.items())) or "none"
+    lines.append(f"journeys completed: {done}; stuck: {stuck}")
+    if bot_calls:
+        lines.append(
+            "bot api calls: " + ", ".join(f"{k}={v}" for k, v in sorted(bot_calls.items()))
+        )
+    return "\n".join(lines)
+
+
+class SimUser:
+    """One chat: pushes its steps into the fake and waits for the bot's replies."""
+
+    def __init__(
+        self,
+        user_id: int,
+        api: FakeBotAPI,
+        stats: SwarmStats,
+        rng: random.Random,
+        think_ms: float,
+        step_timeout: float,
+        min_gap: float = 0.0,
+    ) -> None:
+        self.user_id = user_id
+        self._api = api
+        self._stats = stats
+        self._rng = rng
+        self._think_ms = think_ms
+        self._step_timeout = step_timeout
+        self._min_gap = min_gap
+        # Callback data and message id of the buttons on the latest inline keyboard.
+        self._buttons: list[tuple[str, int]] = []
+        self._keyboard = asyncio.Event()
+        self._reply: asyncio.Future[tuple[float, str]] | None = None
+        api.subscribe(user_id, self._on_call)
+
+    def _on_call(self, call: BotCall) -> None:
+        if call.method in ("sendMessage", "editMessageText"):
+            markup = call.params.get("reply_markup")
+            rows = markup.get("inline_keyboard", []) if isinstance(markup, dict) else []
+            message_id = int(call.params.get("message_id") or 0)
+            self._buttons = [
+                (b["callback_data"], message_id)
+                for row in rows
+                for b in row
+                if "callback_data" in b
+            ]
+            self._keyboard.set()
+        elif not call.params.get("text"):
+            return  # a bare callback ack is not a reply the user sees
+        if self._reply is not None and not self._reply.done():
+            self._reply.set_result((call.at, str(call.params.get("text") or "")))
+
+    async def think(self) -> None:
+        median = self._think_ms / 1000
+        jitter = median * math.exp(self._rng.gauss(0.0, 0.5)) if median > 0 else 0.0
+        await asyncio.sleep(self._min_gap + jitter)
+
+    async def _button(self, route: tuple[str, ...]) -> tuple[str, int]:
+        deadline = time.perf_counter() + self._step_timeout
+        while True:
+            for data, message_id in self._buttons:
+                parts = unpack(data) or []
+                if tuple(parts[: len(route)]) == route:
+                    return data, message_id
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise StepFailed
+            self._keyboard.clear()
+            try:
+                await asyncio.wait_for(self._keyboard.wait(), timeout=remaining)
+            except TimeoutError:
+                raise StepFailed from None
+
+    async def run_step(self, journey: str, step: Step) -> None:
+        name = f"{journey}:{step.name}"
+        if step.tap:
+            try:
+                data, message_id = await self._button(step.tap)
+            except StepFailed:
+                self._stats.timeouts[name] += 1
+                raise
+            update = callback_update(self._api.next_update_id, self.user_id, data, message_id)
+        else:
+            text = step.text.format(name=f"vm-{self.user_id}-{self._rng.randrange(10**6)}")
+            update = message_update(self._api.next_update_id, self.user_id, text)
+        self._reply = asyncio.get_running_loop().create_future()
+        sent = time.perf_counter()
+        self._api.push(update)
+        self._stats.updates += 1
+        try:
+            replied, text = await asyncio.wait_for(self._reply, timeout=self._step_timeout)
+        except TimeoutError:
+            self._stats.timeouts[name] += 1
+            raise StepFailed from None
+        finally:
+            self._reply = None
+        if text == RATE_LIMITED_TEXT:
+            self._stats.rate_limited[name] += 1
+            raise StepFailed
+        self._stats.record(name, replied - sent)
+
+    async def run_journey(self, journey: str) -> None:
+        try:
+            for step in JOURNEYS[journey]:
+                await self.run_step(journey, step)
+                await self.think()
+        except StepFailed:
+            self._stats.stuck[journey] += 1
+            return
+        self._stats.journeys[journey] += 1
+
+    async def run(self, until: float) -> None:
+        await self.think()
+        await self.run_journey("onboard")
+        while time.perf_counter() < until:
+            await self.run_journey(self._rng.choices(_MIX_JOURNEYS, _MIX_WEIGHTS)[0])
+
+
+async def run_swarm(
+    api: FakeBotAPI,
+    users: int,
+    duration: float,
+    think_ms: float = 1000.0,
+    step_timeout: float = 10.0,
+    seed: int = 1,
+    min_gap: float = 0.0,
+) -> SwarmStats:
+    """Drive ``users`` simulated users for ``duration`` seconds; journeys in flight finish."""
+    stats = SwarmStats()
+    rng = random.Random(seed)
+    sims = [
+        SimUser(
+            FIRST_USER_ID + i,
+            api,
+            stats,
+            random.Random(rng.random()),
+            think_ms,
+            step_timeout,
+            min_gap,
+        )
+        for i in range(users)
+    ]
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(u.run(started + duration) for u in sims))
+    finally:
+        for u in sims:
+            api.unsubscribe(u.user_id)
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="python -m bot.fakes.swarm", description="Scripted user swarm against the bot."
+    )
+    p.add_argument("--users", type=int, default=50)
+    p.add_argument("--duration", type=float, default=30.0, help="seconds of new journeys")
+    p.add_argument("--think-ms", type=float, default=1000.0, help="median think time")
+    p.add_argument(
+        "--min-gap",
+        type=float,
+        default=2.5,
+        help="seconds added to every think time; the bot rejects input within 2s of the last",
+    )
+    p.add_argument("--step-timeout", type=float, default=10.0)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--port", type=int, default=8082, help="fake Bot API port")
+    p.add_argument("--api-latency", default="fixed:0", help="fake Bot API latency spec")
+    p.add_argument(
+        "--doprax",
+        choices=("dry-run", "stand-in"),
+        default="dry-run",
+        help="DRY_RUN=1, or an in-process Doprax stand-in with real HTTP",
+    )
+    p.add_argument("--doprax-latency", default="lognormal:150:0.5")
+    p.add_argument(
+        "--no-spawn",
+        action="store_true",
+        help="do not start the bot; run it yourself with TELEGRAM_API_URL pointing here",
+    )
+    p.add_argument(
+        "--bot-env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="extra environment for the spawned bot (repeatable)",
+    )
+    p.add_argument("--ready-timeout", type=float, default=30.0)
+    return p.parse_args(argv)
+
+
+async def _spawn_bot(env: dict[str, str]) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "bot.main", env={**os.environ, **env}
+    )
+
+
+async def _stop_bot(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is not None:
+        return
+    proc.terminate()
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=30)
+    except TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    api = FakeBotAPI(latency=args.api_latency, seed=args.seed)
+    server = HttpServer(api.handle, port=args.port)
+    await server.start()
+    servers = [server]
+    env = {
+        "TELEGRAM_BOT_TOKEN": TOKEN,
+        "TELEGRAM_API_URL": f"{server.url}/bot",
+        "DRY_RUN": "1",
+        "METRICS_LOG_INTERVAL": "0",
+        "LOG_LEVEL": "WARNING",
+    }
+    if args.doprax == "stand-in":
+        fake = FakeDoprax(
+            fleet=FleetConfig(seed=args.seed), chaos=ChaosConfig(latency=args.doprax_latency)
+        )
+        doprax_server = HttpServer(fake.handle)
+        await doprax_server.start()
+        servers.append(doprax_server)
+        env.update(DRY_RUN="0", DOPRAX_BASE_URL=doprax_server.url, DOPRAX_API_KEY="local")
+    env.update(kv.split("=", 1) for kv in args.bot_env)
+
+    proc = None
+    with contextlib.ExitStack() as stack:
+        if not args.no_spawn:
+            if "DB_PATH" not in env:
+                tmp = stack.enter_context(tempfile.TemporaryDirectory(prefix="swarm-"))
+                env["DB_PATH"] = os.path.join(tmp, "bot.db")
+            proc = await _spawn_bot(env)
+        print(f"Fake Bot API on {server.url}/bot; waiting for the bot to poll...", flush=True)
+        try:
+            await asyncio.wait_for(api.polling.wait(), timeout=args.ready_timeout)
+            stats = await run_swarm(
+                api,
+                args.users,
+                args.duration,
+                args.think_ms,
+                args.step_timeout,
+                args.seed,
+                args.min_gap,
+            )
+            print(report(stats, api.calls), flush=True)
+        finally:
+            if proc is not None:
+                await _stop_bot(proc)
+            api.close()
+            for s in servers:
+                await s.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Fake Telegram update poster for exercising webhook mode locally.
+
+Builds synthetic ``message`` / ``callback_query`` updates and POSTs them to a webhook URL
+with the secret-token header, the way Telegram does::
+
+    python -m bot.fakes.updates --url http://127.0.0.1:8443/telegram --secret S \\
+        --count 500 --users 50 --concurrency 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Any
+
+import httpx
+
+from bot.callbacks import pack
+from bot.keyboards import CB
+from bot.webhook import SECRET_HEADER
+
+_TEXTS = ("/start", "/help", "/list_vms", "/status vm_000001", "/menu", "/health")
+_CALLBACKS = (
+    pack(CB.VM_REFRESH, "vm_000001"),
+    pack(CB.VM_LIST, "r", 0),
+    pack(CB.MENU, "list_vms"),
+)
+
+
+def message_update(update_id: int, user_id: int, text: str) -> dict[str, Any]:
+    user = {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+    message: dict[str, Any] = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": user,
+        "text": text,
+    }
+    if text.startswith("/"):
+        command = text.split(maxsplit=1)[0]
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return {"update_id": update_id, "message": message}
+
+
+def callback_update(update_id: int, user_id: int, data: str, message_id: int = 1) -> dict[str, Any]:
+    user = {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user,
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "text": "...",
+            },
+        },
+    }
+
+
+def synthetic_updates(
+    count: int, users: int, callback_ratio: float = 0.3, seed: int = 1, start_id: int = 1
+) -> list[dict[str, Any]]:
+    """A deterministic mix of command messages and button presses from ``users`` users."""
+    rng = random.Random(seed)
+    out = []
+    for update_id in range(start_id, start_id + count):
+        user_id = 10_000 + rng.randrange(max(1, users))
+        if rng.random() < callback_ratio:
+            out.append(callback_update(update_id, user_id, rng.choice(_CALLBACKS)))
+        else:
+            out.append(message_update(update_id, user_id, rng.choice(_TEXTS)))
+    return out
+
+
+async def post_updates(
+    url: str,
+    secret: str,
+    updates: list[dict[str, Any]],
+    concurrency: int = 10,
+    client: httpx.AsyncClient | None = None,
+) -> list[int]:
+    """POST ``updates`` to ``url`` with up to ``concurrency`` in flight; returns status codes."""
+    owned = client is None
+    http = client or httpx.AsyncClient(timeout=30.0)
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(update: dict[str, Any]) -> int:
+        async with sem:
+            resp = await http.post(url, json=update, headers={SECRET_HEADER: secret})
+            return resp.status_code
+
+    try:
+        return list(await asyncio.gather(*(_one(u) for u in updates)))
+    finally:
+        if owned:
+            await http.aclose()
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="POST synthetic Telegram updates to a webhook.")
+    p.add_argument("--url", default="http://127.0.0.1:8443/telegram")
+    p.add_argument("--secret", required=True)
+    p.add_argument("--count", type=int, default=100)
+    p.add_argument("--users", type=int, default=10)
+    p.add_argument("--concurrency", type=int, default=10)
+    p.add_argument("--callback-ratio", type=float, default=0.3)
+    p.add_argument("--seed", type=int, default=1)
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    # Start ids from the clock so repeated runs get fresh update ids.
+    updates = synthetic_updates(
+        args.count, args.users, args.callback_ratio, args.seed, start_id=int(time.time())
+    )
+    started = time.perf_counter()
+    statuses = asyncio.run(post_updates(args.url, args.secret, updates, args.concurrency))
+    elapsed = time.perf_counter() - started
+    by_status = dict(sorted(Counter(statuses).items()))
+    print(
+        f"Posted {len(statuses)} updates in {elapsed:.2f}s "
+        f"({len(statuses) / max(elapsed, 1e-9):.0f}/s): {by_status}",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.accounts import DopraxClientPool
+from bot.handlers.common import HandlerDeps, get_lang, reply_menu, user_id_from_update
+from bot.i18n import I18N
+
+
+async def account_cmd(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    pool: DopraxClientPool,
+) -> None:
+    user_id = user_id_from_update(update)
+    if user_id is None or update.message is None:
+        return
+    lang = await get_lang(deps.storage, user_id)
+    accounts = ", ".join(f"`{a}`" for a in pool.accounts)
+
+    parts = (update.message.text or "").strip().split(maxsplit=1)
+    if len(parts) == 2 and parts[1].strip():
+        name = parts[1].strip()
+        if not pool.has_account(name):
+            await reply_menu(
+                update, context, deps, lang, I18N.t(lang, "account_unknown", accounts=accounts)
+            )
+            return
+        await deps.storage.set_account(user_id, name)
+        await reply_menu(update, context, deps, lang, I18N.t(lang, "account_set", account=name))
+        return
+
+    current = await pool.account_for_user(user_id)
+    await reply_menu(
+        update,
+        context,
+        deps,
+        lang,
+        I18N.t(lang, "account_current", account=current, accounts=accounts),
+    )
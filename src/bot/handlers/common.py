@@ -1,20 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Any
 
-from telegram import Update
+from telegram import InlineKeyboardMarkup, Message, Update
 from telegram.constants import ParseMode
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
 from bot.i18n import I18N, Lang
 from bot.keyboards import main_reply_keyboard
+from bot.metrics import METRICS
 from bot.states import State
 from bot.storage import Storage
 from bot.utils import json_log, new_correlation_id
 
+if TYPE_CHECKING:
+    from bot.provisioning import ProvisioningTracker
+
 
 @dataclass(frozen=True)
 class HandlerDeps:
@@ -22,9 +30,10 @@ class HandlerDeps:
     logger: logging.Logger
     session_timeout_seconds: int = 15 * 60
     ratelimit_cooldown_seconds: int = 2
+    provisioning: ProvisioningTracker | None = None
 
 
-def user_id_from_update(update: Update) -> Optional[int]:
+def user_id_from_update(update: Update) -> int | None:
     u = update.effective_user
     return u.id if u else None
 
@@ -62,10 +71,10 @@ async def reset_if_timed_out(storage: Storage, user_id: int, timeout_seconds: in
     return False
 
 
-async def safe_answer_callback(update: Update) -> None:
+async def safe_answer_callback(update: Update, text: str | None = None) -> None:
     if update.callback_query:
         try:
-            await update.callback_query.answer()
+            await update.callback_query.answer(text)
         except Exception:
             # Telegram may reject if too late; ignore.
             return
@@ -91,6 +100,128 @@ async def safe_user_message(
     )
 
 
+class MessageHashes:
+    """Bounded LRU of content hashes for bot messages that may later be edited in place."""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self._maxsize = maxsize
+        self._hashes: OrderedDict[tuple[int, int], str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    @staticmethod
+    def digest(content: str, reply_markup: InlineKeyboardMarkup | None = None) -> str:
+        h = hashlib.sha1(content.encode("utf-8"))
+        if reply_markup is not None:
+            h.update(reply_markup.to_json().encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, chat_id: int, message_id: int) -> str | None:
+        key = (chat_id, message_id)
+        digest = self._hashes.get(key)
+        if digest is not None:
+            self._hashes.move_to_end(key)
+        return digest
+
+    def put(self, chat_id: int, message_id: int, digest: str) -> None:
+        self._hashes[(chat_id, message_id)] = digest
+        self._hashes.move_to_end((chat_id, message_id))
+        while len(self._hashes) > self._maxsize:
+            self._hashes.popitem(last=False)
+
+
+def message_hashes(context: ContextTypes.DEFAULT_TYPE) -> MessageHashes:
+    hashes = context.bot_data.get("message_hashes")
+    if hashes is None:
+        hashes = context.bot_data["message_hashes"] = MessageHashes()
+    return hashes  # type: ignore[no-any-return]
+
+
+async def edit_or_send(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    text: str,
+    reply_markup: InlineKeyboardMarkup | None = None,
+    *,
+    edit: bool = False,
+    fingerprint: str | None = None,
+) -> bool:
+    """
+    Render ``text`` by editing the callback's message (``edit=True``) or sending a new one.
+
+    The edit is skipped when the content hash stored for that message is unchanged.
+    ``fingerprint`` is hashed instead of ``text`` so volatile parts such as a "checked at"
+    timestamp do not force an edit. Returns True if the chat was updated.
+    """
+    chat = update.effective_chat
+    if chat is None:
+        return False
+    hashes = message_hashes(context)
+    digest = hashes.digest(text if fingerprint is None else fingerprint, reply_markup)
+
+    msg = update.callback_query.message if update.callback_query else None
+    if edit and isinstance(msg, Message):
+        if hashes.get(chat.id, msg.message_id) == digest:
+            METRICS.counter("telegram_renders_total", outcome="skipped").inc()
+            return False
+        try:
+            await context.bot.edit_message_text(
+                chat_id=chat.id,
+                message_id=msg.message_id,
+                text=text,
+                reply_markup=reply_markup,
+                parse_mode=ParseMode.MARKDOWN,
+            )
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+            hashes.put(chat.id, msg.message_id, digest)
+            METRICS.counter("telegram_renders_total", outcome="not_modified").inc()
+            return False
+        hashes.put(chat.id, msg.message_id, digest)
+        METRICS.counter("telegram_renders_total", outcome="edited").inc()
+        return True
+
+    sent = await context.bot.send_message(
+        chat_id=chat.id,
+        text=text,
+        reply_markup=reply_markup,
+        parse_mode=ParseMode.MARKDOWN,
+    )
+    hashes.put(chat.id, sent.message_id, digest)
+    METRICS.counter("telegram_renders_total", outcome="sent").inc()
+    return True
+
+
+def send_background(
+    context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, **kwargs: Any
+) -> asyncio.Task[Any]:
+    """
+    Fire-and-forget ``send_message``: queue it behind the flood limiter without awaiting
+    delivery. Failures are logged instead of reaching the error handler.
+    """
+    pending: set[asyncio.Task[Any]] = context.bot_data.setdefault("background_sends", set())
+
+    async def _send() -> Any:
+        try:
+            return await context.bot.send_message(**kwargs)
+        except Exception as e:
+            json_log(
+                deps.logger,
+                logging.WARNING,
+                "background_send_failed",
+                chat_id=kwargs.get("chat_id"),
+                error=type(e).__name__,
+            )
+            return None
+
+    task = asyncio.create_task(_send())
+    pending.add(task)
+    task.add_done_callback(pending.discard)
+    return task
+
+
 def log_event(deps: HandlerDeps, event: str, **fields: object) -> None:
     json_log(deps.logger, logging.INFO, event, **fields)
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import time
-from typing import Any, Optional
+from typing import Any
 
 from telegram import Update
 from telegram.constants import ParseMode
@@ -17,13 +17,13 @@ from bot.handlers.common import (
 )
 from bot.i18n import I18N
 from bot.keyboards import (
-    CB,
     create_confirm_inline,
     create_location_inline,
     create_os_inline,
     create_plan_inline,
     create_provider_inline,
 )
+from bot.provisioning import is_terminal
 from bot.states import State, can_transition, previous_state
 from bot.utils import (
     compact_lines,
@@ -62,124 +62,156 @@ async def create_vm_cmd(
     )
 
 
-async def create_callback(
+async def _callback_user(update: Update, deps: HandlerDeps) -> tuple[int, int, str] | None:
+    """
+    Answer the button press and return ``(user_id, chat_id, lang)``, or None if there is no
+    chat.
+    """
+    await safe_answer_callback(update)
+    user_id = user_id_from_update(update)
+    if user_id is None or update.effective_chat is None:
+        return None
+    return user_id, update.effective_chat.id, await get_lang(deps.storage, user_id)
+
+
+async def create_cancel_callback(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps
+) -> None:
+    who = await _callback_user(update, deps)
+    if who is None:
+        return
+    user_id, _, lang = who
+    await _cancel(update, context, deps, lang, user_id)
+
+
+async def create_back_callback(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     deps: HandlerDeps,
     doprax: DopraxClient,
 ) -> None:
-    if update.callback_query is None:
-        return
-    await safe_answer_callback(update)
-    user_id = user_id_from_update(update)
-    if user_id is None or update.effective_chat is None:
+    who = await _callback_user(update, deps)
+    if who is None:
         return
-    lang = await get_lang(deps.storage, user_id)
+    user_id, _, lang = who
     sess = await deps.storage.get_session(user_id)
-    data = update.callback_query.data or ""
-    if (
-        not data.startswith(CB.CREATE)
-        and not data.startswith(CB.LOC_PICK)
-        and not data.startswith(CB.OS_PICK)
-    ):
+    await _back(update, context, deps, doprax, lang, user_id, sess.state)
+
+
+async def location_pick_callback(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, code: str
+) -> None:
+    who = await _callback_user(update, deps)
+    if who is None:
         return
+    user_id, chat_id, lang = who
+    # store preferred_location as "code:<code>" so we can use it later if needed
+    await deps.storage.update_draft(user_id, preferred_location=f"code:{code}")
+    await deps.storage.set_state(user_id, State.CREATE_NAME)
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=I18N.t(lang, "create_name_ask"),
+        reply_markup=create_location_inline(lang, suggestions=None),
+        parse_mode=ParseMode.MARKDOWN,
+    )
+
 
-    # Universal cancel/back
-    if data == f"{CB.CREATE}cancel":
-        await _cancel(update, context, deps, lang, user_id)
+async def os_pick_callback(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    doprax: DopraxClient,
+    os_slug: str,
+) -> None:
+    who = await _callback_user(update, deps)
+    if who is None:
         return
-    if data == f"{CB.CREATE}back":
-        await _back(update, context, deps, doprax, lang, user_id, sess.state)
+    user_id, chat_id, lang = who
+    allowed = await _allowed_os(doprax)
+    vr = validate_os_slug(os_slug, allowed)
+    if not vr.ok:
+        await context.bot.send_message(chat_id=chat_id, text=I18N.t(lang, "validation_os"))
         return
+    await deps.storage.update_draft(user_id, os_slug=vr.value)
+    await deps.storage.set_state(user_id, State.CREATE_CONFIRM)
+    await _send_confirm(update, context, deps, doprax, lang, user_id)
 
-    # Location pick shortcut
-    if data.startswith(CB.LOC_PICK):
-        code = data.split(":", 1)[1]
-        # store preferred_location as "code:<code>" so we can use it later if needed
-        await deps.storage.update_draft(user_id, preferred_location=f"code:{code}")
-        await deps.storage.set_state(user_id, State.CREATE_NAME)
+
+async def create_provider_callback(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, provider: str
+) -> None:
+    who = await _callback_user(update, deps)
+    if who is None:
+        return
+    user_id, chat_id, lang = who
+    sess = await deps.storage.get_session(user_id)
+    if sess.state != State.CREATE_PROVIDER:
+        await deps.storage.set_state(user_id, State.CREATE_PROVIDER)
+    vr = validate_provider(provider)
+    if not vr.ok:
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=I18N.t(lang, "create_name_ask"),
-            reply_markup=create_location_inline(lang, suggestions=None),
-            parse_mode=ParseMode.MARKDOWN,
+            chat_id=chat_id,
+            text=I18N.t(lang, "validation_provider"),
         )
         return
+    await deps.storage.update_draft(user_id, provider_name=vr.value)
+    await deps.storage.set_state(user_id, State.CREATE_PLAN)
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=I18N.t(lang, "create_provider_set", provider=vr.value)
+        + "\n\n"
+        + I18N.t(lang, "create_plan_ask"),
+        reply_markup=create_plan_inline(lang),
+        parse_mode=ParseMode.MARKDOWN,
+    )
 
-    # OS pick
-    if data.startswith(CB.OS_PICK):
-        os_slug = data.split(":", 1)[1]
-        allowed = await _allowed_os(doprax)
-        vr = validate_os_slug(os_slug, allowed)
-        if not vr.ok:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id, text=I18N.t(lang, "validation_os")
-            )
-            return
-        await deps.storage.update_draft(user_id, os_slug=vr.value)
-        await deps.storage.set_state(user_id, State.CREATE_CONFIRM)
-        await _send_confirm(update, context, deps, doprax, lang, user_id)
-        return
 
-    # Step callbacks
-    if data.startswith(f"{CB.CREATE}prov:"):
-        if sess.state != State.CREATE_PROVIDER:
-            await deps.storage.set_state(user_id, State.CREATE_PROVIDER)
-        provider = data.split("prov:", 1)[1]
-        vr = validate_provider(provider)
-        if not vr.ok:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text=I18N.t(lang, "validation_provider"),
-            )
-            return
-        await deps.storage.update_draft(user_id, provider_name=vr.value)
-        await deps.storage.set_state(user_id, State.CREATE_PLAN)
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=I18N.t(lang, "create_provider_set", provider=vr.value)
-            + "\n\n"
-            + I18N.t(lang, "create_plan_ask"),
-            reply_markup=create_plan_inline(lang),
-            parse_mode=ParseMode.MARKDOWN,
-        )
+async def create_plan_callback(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, plan: str
+) -> None:
+    who = await _callback_user(update, deps)
+    if who is None:
         return
+    user_id, chat_id, lang = who
+    vr = validate_plan(plan)
+    if not vr.ok:
+        await context.bot.send_message(chat_id=chat_id, text=I18N.t(lang, "validation_plan"))
+        return
+    await deps.storage.update_draft(user_id, plan=vr.value)
+    await deps.storage.set_state(user_id, State.CREATE_LOCATION)
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=I18N.t(lang, "create_plan_set", plan=vr.value)
+        + "\n\n"
+        + I18N.t(lang, "create_location_ask"),
+        reply_markup=create_location_inline(lang, suggestions=None),
+        parse_mode=ParseMode.MARKDOWN,
+    )
 
-    if data.startswith(f"{CB.CREATE}plan:"):
-        plan = data.split("plan:", 1)[1]
-        vr = validate_plan(plan)
-        if not vr.ok:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id, text=I18N.t(lang, "validation_plan")
-            )
-            return
-        await deps.storage.update_draft(user_id, plan=vr.value)
-        await deps.storage.set_state(user_id, State.CREATE_LOCATION)
+
+async def create_confirm_callback(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    doprax: DopraxClient,
+    action: str,
+) -> None:
+    who = await _callback_user(update, deps)
+    if who is None:
+        return
+    user_id, chat_id, lang = who
+    if action == "edit":
+        # Restart at provider to edit via steps
+        await deps.storage.set_state(user_id, State.CREATE_PROVIDER)
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=I18N.t(lang, "create_plan_set", plan=vr.value)
-            + "\n\n"
-            + I18N.t(lang, "create_location_ask"),
-            reply_markup=create_location_inline(lang, suggestions=None),
+            chat_id=chat_id,
+            text=I18N.t(lang, "edit_hint"),
+            reply_markup=create_provider_inline(lang),
             parse_mode=ParseMode.MARKDOWN,
         )
         return
-
-    if data.startswith(f"{CB.CREATE}confirm:"):
-        action = data.split("confirm:", 1)[1]
-        if action == "edit":
-            # Restart at provider to edit via steps
-            await deps.storage.set_state(user_id, State.CREATE_PROVIDER)
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text=I18N.t(lang, "edit_hint"),
-                reply_markup=create_provider_inline(lang),
-                parse_mode=ParseMode.MARKDOWN,
-            )
-            return
-        if action == "create":
-            await _perform_create(update, context, deps, doprax, lang, user_id)
-            return
+    if action == "create":
+        await _perform_create(update, context, deps, doprax, lang, user_id)
 
 
 async def create_by_text(
@@ -225,9 +257,8 @@ async def create_by_text(
         await deps.storage.update_draft(user_id, preferred_location=vr.value)
         await deps.storage.set_state(user_id, State.CREATE_NAME)
 
-        # Provide suggestions (best-effort) based on current draft plan
-        draft = await deps.storage.get_draft(user_id)
-        suggestions: Optional[list[tuple[str, str]]] = None
+        # Provide suggestions (best-effort) based on the typed location
+        suggestions: list[tuple[str, str]] | None = None
         try:
             locs = await doprax.get_locations()
             suggestions = _location_suggestions(locs, vr.value)
@@ -279,9 +310,7 @@ async def create_by_text(
         return
 
 
-async def cancel_cmd(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps
-) -> None:
+async def cancel_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps) -> None:
     user_id = user_id_from_update(update)
     if user_id is None:
         return
@@ -369,9 +398,7 @@ async def _allowed_os(doprax: DopraxClient) -> list[str]:
     return [s for s in allowed if s]
 
 
-def _location_suggestions(
-    locs: list[dict[str, Any]], preferred: str
-) -> list[tuple[str, str]]:
+def _location_suggestions(locs: list[dict[str, Any]], preferred: str) -> list[tuple[str, str]]:
     pref = preferred.lower()
     out: list[tuple[str, str]] = []
     for loc in locs:
@@ -400,10 +427,8 @@ async def _send_confirm(
     # If user picked "code:..." keep preferred string for scoring, but we can still resolve via name/plan.
     pref_for_resolve = pref if not pref.startswith("code:") else ""
 
-    location_code, machine_code, suggestions = (
-        await doprax.resolve_location_and_machine_codes(
-            draft.plan, pref_for_resolve or " "
-        )
+    location_code, machine_code, suggestions = await doprax.resolve_location_and_machine_codes(
+        draft.plan, pref_for_resolve or " "
     )
 
     suggestions_text = (
@@ -456,14 +481,10 @@ async def _perform_create(
         draft = await deps.storage.get_draft(user_id)
         # Resolve codes
         pref_for_resolve = (
-            draft.preferred_location
-            if not draft.preferred_location.startswith("code:")
-            else ""
+            draft.preferred_location if not draft.preferred_location.startswith("code:") else ""
         )
-        location_code, machine_code, suggestions = (
-            await doprax.resolve_location_and_machine_codes(
-                draft.plan, pref_for_resolve or " "
-            )
+        location_code, machine_code, suggestions = await doprax.resolve_location_and_machine_codes(
+            draft.plan, pref_for_resolve or " "
         )
 
         # If user explicitly picked a location code, prefer it
@@ -491,23 +512,28 @@ async def _perform_create(
         }
 
         created = await doprax.create_vm(payload)
-        code = str(
-            safe_get(created, "vm_code", default=safe_get(created, "code", default=""))
-        )
+        code = str(safe_get(created, "vm_code", default=safe_get(created, "code", default="")))
         status = str(safe_get(created, "status", default="UNKNOWN"))
 
         await deps.storage.set_state(user_id, State.IDLE)
         await deps.storage.reset_draft(user_id)
 
+        text = I18N.t(
+            lang,
+            "create_success",
+            name=draft.vm_name,
+            code=code or "-",
+            status=status,
+        )
+        if deps.provisioning is not None and code and not is_terminal(status):
+            await deps.provisioning.track(
+                user_id, update.effective_chat.id, lang, code, draft.vm_name, status
+            )
+            text += "\n\n" + I18N.t(lang, "create_tracking")
+
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
-            text=I18N.t(
-                lang,
-                "create_success",
-                name=draft.vm_name,
-                code=code or "-",
-                status=status,
-            ),
+            text=text,
             parse_mode=ParseMode.MARKDOWN,
         )
     finally:
@@ -26,7 +26,10 @@ async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, deps: Han
         "/locations\n"
         "/os\n"
         "/cancel\n"
-        "/health\n\n"
+        "/health\n"
+        "/account [name]\n"
+        "/watch [vm_code]\n"
+        "/unwatch <vm_code>\n\n"
         + I18N.t(lang, "unknown_input")
     )
     await reply_menu(update, context, deps, lang, text)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.ext import ContextTypes
+
+from bot.errors import DopraxError
+from bot.handlers.common import HandlerDeps
+from bot.search import InventorySearch
+
+
+async def inline_search(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    search: InventorySearch,
+) -> None:
+    """``@bot <query>``: search the user's VMs by name, code, status or location."""
+    query = update.inline_query
+    if query is None:
+        return
+    try:
+        docs = await search.search(query.from_user.id, query.query)
+    except (DopraxError, TimeoutError):
+        # An inline query must be answered quickly either way; an empty list is the honest one.
+        docs = []
+    results = [
+        InlineQueryResultArticle(
+            id=doc.code[:64],
+            title=f"{doc.name or doc.code} — {doc.status or '?'}",
+            description=" · ".join(p for p in (doc.code, doc.location) if p),
+            # Picking a result posts /status in the chat, which the bot then answers.
+            input_message_content=InputTextMessageContent(f"/status {doc.code}"),
+        )
+        for doc in docs
+    ]
+    # Results depend on the user's Doprax account, hence is_personal.
+    await query.answer(results, cache_time=int(search.result_ttl), is_personal=True)
@@ -4,20 +4,26 @@ import time
 from typing import Any
 
 from telegram import Update
-from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from bot.doprax_client import DopraxClient
-from bot.handlers.common import HandlerDeps, get_lang, reply_menu, user_id_from_update
-from bot.i18n import I18N
-from bot.keyboards import vm_list_inline
+from bot.handlers.common import (
+    HandlerDeps,
+    edit_or_send,
+    get_lang,
+    reply_menu,
+    safe_answer_callback,
+    user_id_from_update,
+)
+from bot.i18n import I18N, Lang
+from bot.keyboards import vm_list_page_inline
 from bot.utils import safe_get
 
+PAGE_SIZE = 8
 
-def _fmt_vm_line(lang: str, vm: dict[str, Any]) -> str:
-    name = str(safe_get(vm, "name", default="(no-name)")).strip()
 
-    code = str(
+def _vm_code(vm: dict[str, Any]) -> str:
+    return str(
         safe_get(
             vm,
             "vmCode",
@@ -25,6 +31,11 @@ def _fmt_vm_line(lang: str, vm: dict[str, Any]) -> str:
         )
     ).strip()
 
+
+def _fmt_vm_line(lang: str, vm: dict[str, Any]) -> str:
+    name = str(safe_get(vm, "name", default="(no-name)")).strip()
+    code = _vm_code(vm)
+
     status = str(safe_get(vm, "status", default="UNKNOWN")).strip()
 
     loc = str(
@@ -50,42 +61,69 @@ async def list_vms_cmd(
         return
     lang = await get_lang(deps.storage, user_id)
 
-    vms = await doprax.list_vms()
+    # A fresh /list_vms always takes a new inventory snapshot; paging reuses it.
+    vms, age = await doprax.list_vms_snapshot(refresh=True)
     if not vms:
         await reply_menu(update, context, deps, lang, I18N.t(lang, "vms_empty"))
         return
 
-    header = f"*{I18N.t(lang, 'vms_title')}*"
-    lines = [header]
-    for vm in vms[:20]:
-        lines.append(_fmt_vm_line(lang, vm))
+    await _render_page(update, context, lang, vms, age, page=0)
 
-    await reply_menu(
-        update,
-        context,
-        deps,
-        lang,
-        "\n".join(lines) + f"\n\n_{time.strftime('%Y-%m-%d %H:%M:%S')}_",
-    )
 
-    # Additionally, for convenience, send inline buttons per VM (first few)
-    if update.effective_chat is None:
+async def list_vms_callback(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    doprax: DopraxClient,
+    page: int,
+    refresh: bool = False,
+) -> None:
+    """Prev / Next / Refresh on the VM list: edit the list message in place."""
+    user_id = user_id_from_update(update)
+    if user_id is None:
+        await safe_answer_callback(update)
         return
-    for vm in vms[:5]:
-        code = str(
-            safe_get(
-                vm,
-                "vmCode",
-                default=safe_get(
-                    vm, "vm_code", default=safe_get(vm, "code", default="")
-                ),
-            )
-        ).strip()
-        if not code:
-            continue
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=_fmt_vm_line(lang, vm),
-            reply_markup=vm_list_inline(lang, code),
-            parse_mode=ParseMode.MARKDOWN,
+    lang = await get_lang(deps.storage, user_id)
+    vms, age = await doprax.list_vms_snapshot(refresh=refresh)
+    changed = await _render_page(update, context, lang, vms, age, page, edit=True)
+    await safe_answer_callback(update, None if changed else I18N.t(lang, "status_unchanged"))
+
+
+async def _render_page(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    lang: Lang,
+    vms: list[dict[str, Any]],
+    age: float,
+    page: int,
+    edit: bool = False,
+) -> bool:
+    pages = max(1, -(-len(vms) // PAGE_SIZE))
+    page = min(max(0, page), pages - 1)
+    start = page * PAGE_SIZE
+    chunk = vms[start : start + PAGE_SIZE]
+
+    lines = [f"*{I18N.t(lang, 'vms_title')}*"]
+    if vms:
+        lines[0] += " " + I18N.t(
+            lang, "vms_page", start=start + 1, end=start + len(chunk), total=len(vms)
         )
+    lines.extend(_fmt_vm_line(lang, vm) for vm in chunk)
+    if not vms:
+        lines.append(I18N.t(lang, "vms_empty"))
+    body = "\n".join(lines)
+    taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - age))
+
+    buttons = [
+        (str(safe_get(vm, "name", default="")).strip() or code, code)
+        for vm in chunk
+        if (code := _vm_code(vm))
+    ]
+    return await edit_or_send(
+        update,
+        context,
+        body + f"\n\n_{taken}_",
+        vm_list_page_inline(lang, buttons, page, pages),
+        edit=edit,
+        fingerprint=body,
+    )
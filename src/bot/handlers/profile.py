@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections.abc import Collection
+
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+
+from bot.handlers.common import (
+    HandlerDeps,
+    get_lang,
+    reply_menu,
+    send_background,
+    user_id_from_update,
+)
+from bot.i18n import I18N
+from bot.profiling import DEFAULT_SECONDS, MAX_SECONDS, ProfileResult, SamplingProfiler
+
+_TOP = 8
+
+
+def _arg(update: Update) -> str:
+    parts = ((update.message.text if update.message else "") or "").strip().split(maxsplit=1)
+    return parts[1].strip() if len(parts) == 2 else ""
+
+
+def _shares(lang: str, counts: list[tuple[str, int]], total: int) -> str:
+    if not counts:
+        return I18N.t(lang, "profile_none")
+    return "\n".join(f"• `{name}` {n * 100 / total:.0f}%" for name, n in counts[:_TOP])
+
+
+def format_result(lang: str, result: ProfileResult) -> str:
+    total = max(result.samples, 1)
+    return I18N.t(
+        lang,
+        "profile_done",
+        samples=result.samples,
+        seconds=result.seconds,
+        handlers=_shares(lang, result.by_handler, total),
+        endpoints=_shares(lang, result.by_endpoint, total),
+        folded=result.folded_path,
+        pstats=result.pstats_path,
+    )
+
+
+async def profile_cmd(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    profiler: SamplingProfiler,
+    admin_ids: Collection[int],
+) -> None:
+    user_id = user_id_from_update(update)
+    if user_id is None or update.message is None or update.effective_chat is None:
+        return
+    lang = await get_lang(deps.storage, user_id)
+    # Admin-only and unlisted: everyone else gets the reply for an unknown command.
+    if user_id not in admin_ids:
+        await reply_menu(update, context, deps, lang, I18N.t(lang, "unknown_input"))
+        return
+
+    raw = _arg(update)
+    seconds = int(raw) if raw.isdigit() else (0 if raw else DEFAULT_SECONDS)
+    if not 1 <= seconds <= MAX_SECONDS:
+        await reply_menu(
+            update, context, deps, lang, I18N.t(lang, "profile_usage", max=MAX_SECONDS)
+        )
+        return
+    if profiler.running:
+        await reply_menu(update, context, deps, lang, I18N.t(lang, "profile_busy"))
+        return
+
+    chat_id = update.effective_chat.id
+
+    async def _report(result: ProfileResult) -> None:
+        send_background(
+            context,
+            deps,
+            chat_id=chat_id,
+            text=format_result(lang, result),
+            parse_mode=ParseMode.MARKDOWN,
+        )
+
+    # The window runs in the background so this chat's later updates are not held up.
+    profiler.start(seconds, on_done=_report)
+    await reply_menu(update, context, deps, lang, I18N.t(lang, "profile_started", seconds=seconds))
@@ -12,7 +12,7 @@ from bot.handlers.common import (
     user_id_from_update,
 )
 from bot.i18n import I18N
-from bot.keyboards import CB, lang_keyboard, settings_inline
+from bot.keyboards import lang_keyboard, settings_inline
 
 
 async def settings_cmd(
@@ -34,7 +34,11 @@ async def settings_cmd(
 
 
 async def settings_callback(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, version: str
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    version: str,
+    action: str,
 ) -> None:
     if update.callback_query is None:
         return
@@ -43,10 +47,6 @@ async def settings_callback(
     if user_id is None or update.effective_chat is None:
         return
     lang = await get_lang(deps.storage, user_id)
-    data = update.callback_query.data or ""
-    if not data.startswith(CB.SETTINGS):
-        return
-    action = data.split(":", 1)[1]
 
     if action == "lang":
         await context.bot.send_message(
@@ -12,7 +12,7 @@ from bot.handlers.common import (
     user_id_from_update,
 )
 from bot.i18n import I18N
-from bot.keyboards import CB, lang_keyboard
+from bot.keyboards import lang_keyboard
 from bot.states import State
 
 
@@ -39,7 +39,7 @@ async def start_cmd(
 
 
 async def lang_callback(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps
+    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, lang: str
 ) -> None:
     user_id = user_id_from_update(update)
     if (
@@ -50,12 +50,6 @@ async def lang_callback(
         return
     await safe_answer_callback(update)
 
-    data = update.callback_query.data or ""
-    if not data.startswith(CB.LANG):
-        return
-    lang = data.split(":", 1)[1].strip()
-    if lang not in ("fa", "en"):
-        lang = "en"
     await deps.storage.set_lang(user_id, lang)
     await deps.storage.set_state(user_id, State.IDLE)
 
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 import time
-from typing import Any
 
 from telegram import Update
-from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from bot.doprax_client import DopraxClient
-from bot.handlers.common import HandlerDeps, get_lang, reply_menu, safe_answer_callback, user_id_from_update
+from bot.handlers.common import (
+    HandlerDeps,
+    edit_or_send,
+    get_lang,
+    reply_menu,
+    safe_answer_callback,
+    user_id_from_update,
+)
 from bot.i18n import I18N
-from bot.keyboards import CB, status_refresh_inline
+from bot.keyboards import status_refresh_inline
 from bot.states import State
 from bot.utils import safe_get
 
@@ -31,6 +36,15 @@ async def status_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, deps: H
         return
 
     # If no arg, enter FSM prompt
+    await status_prompt(update, context, deps)
+
+
+async def status_prompt(update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps) -> None:
+    """Ask for a VM code; the reply is picked up by ``status_by_text``."""
+    user_id = user_id_from_update(update)
+    if user_id is None:
+        return
+    lang = await get_lang(deps.storage, user_id)
     await deps.storage.set_state(user_id, State.STATUS_WAIT_CODE)
     await reply_menu(update, context, deps, lang, I18N.t(lang, "ask_vm_code"))
 
@@ -49,36 +63,52 @@ async def status_by_text(update: Update, context: ContextTypes.DEFAULT_TYPE, dep
     await _send_status(update, context, deps, doprax, lang, vm_code)
 
 
-async def status_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, doprax: DopraxClient) -> None:
-    if update.callback_query is None:
-        return
+async def status_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, doprax: DopraxClient, vm_code: str) -> None:
     await safe_answer_callback(update)
     user_id = user_id_from_update(update)
     if user_id is None:
         return
     lang = await get_lang(deps.storage, user_id)
-    data = update.callback_query.data or ""
-    if not data.startswith(CB.VM_STATUS):
-        return
-    vm_code = data.split(":", 1)[1]
     await _send_status(update, context, deps, doprax, lang, vm_code)
 
 
+async def status_refresh_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, doprax: DopraxClient, vm_code: str) -> None:
+    """Refresh edits the status view in place; the answer doubles as "no change" feedback."""
+    user_id = user_id_from_update(update)
+    if user_id is None:
+        await safe_answer_callback(update)
+        return
+    lang = await get_lang(deps.storage, user_id)
+    changed = await _send_status(update, context, deps, doprax, lang, vm_code, edit=True)
+    await safe_answer_callback(update, None if changed else I18N.t(lang, "status_unchanged"))
+
+
 async def _send_status(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps, doprax: DopraxClient, lang: str, vm_code: str
-) -> None:
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    doprax: DopraxClient,
+    lang: str,
+    vm_code: str,
+    edit: bool = False,
+) -> bool:
     if update.effective_chat is None:
-        return
-    st = await doprax.get_vm_status(vm_code)
+        return False
+    # Double-taps and Refresh spam within DOPRAX_STATUS_TTL are answered from memory.
+    st, age = await doprax.get_vm_status_cached(vm_code)
     status = str(safe_get(st, "status", default="UNKNOWN"))
     active = str(safe_get(st, "isActive", default="N/A"))
-    checked = time.strftime("%Y-%m-%d %H:%M:%S")
+    checked = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - age))
     text = f"*{I18N.t(lang, 'vm_status_title')}*\n\n" + I18N.t(
         lang, "vm_status_body", code=vm_code, status=status, active=active, checked=checked
     )
-    await context.bot.send_message(
-        chat_id=update.effective_chat.id,
-        text=text,
-        reply_markup=status_refresh_inline(lang, vm_code),
-        parse_mode=ParseMode.MARKDOWN,
+    if age >= 1:
+        text += "\n" + I18N.t(lang, "vm_status_age", age=int(age))
+    return await edit_or_send(
+        update,
+        context,
+        text,
+        status_refresh_inline(lang, vm_code),
+        edit=edit,
+        fingerprint=f"{lang}|{vm_code}|{status}|{active}",
     )
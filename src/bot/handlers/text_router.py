@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.accounts import DopraxClientPool
+from bot.handlers.common import HandlerDeps, user_id_from_update
+from bot.i18n import I18N
+from bot.startup import lazy
+from bot.states import State
+
+
+@dataclass(frozen=True)
+class TextRoute:
+    """A handler called as ``handler(update, context, deps[, doprax])``."""
+
+    handler: Callable[..., Awaitable[None]]
+    needs_doprax: bool = False
+
+
+_create_by_text = lazy("bot.handlers.create_vm:create_by_text")
+
+# Reply-keyboard button (i18n key) -> handler it stands for. Handler modules are imported
+# on first use.
+MENU_ROUTES: dict[str, TextRoute] = {
+    "btn_help": TextRoute(lazy("bot.handlers.help:help_cmd")),
+    "btn_list_vms": TextRoute(lazy("bot.handlers.list_vms:list_vms_cmd"), needs_doprax=True),
+    "btn_create_vm": TextRoute(lazy("bot.handlers.create_vm:create_vm_cmd"), needs_doprax=True),
+    "btn_vm_status": TextRoute(lazy("bot.handlers.status:status_prompt")),
+    "btn_locations": TextRoute(lazy("bot.handlers.locations:locations_cmd"), needs_doprax=True),
+    "btn_os_list": TextRoute(lazy("bot.handlers.os_list:os_cmd"), needs_doprax=True),
+    "btn_settings": TextRoute(lazy("bot.handlers.settings:settings_cmd")),
+    "btn_vm_mgmt": TextRoute(lazy("bot.handlers.vm_mgmt:vm_mgmt_cmd")),
+}
+
+# FSM state waiting for free text -> handler that consumes it.
+STATE_ROUTES: dict[State, TextRoute] = {
+    State.STATUS_WAIT_CODE: TextRoute(
+        lazy("bot.handlers.status:status_by_text"), needs_doprax=True
+    ),
+    State.CREATE_PLAN: TextRoute(_create_by_text, needs_doprax=True),
+    State.CREATE_LOCATION: TextRoute(_create_by_text, needs_doprax=True),
+    State.CREATE_NAME: TextRoute(_create_by_text, needs_doprax=True),
+    State.CREATE_OS: TextRoute(_create_by_text, needs_doprax=True),
+}
+
+
+class TextRouter:
+    """
+    Single entry point for non-command text.
+
+    Button labels of every language are resolved to their handler once, up front, so a
+    message costs one dict lookup; anything else goes to the handler for the user's FSM
+    state. The target is awaited in-process rather than re-sent to the chat as a command.
+    """
+
+    def __init__(
+        self,
+        menu_routes: Mapping[str, TextRoute] = MENU_ROUTES,
+        state_routes: Mapping[State, TextRoute] = STATE_ROUTES,
+        langs: Iterable[str] | None = None,
+    ) -> None:
+        langs = tuple(I18N.strings) if langs is None else tuple(langs)
+        self._labels: dict[str, TextRoute] = {
+            I18N.t(lang, key): route for lang in langs for key, route in menu_routes.items()
+        }
+        self._states = dict(state_routes)
+
+    def route_for_label(self, text: str) -> TextRoute | None:
+        return self._labels.get(text.strip())
+
+    async def __call__(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        deps: HandlerDeps,
+        pool: DopraxClientPool,
+    ) -> None:
+        user_id = user_id_from_update(update)
+        if user_id is None or update.message is None:
+            return
+        route = self.route_for_label(update.message.text or "")
+        if route is None:
+            sess = await deps.storage.get_session(user_id)
+            route = self._states.get(sess.state)
+            if route is None:
+                return
+        if route.needs_doprax:
+            # Only resolve the user's client for routes that talk to Doprax.
+            doprax = await pool.for_user(user_id)
+            await route.handler(update, context, deps, doprax)
+        else:
+            await route.handler(update, context, deps)
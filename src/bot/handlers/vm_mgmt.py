@@ -8,11 +8,10 @@ from bot.handlers.common import (
     HandlerDeps,
     get_lang,
     reply_menu,
-    safe_answer_callback,
     user_id_from_update,
 )
 from bot.i18n import I18N
-from bot.keyboards import CB, vm_mgmt_inline
+from bot.keyboards import vm_mgmt_inline
 
 
 async def vm_mgmt_cmd(
@@ -32,15 +31,3 @@ async def vm_mgmt_cmd(
         parse_mode=ParseMode.MARKDOWN,
     )
 
-
-async def vm_mgmt_callback(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, deps: HandlerDeps
-) -> str | None:
-    """Returns an action string for main to dispatch."""
-    if update.callback_query is None:
-        return None
-    await safe_answer_callback(update)
-    data = update.callback_query.data or ""
-    if not data.startswith(CB.MENU):
-        return None
-    return data.split(":", 1)[1]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.doprax_client import DopraxClient
+from bot.handlers.common import HandlerDeps, get_lang, reply_menu, user_id_from_update
+from bot.i18n import I18N
+from bot.utils import safe_get
+from bot.watch import WatchPoller
+
+
+def _arg(update: Update) -> str:
+    parts = ((update.message.text if update.message else "") or "").strip().split(maxsplit=1)
+    return parts[1].strip() if len(parts) == 2 else ""
+
+
+async def watch_cmd(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    doprax: DopraxClient,
+    watcher: WatchPoller,
+) -> None:
+    user_id = user_id_from_update(update)
+    if user_id is None or update.message is None or update.effective_chat is None:
+        return
+    lang = await get_lang(deps.storage, user_id)
+
+    vm_code = _arg(update)
+    if not vm_code:
+        subs = await deps.storage.list_watches(user_id)
+        if not subs:
+            text = I18N.t(lang, "watch_none")
+        else:
+            lines = "\n".join(f"• `{s.vm_code}`" for s in subs)
+            text = I18N.t(lang, "watch_list", lines=lines)
+        await reply_menu(update, context, deps, lang, text)
+        return
+
+    # Fetching once validates the code and gives the poller its baseline status.
+    st = await doprax.get_vm_status(vm_code)
+    status = str(safe_get(st, "status", default="")).strip()
+    added = await watcher.subscribe(user_id, update.effective_chat.id, lang, vm_code, status)
+    key = "watch_added" if added else "watch_exists"
+    await reply_menu(
+        update, context, deps, lang, I18N.t(lang, key, code=vm_code, status=status or "-")
+    )
+
+
+async def unwatch_cmd(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    deps: HandlerDeps,
+    watcher: WatchPoller,
+) -> None:
+    user_id = user_id_from_update(update)
+    if user_id is None or update.message is None:
+        return
+    lang = await get_lang(deps.storage, user_id)
+
+    vm_code = _arg(update)
+    if not vm_code:
+        await reply_menu(update, context, deps, lang, I18N.t(lang, "unwatch_usage"))
+        return
+    removed = await watcher.unsubscribe(user_id, vm_code)
+    key = "watch_removed" if removed else "watch_missing"
+    await reply_menu(update, context, deps, lang, I18N.t(lang, key, code=vm_code))
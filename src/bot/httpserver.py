@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+_REASONS = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class HttpRequest:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        if not self.body:
+            return None
+        return json.loads(self.body)
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+HttpHandler = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+def json_response(status: int, payload: Any) -> HttpResponse:
+    return HttpResponse(
+        status=status,
+        body=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+class HttpServer:
+    """Minimal asyncio HTTP/1.1 server (keep-alive, Content-Length bodies only).
+
+    Enough for local stand-ins and the webhook endpoint without pulling in a web framework.
+    """
+
+    def __init__(self, handler: HttpHandler, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._handler = handler
+        self._host = host
+        self._port = port
+        self._server: asyncio.base_events.Server | None = None
+        self._conns: dict[asyncio.StreamWriter, asyncio.Event] = {}
+
+    @property
+    def port(self) -> int:
+        if self._server is None or not self._server.sockets:
+            return self._port
+        return int(self._server.sockets[0].getsockname()[1])
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve_conn, self._host, self._port)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Closing the transports ends each connection loop at its next read.
+            done = list(self._conns.values())
+            for writer in list(self._conns):
+                writer.close()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(asyncio.gather(*(ev.wait() for ev in done)), timeout=1.0)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def _serve_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        finished = self._conns[writer] = asyncio.Event()
+        try:
+            while True:
+                req = await self._read_request(reader)
+                if req is None:
+                    break
+                try:
+                    resp = await self._handler(req)
+                except Exception:
+                    resp = json_response(500, {"success": False, "msg": "internal error"})
+                keep_alive = req.headers.get("connection", "").lower() != "close"
+                self._write_response(writer, resp, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+            self._conns.pop(writer, None)
+            finished.set()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> HttpRequest | None:
+        line = await reader.readline()
+        if not line:
+            return None
+        method, target, _version = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+
+        headers: dict[str, str] = {}
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = h.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        parts = urlsplit(target)
+        return HttpRequest(
+            method=method.upper(),
+            path=parts.path,
+            query=dict(parse_qsl(parts.query)),
+            headers=headers,
+            body=body,
+        )
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, resp: HttpResponse, keep_alive: bool) -> None:
+        reason = _REASONS.get(resp.status, "Unknown")
+        head = [f"HTTP/1.1 {resp.status} {reason}"]
+        headers = {
+            **resp.headers,
+            "Content-Length": str(len(resp.body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        head.extend(f"{k}: {v}" for k, v in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + resp.body)
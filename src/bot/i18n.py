@@ -54,9 +54,13 @@ I18N = I18n(
             "btn_back": "⬅️ Back",
             "btn_cancel": "❌ Cancel",
             "btn_refresh": "🔄 Refresh",
+            "btn_prev": "◀️ Prev",
+            "btn_next": "Next ▶️",
+            "vms_page": "{start}–{end} of {total}",
+            "status_unchanged": "No change",
+            "button_expired": "This button has expired, please open the menu again.",
             "btn_edit": "✏️ Edit",
             "btn_create": "✅ Create",
-            "btn_details": "📋 Details",
             "btn_status": "🔎 Status",
             "btn_change_lang": "🌐 Change Language",
             "btn_toggle_verbose": "📝 Toggle Verbose",
@@ -68,6 +72,7 @@ I18N = I18n(
             "vm_loc": " — {location}",
             "vm_status_title": "VM Status",
             "vm_status_body": "Code: `{code}`\nStatus: {status}\nActive: {active}\nChecked: {checked}",
+            "vm_status_age": "_Cached, {age}s old_",
             "ask_vm_code": "Please send the VM code (example: `abcd1234`).",
             "status_usage": "Usage: /status <vm_code>",
             # Locations / OS
@@ -88,6 +93,8 @@ I18N = I18n(
             "create_confirm_no_suggestions": "No alternatives needed.",
             "create_in_progress": "A VM creation is already in progress for you. Please wait.",
             "create_success": "✅ VM created!\nName: {name}\nCode: `{code}`\nInitial status: {status}",
+            "create_tracking": "I'll message you when its status changes.",
+            "vm_status_changed": "🔔 VM {name} (`{code}`) is now *{status}* (was {old}).",
             "create_failed_resolution": "Could not resolve plan/location codes. Try a different plan or location.\nSuggestions:\n{suggestions}",
             "edit_which": "Which field do you want to edit?",
             "edit_hint": "Use the wizard steps via the buttons. Choose a step:",
@@ -100,6 +107,23 @@ I18N = I18n(
             "settings_title": "Settings:",
             "verbose_on": "Verbose mode: ON",
             "verbose_off": "Verbose mode: OFF",
+            # Accounts
+            "account_current": "Doprax account: `{account}`\nAvailable: {accounts}\n\nSwitch with /account <name>",
+            "account_set": "Doprax account set to `{account}` ✅",
+            "account_unknown": "Unknown account. Available: {accounts}",
+            "watch_added": "👀 Watching `{code}` (now {status}). I'll message you when it changes.",
+            "watch_exists": "You are already watching `{code}` (now {status}).",
+            "watch_list": "You are watching:\n{lines}\n\nStop with /unwatch <vm_code>",
+            "watch_none": "You are not watching any VM.\nUsage: /watch <vm_code>",
+            "watch_removed": "Stopped watching `{code}`.",
+            "watch_missing": "You are not watching `{code}`.",
+            "unwatch_usage": "Usage: /unwatch <vm_code>",
+            "watch_gone": "🔔 VM `{code}` no longer exists; stopped watching it.",
+            "profile_usage": "Usage: /profile [seconds] (1–{max})",
+            "profile_busy": "A profile is already running.",
+            "profile_started": "⏱ Profiling all handlers for {seconds}s…",
+            "profile_done": "📈 Profile: {samples} samples over {seconds}s.\n\nBy handler:\n{handlers}\n\nBy Doprax endpoint:\n{endpoints}\n\nFiles:\n`{folded}`\n`{pstats}`",
+            "profile_none": "—",
         },
         "fa": {
             "app_name": "ربات مدیریت VM دوپراکس",
@@ -128,9 +152,13 @@ I18N = I18n(
             "btn_back": "⬅️ بازگشت",
             "btn_cancel": "❌ لغو",
             "btn_refresh": "🔄 بروزرسانی",
+            "btn_prev": "◀️ قبلی",
+            "btn_next": "بعدی ▶️",
+            "vms_page": "{start} تا {end} از {total}",
+            "status_unchanged": "بدون تغییر",
+            "button_expired": "این دکمه منقضی شده است، لطفاً دوباره منو را باز کنید.",
             "btn_edit": "✏️ ویرایش",
             "btn_create": "✅ ساخت",
-            "btn_details": "📋 جزئیات",
             "btn_status": "🔎 وضعیت",
             "btn_change_lang": "🌐 تغییر زبان",
             "btn_toggle_verbose": "📝 تغییر حالت نمایش",
@@ -141,6 +169,7 @@ I18N = I18n(
             "vm_loc": " — {location}",
             "vm_status_title": "وضعیت VM",
             "vm_status_body": "کد: `{code}`\nوضعیت: {status}\nفعال: {active}\nزمان بررسی: {checked}",
+            "vm_status_age": "_از حافظه، {age} ثانیه پیش_",
             "ask_vm_code": "لطفاً کد VM را ارسال کنید (مثال: `abcd1234`).",
             "status_usage": "فرمت: /status <vm_code>",
             "locations_title": "خلاصه لوکیشن‌ها و پلن‌ها:",
@@ -159,6 +188,8 @@ I18N = I18n(
             "create_confirm_no_suggestions": "پیشنهاد جایگزین لازم نیست.",
             "create_in_progress": "در حال حاضر یک ساخت VM برای شما در جریان است. لطفاً صبر کنید.",
             "create_success": "✅ VM ساخته شد!\nنام: {name}\nکد: `{code}`\nوضعیت اولیه: {status}",
+            "create_tracking": "هر وقت وضعیت آن تغییر کند به شما پیام می‌دهم.",
+            "vm_status_changed": "🔔 وضعیت VM {name} (`{code}`) اکنون *{status}* است (قبلاً {old}).",
             "create_failed_resolution": "امکان تطبیق پلن/لوکیشن نبود. پلن یا لوکیشن را تغییر دهید.\nپیشنهادها:\n{suggestions}",
             "edit_which": "کدام فیلد را می‌خواهید ویرایش کنید؟",
             "edit_hint": "با دکمه‌ها مرحله مورد نظر را انتخاب کنید:",
@@ -170,6 +201,22 @@ I18N = I18n(
             "settings_title": "تنظیمات:",
             "verbose_on": "حالت نمایش: کامل",
             "verbose_off": "حالت نمایش: خلاصه",
+            "account_current": "حساب دوپراکس: `{account}`\nحساب‌های موجود: {accounts}\n\nبرای تغییر: /account <name>",
+            "account_set": "حساب دوپراکس روی `{account}` تنظیم شد ✅",
+            "account_unknown": "حساب ناشناخته است. حساب‌های موجود: {accounts}",
+            "watch_added": "👀 VM `{code}` زیر نظر است (وضعیت فعلی: {status}). با هر تغییر به شما پیام می‌دهم.",
+            "watch_exists": "شما از قبل VM `{code}` را زیر نظر دارید (وضعیت فعلی: {status}).",
+            "watch_list": "VMهای زیر نظر شما:\n{lines}\n\nبرای توقف: /unwatch <vm_code>",
+            "watch_none": "هیچ VMای را زیر نظر ندارید.\nفرمت: /watch <vm_code>",
+            "watch_removed": "پیگیری `{code}` متوقف شد.",
+            "watch_missing": "شما VM `{code}` را زیر نظر ندارید.",
+            "unwatch_usage": "فرمت: /unwatch <vm_code>",
+            "watch_gone": "🔔 VM `{code}` دیگر وجود ندارد؛ پیگیری آن متوقف شد.",
+            "profile_usage": "فرمت: /profile [ثانیه] (۱ تا {max})",
+            "profile_busy": "یک پروفایل در حال اجراست.",
+            "profile_started": "⏱ پروفایل همهٔ هندلرها به مدت {seconds} ثانیه…",
+            "profile_done": "📈 پروفایل: {samples} نمونه در {seconds} ثانیه.\n\nبه تفکیک هندلر:\n{handlers}\n\nبه تفکیک endpoint دوپراکس:\n{endpoints}\n\nفایل‌ها:\n`{folded}`\n`{pstats}`",
+            "profile_none": "—",
         },
     }
 )
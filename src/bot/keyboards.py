@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from collections.abc import Iterable, Sequence
+from functools import lru_cache
+
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -8,22 +10,31 @@ from telegram import (
     ReplyKeyboardMarkup,
 )
 
+from bot.callbacks import pack
 from bot.i18n import I18N, Lang
 
 
 class CB:
-    """Callback data prefixes."""
+    """Callback routes; payloads are built with :func:`bot.callbacks.pack`."""
+
+    LANG = "LANG"
+    MENU = "MENU"
+    VM_STATUS = "VMSTAT"
+    VM_REFRESH = "VMREF"
+    VM_LIST = "VMLIST"
+    CREATE = "CREATE"
+    SETTINGS = "SET"
+    LOC_PICK = "LOCPICK"
+    OS_PICK = "OSPICK"
+
 
-    LANG = "LANG:"
-    MENU = "MENU:"
-    VM_STATUS = "VMSTAT:"
-    VM_DETAILS = "VMDET:"
-    CREATE = "CREATE:"
-    SETTINGS = "SET:"
-    LOC_PICK = "LOCPICK:"
-    OS_PICK = "OSPICK:"
+# Markups are immutable once built, so one instance per distinct input can be shared by
+# every message. Static keyboards only vary by language; per-VM ones are bounded LRUs.
+_PER_LANG = 8
+_PER_VM = 1024
 
 
+@lru_cache(maxsize=_PER_LANG)
 def main_reply_keyboard(lang: Lang) -> ReplyKeyboardMarkup:
     t = I18N.t
     rows = [
@@ -44,32 +55,38 @@ def main_reply_keyboard(lang: Lang) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(rows, resize_keyboard=True, is_persistent=True)
 
 
+@lru_cache(maxsize=1)
 def lang_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [
             [
-                InlineKeyboardButton("فارسی", callback_data=f"{CB.LANG}fa"),
-                InlineKeyboardButton("English", callback_data=f"{CB.LANG}en"),
+                InlineKeyboardButton("فارسی", callback_data=pack(CB.LANG, "fa")),
+                InlineKeyboardButton("English", callback_data=pack(CB.LANG, "en")),
             ]
         ]
     )
 
 
+# Actions behind the VM management buttons (``CB.MENU`` callbacks).
+VM_MGMT_ACTIONS = ("list_vms", "status_prompt", "refresh_vm_mgmt")
+
+
+@lru_cache(maxsize=_PER_LANG)
 def vm_mgmt_inline(lang: Lang) -> InlineKeyboardMarkup:
     t = I18N.t
     return InlineKeyboardMarkup(
         [
             [
                 InlineKeyboardButton(
-                    t(lang, "btn_list_vms"), callback_data=f"{CB.MENU}list_vms"
+                    t(lang, "btn_list_vms"), callback_data=pack(CB.MENU, "list_vms")
                 ),
                 InlineKeyboardButton(
-                    t(lang, "btn_status"), callback_data=f"{CB.MENU}status_prompt"
+                    t(lang, "btn_status"), callback_data=pack(CB.MENU, "status_prompt")
                 ),
             ],
             [
                 InlineKeyboardButton(
-                    t(lang, "btn_refresh"), callback_data=f"{CB.MENU}refresh_vm_mgmt"
+                    t(lang, "btn_refresh"), callback_data=pack(CB.MENU, "refresh_vm_mgmt")
                 )
             ],
         ]
@@ -86,28 +103,30 @@ def back_cancel_row(
     ]
 
 
+@lru_cache(maxsize=_PER_LANG)
 def create_provider_inline(lang: Lang) -> InlineKeyboardMarkup:
     providers = ["Digitalocean", "Hetzner", "OVH", "Gcore", "Vultr", "Scaleway"]
     rows: list[list[InlineKeyboardButton]] = []
     for i in range(0, len(providers), 2):
         row = [
             InlineKeyboardButton(
-                providers[i], callback_data=f"{CB.CREATE}prov:{providers[i]}"
+                providers[i], callback_data=pack(CB.CREATE, "prov", providers[i])
             ),
         ]
         if i + 1 < len(providers):
             row.append(
                 InlineKeyboardButton(
                     providers[i + 1],
-                    callback_data=f"{CB.CREATE}prov:{providers[i + 1]}",
+                    callback_data=pack(CB.CREATE, "prov", providers[i + 1]),
                 )
             )
         rows.append(row)
 
-    rows.append(back_cancel_row(lang, f"{CB.CREATE}back", f"{CB.CREATE}cancel"))
+    rows.append(back_cancel_row(lang, pack(CB.CREATE, "back"), pack(CB.CREATE, "cancel")))
     return InlineKeyboardMarkup(rows)
 
 
+@lru_cache(maxsize=_PER_LANG)
 def create_plan_inline(lang: Lang) -> InlineKeyboardMarkup:
     quick = ["DO1", "DO2", "DO3", "H1", "g1a", "g1b", "V1", "SW1", "SW2"]
     rows: list[list[InlineKeyboardButton]] = []
@@ -115,24 +134,31 @@ def create_plan_inline(lang: Lang) -> InlineKeyboardMarkup:
         chunk = quick[i : i + 3]
         rows.append(
             [
-                InlineKeyboardButton(x, callback_data=f"{CB.CREATE}plan:{x}")
+                InlineKeyboardButton(x, callback_data=pack(CB.CREATE, "plan", x))
                 for x in chunk
             ]
         )
-    rows.append(back_cancel_row(lang, f"{CB.CREATE}back", f"{CB.CREATE}cancel"))
+    rows.append(back_cancel_row(lang, pack(CB.CREATE, "back"), pack(CB.CREATE, "cancel")))
     return InlineKeyboardMarkup(rows)
 
 
 def create_location_inline(
     lang: Lang, suggestions: Sequence[tuple[str, str]] | None = None
+) -> InlineKeyboardMarkup:
+    return _create_location_inline(lang, tuple(suggestions[:6]) if suggestions else ())
+
+
+@lru_cache(maxsize=_PER_VM)
+def _create_location_inline(
+    lang: Lang, suggestions: tuple[tuple[str, str], ...]
 ) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
     if suggestions:
-        for name, code in suggestions[:6]:
+        for name, code in suggestions:
             rows.append(
-                [InlineKeyboardButton(f"{name}", callback_data=f"{CB.LOC_PICK}{code}")]
+                [InlineKeyboardButton(f"{name}", callback_data=pack(CB.LOC_PICK, code))]
             )
-    rows.append(back_cancel_row(lang, f"{CB.CREATE}back", f"{CB.CREATE}cancel"))
+    rows.append(back_cancel_row(lang, pack(CB.CREATE, "back"), pack(CB.CREATE, "cancel")))
     return InlineKeyboardMarkup(rows)
 
 
@@ -140,81 +166,109 @@ def create_os_inline(
     lang: Lang, quick: Iterable[str], allowed: Iterable[str]
 ) -> InlineKeyboardMarkup:
     allowed_set = set(allowed)
-    quick_list = [q for q in quick if q in allowed_set]
+    return _create_os_inline(lang, tuple(q for q in quick if q in allowed_set))
+
+
+@lru_cache(maxsize=_PER_LANG * 4)
+def _create_os_inline(lang: Lang, quick_list: tuple[str, ...]) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
     for i in range(0, len(quick_list), 2):
         chunk = quick_list[i : i + 2]
         rows.append(
-            [InlineKeyboardButton(x, callback_data=f"{CB.OS_PICK}{x}") for x in chunk]
+            [InlineKeyboardButton(x, callback_data=pack(CB.OS_PICK, x)) for x in chunk]
         )
-    rows.append(back_cancel_row(lang, f"{CB.CREATE}back", f"{CB.CREATE}cancel"))
+    rows.append(back_cancel_row(lang, pack(CB.CREATE, "back"), pack(CB.CREATE, "cancel")))
     return InlineKeyboardMarkup(rows)
 
 
+@lru_cache(maxsize=_PER_LANG)
 def create_confirm_inline(lang: Lang) -> InlineKeyboardMarkup:
     t = I18N.t
     return InlineKeyboardMarkup(
         [
             [
                 InlineKeyboardButton(
-                    t(lang, "btn_create"), callback_data=f"{CB.CREATE}confirm:create"
+                    t(lang, "btn_create"), callback_data=pack(CB.CREATE, "confirm", "create")
                 ),
                 InlineKeyboardButton(
-                    t(lang, "btn_edit"), callback_data=f"{CB.CREATE}confirm:edit"
+                    t(lang, "btn_edit"), callback_data=pack(CB.CREATE, "confirm", "edit")
                 ),
             ],
-            back_cancel_row(lang, f"{CB.CREATE}back", f"{CB.CREATE}cancel"),
+            back_cancel_row(lang, pack(CB.CREATE, "back"), pack(CB.CREATE, "cancel")),
         ]
     )
 
 
+@lru_cache(maxsize=_PER_LANG)
 def settings_inline(lang: Lang) -> InlineKeyboardMarkup:
     t = I18N.t
     return InlineKeyboardMarkup(
         [
             [
                 InlineKeyboardButton(
-                    t(lang, "btn_change_lang"), callback_data=f"{CB.SETTINGS}lang"
+                    t(lang, "btn_change_lang"), callback_data=pack(CB.SETTINGS, "lang")
                 )
             ],
             [
                 InlineKeyboardButton(
-                    t(lang, "btn_toggle_verbose"), callback_data=f"{CB.SETTINGS}verbose"
+                    t(lang, "btn_toggle_verbose"), callback_data=pack(CB.SETTINGS, "verbose")
                 )
             ],
             [
                 InlineKeyboardButton(
-                    t(lang, "btn_about"), callback_data=f"{CB.SETTINGS}about"
+                    t(lang, "btn_about"), callback_data=pack(CB.SETTINGS, "about")
                 )
             ],
         ]
     )
 
 
-def vm_list_inline(lang: Lang, vm_code: str) -> InlineKeyboardMarkup:
-    t = I18N.t
+@lru_cache(maxsize=_PER_VM)
+def status_refresh_inline(lang: Lang, vm_code: str) -> InlineKeyboardMarkup | None:
+    """None when ``vm_code`` (typed by the user) does not fit in callback data."""
+    try:
+        data = pack(CB.VM_REFRESH, vm_code)
+    except ValueError:
+        return None
     return InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton(
-                    t(lang, "btn_status"), callback_data=f"{CB.VM_STATUS}{vm_code}"
-                ),
-                InlineKeyboardButton(
-                    t(lang, "btn_details"), callback_data=f"{CB.VM_DETAILS}{vm_code}"
-                ),
-            ]
-        ]
+        [[InlineKeyboardButton(I18N.t(lang, "btn_refresh"), callback_data=data)]]
     )
 
 
-def status_refresh_inline(lang: Lang, vm_code: str) -> InlineKeyboardMarkup:
+def vm_list_cursor(page: int, refresh: bool = False) -> str:
+    """Callback data for a VM list page: ``VMLIST:<page>``, or ``VMLIST:r:<page>`` to refresh."""
+    return pack(CB.VM_LIST, "r", page) if refresh else pack(CB.VM_LIST, page)
+
+
+def vm_list_page_inline(
+    lang: Lang, vms: Sequence[tuple[str, str]], page: int, pages: int
+) -> InlineKeyboardMarkup:
+    """One status button per VM on the page (``(label, vm_code)``) plus Prev / Refresh / Next."""
+    return _vm_list_page_inline(lang, tuple(vms), page, pages)
+
+
+@lru_cache(maxsize=256)
+def _vm_list_page_inline(
+    lang: Lang, vms: tuple[tuple[str, str], ...], page: int, pages: int
+) -> InlineKeyboardMarkup:
     t = I18N.t
-    return InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton(
-                    t(lang, "btn_refresh"), callback_data=f"{CB.VM_STATUS}{vm_code}"
-                )
-            ]
-        ]
+    rows = [
+        [InlineKeyboardButton(f"🔎 {label[:40]}", callback_data=pack(CB.VM_STATUS, code))]
+        for label, code in vms
+    ]
+    nav = []
+    if page > 0:
+        nav.append(
+            InlineKeyboardButton(t(lang, "btn_prev"), callback_data=vm_list_cursor(page - 1))
+        )
+    nav.append(
+        InlineKeyboardButton(
+            f"🔄 {page + 1}/{max(1, pages)}", callback_data=vm_list_cursor(page, refresh=True)
+        )
     )
+    if page + 1 < pages:
+        nav.append(
+            InlineKeyboardButton(t(lang, "btn_next"), callback_data=vm_list_cursor(page + 1))
+        )
+    rows.append(nav)
+    return InlineKeyboardMarkup(rows)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+from collections import deque
+from typing import Any
+
+from bot.utils import json_log
+
+# Seconds; tuned for HTTP calls and handler latencies.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+class Gauge:
+    """Point-in-time value (queue depth, in-flight count, ...)."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, v: float) -> None:
+        self.value = v
+
+    def inc(self, n: float = 1.0) -> None:
+        self.value += n
+
+    def dec(self, n: float = 1.0) -> None:
+        self.value -= n
+
+
+class Histogram:
+    """
+    Cumulative bucket counts plus a window of recent samples.
+
+    Buckets give a cheap all-time distribution for logs; quantiles are computed over the
+    recent window so they track the current behaviour of an endpoint.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, window: int = 512) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, v)] += 1
+        self.count += 1
+        self.sum += v
+        if v > self.max:
+            self.max = v
+        self._recent.append(v)
+
+    def quantile(self, q: float) -> float | None:
+        """Quantile over the recent window, or None when there are no samples."""
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+        return ordered[idx]
+
+    @property
+    def samples(self) -> int:
+        return len(self._recent)
+
+    def summary(self) -> dict[str, Any]:
+        p50, p95, p99 = (self.quantile(q) for q in (0.5, 0.95, 0.99))
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            "p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+def _key(labels: dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """In-process metrics registry; metrics are created on first use and keyed by labels."""
+
+    def __init__(self) -> None:
+        self._counters: dict[tuple[str, LabelKey], Counter] = {}
+        self._gauges: dict[tuple[str, LabelKey], Gauge] = {}
+        self._histograms: dict[tuple[str, LabelKey], Histogram] = {}
+
+    def counter(self, name: str, **labels: Any) -> Counter:
+        key = (name, _key(labels))
+        c = self._counters.get(key)
+        if c is None:
+            c = self._counters[key] = Counter()
+        return c
+
+    def gauge(self, name: str, **labels: Any) -> Gauge:
+        key = (name, _key(labels))
+        g = self._gauges.get(key)
+        if g is None:
+            g = self._gauges[key] = Gauge()
+        return g
+
+    def histogram(self, name: str, **labels: Any) -> Histogram:
+        key = (name, _key(labels))
+        h = self._histograms.get(key)
+        if h is None:
+            h = self._histograms[key] = Histogram()
+        return h
+
+    def find_histogram(self, name: str, **labels: Any) -> Histogram | None:
+        return self._histograms.get((name, _key(labels)))
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """JSON-friendly view of every metric."""
+        out: dict[str, list[dict[str, Any]]] = {}
+        for (name, labels), c in sorted(self._counters.items()):
+            out.setdefault(name, []).append({**dict(labels), "value": c.value})
+        for (name, labels), g in sorted(self._gauges.items()):
+            out.setdefault(name, []).append({**dict(labels), "value": g.value})
+        for (name, labels), h in sorted(self._histograms.items()):
+            out.setdefault(name, []).append({**dict(labels), **h.summary()})
+        return out
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+async def log_metrics_periodically(
+    logger: logging.Logger, interval_seconds: float, registry: MetricsRegistry = METRICS
+) -> None:
+    """Emit a ``metrics_summary`` structured log line every ``interval_seconds``."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        snap = registry.snapshot()
+        if snap:
+            json_log(logger, logging.INFO, "metrics_summary", metrics=snap)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from bot.i18n import I18N
+from bot.metrics import METRICS
+from bot.utils import json_log
+
+LOGGER = logging.getLogger("doprax_telegram_bot")
+
+
+@dataclass
+class _Pending:
+    coroutine: Awaitable[Any]
+    is_callback: bool
+    enqueued_at: float
+    # Resolved with True when the update may run, False when it was dropped.
+    turn: asyncio.Future[bool]
+
+
+@dataclass
+class _Lane:
+    pending: deque[_Pending] = field(default_factory=deque)
+
+
+def _key(update: object) -> int | None:
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return None
+
+
+def _discard(coroutine: Awaitable[Any]) -> None:
+    if inspect.iscoroutine(coroutine):
+        coroutine.close()
+
+
+async def _answer_dropped(update: object, key: str) -> None:
+    """Answer a dropped callback query so the client's button stops spinning."""
+    if not isinstance(update, Update) or update.callback_query is None:
+        return
+    # Same language pick as CallbackRouter._reject: no storage read for a dropped update.
+    user = update.effective_user
+    lang = "fa" if user and (user.language_code or "").startswith("fa") else "en"
+    try:
+        await update.callback_query.answer(I18N.t(lang, key))
+    except Exception:
+        return
+
+
+class UserOrderedProcessor(BaseUpdateProcessor):
+    """
+    Update processor that runs one user's updates strictly in arrival order while different
+    users proceed concurrently (up to ``max_concurrent_updates`` overall).
+
+    Each user has a lane: the first update runs immediately, later ones wait in a queue of at
+    most ``max_pending``. When that queue is full the oldest waiting callback query is dropped
+    (a stale button press), or the oldest waiting update if there is none. A callback that
+    only reaches the front after ``stale_callback_seconds`` is dropped as well. Dropped
+    callback queries are still answered. Updates without a user or chat are not ordered.
+
+    PTB takes the concurrency slot before handing an update over, so an update waiting in
+    its lane holds a slot too: one user ties up at most ``1 + max_pending`` of the
+    ``max_concurrent_updates`` slots, and the bound counts waiting updates as well as
+    running ones.
+
+    Every update is counted as in flight from the moment it has a slot (including while it
+    waits for its turn) until its handlers return; ``drain`` waits for that count to reach
+    zero on shutdown.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_updates: int = 256,
+        max_pending: int = 8,
+        stale_callback_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(max_concurrent_updates)
+        self._max_pending = max(1, max_pending)
+        self._stale_callback = stale_callback_seconds
+        self._clock = clock
+        # A key is present while one of its updates is running.
+        self._lanes: dict[int, _Lane] = {}
+        self._depth = METRICS.gauge("update_user_queue_depth")
+        self._active = METRICS.gauge("update_active_users")
+        self._in_flight: set[asyncio.Task[Any]] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._in_flight_gauge = METRICS.gauge("update_in_flight")
+
+    async def initialize(self) -> None:
+        return None
+
+    async def shutdown(self) -> None:
+        return None
+
+    def queued(self, key: int) -> int:
+        lane = self._lanes.get(key)
+        return len(lane.pending) if lane else 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Wait up to ``timeout`` seconds for in-flight updates to finish, then cancel the rest.
+        Returns how many were abandoned.
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=max(0.0, timeout))
+            return 0
+        except TimeoutError:
+            pass
+        abandoned = list(self._in_flight)
+        for task in abandoned:
+            task.cancel()
+        await asyncio.gather(*abandoned, return_exceptions=True)
+        return len(abandoned)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        task = asyncio.current_task()
+        if task is None:
+            await self._process_in_order(update, coroutine)
+            return
+        self._in_flight.add(task)
+        self._idle.clear()
+        self._in_flight_gauge.set(len(self._in_flight))
+        try:
+            await self._process_in_order(update, coroutine)
+        finally:
+            self._in_flight.discard(task)
+            self._in_flight_gauge.set(len(self._in_flight))
+            if not self._in_flight:
+                self._idle.set()
+
+    async def _process_in_order(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = _key(update)
+        if key is None:
+            await coroutine
+            return
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            self._lanes[key] = _Lane()
+            self._active.set(len(self._lanes))
+            METRICS.histogram("update_queue_wait_seconds").observe(0.0)
+        elif not await self._wait_turn(key, lane, update, coroutine):
+            return
+
+        try:
+            await coroutine
+        finally:
+            self._release(key)
+
+    async def _wait_turn(
+        self, key: int, lane: _Lane, update: object, coroutine: Awaitable[Any]
+    ) -> bool:
+        is_callback = isinstance(update, Update) and update.callback_query is not None
+        if len(lane.pending) >= self._max_pending:
+            victim = next((p for p in lane.pending if p.is_callback), lane.pending[0])
+            lane.pending.remove(victim)
+            self._drop(key, victim, "queue_full")
+
+        entry = _Pending(
+            coroutine,
+            is_callback,
+            self._clock(),
+            asyncio.get_running_loop().create_future(),
+        )
+        lane.pending.append(entry)
+        self._depth.inc()
+        try:
+            run = await entry.turn
+        except asyncio.CancelledError:
+            if entry.turn.done() and not entry.turn.cancelled() and entry.turn.result():
+                # The lane was already handed to us; pass it on.
+                self._release(key)
+            elif entry in lane.pending:
+                lane.pending.remove(entry)
+                self._depth.dec()
+            _discard(coroutine)
+            raise
+        if not run:
+            await _answer_dropped(update, "rate_limited")
+            return False
+
+        waited = self._clock() - entry.enqueued_at
+        METRICS.histogram("update_queue_wait_seconds").observe(waited)
+        if is_callback and waited > self._stale_callback:
+            self._release(key)
+            _discard(coroutine)
+            METRICS.counter("update_dropped_total", reason="stale_callback").inc()
+            await _answer_dropped(update, "button_expired")
+            return False
+        return True
+
+    def _drop(self, key: int, entry: _Pending, reason: str) -> None:
+        self._depth.dec()
+        METRICS.counter("update_dropped_total", reason=reason).inc()
+        json_log(
+            LOGGER,
+            logging.WARNING,
+            "update_dropped",
+            user_id=key,
+            reason=reason,
+            callback=entry.is_callback,
+        )
+        if not entry.turn.done():
+            entry.turn.set_result(False)
+        _discard(entry.coroutine)
+
+    def _release(self, key: int) -> None:
+        lane = self._lanes.get(key)
+        if lane is None:
+            return
+        while lane.pending:
+            nxt = lane.pending.popleft()
+            self._depth.dec()
+            if not nxt.turn.done():
+                # Ownership of the lane moves to the next update; the key stays registered.
+                nxt.turn.set_result(True)
+                return
+        del self._lanes[key]
+        self._active.set(len(self._lanes))
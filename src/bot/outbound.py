@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Coroutine
+from datetime import timedelta
+from typing import Any
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from bot.metrics import METRICS
+from bot.resilience import TokenBucket
+from bot.utils import json_log
+
+LOGGER = logging.getLogger("doprax_telegram_bot")
+
+# Bot API methods that put something into a chat and therefore count towards flood limits.
+_LIMITED_PREFIXES = ("send", "edit", "copy", "forward")
+
+JSONResult = bool | dict[str, Any] | list[dict[str, Any]]
+
+
+def _seconds(value: int | float | timedelta) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class FloodLimiter(BaseRateLimiter[int]):
+    """
+    Central throttle for every outbound Bot API call, installed with
+    ``ApplicationBuilder().rate_limiter(...)``.
+
+    Message-producing calls reserve a token from a global bucket (~30/s) and from their
+    chat's bucket (~1/s with a small burst; groups ~20/min), so calls are released in arrival
+    order without polling. A ``RetryAfter`` from Telegram pauses all sends for the advertised
+    time and the call is retried up to ``max_retries`` times (override per call with
+    ``rate_limit_args``). A call that would have to wait longer than ``max_wait`` is dropped
+    with ``RetryAfter`` instead of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        max_wait: float = 30.0,
+        max_chats: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._global = TokenBucket(global_rate, burst=global_rate, clock=clock)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._chats: OrderedDict[int | str, TokenBucket] = OrderedDict()
+        self._max_chats = max_chats
+        self._max_retries = max_retries
+        self._max_wait = max_wait
+        self._resume_at = 0.0
+        self._pending = METRICS.gauge("telegram_send_pending")
+
+    async def initialize(self) -> None:
+        return None
+
+    async def shutdown(self) -> None:
+        return None
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            group = isinstance(chat_id, str) or chat_id < 0
+            rate = self._group_rate if group else self._chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self._chat_burst, clock=self._clock)
+            while len(self._chats) > self._max_chats:
+                self._chats.popitem(last=False)
+        self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def _wait_turn(self, endpoint: str, chat_id: int | str | None) -> None:
+        pause = max(0.0, self._resume_at - self._clock())
+        buckets: list[TokenBucket] = []
+        if endpoint.lower().startswith(_LIMITED_PREFIXES):
+            buckets.append(self._global)
+            if chat_id is not None:
+                buckets.append(self._chat_bucket(chat_id))
+
+        delay = max([pause, *(b.reserve() for b in buckets)])
+        if delay > self._max_wait:
+            for b in buckets:
+                b.refund()
+            METRICS.counter("telegram_send_dropped_total", reason="max_wait").inc()
+            raise RetryAfter(math.ceil(delay))
+        METRICS.histogram("telegram_send_wait_seconds").observe(delay)
+        if delay > 0:
+            self._pending.inc()
+            try:
+                await self._sleep(delay)
+            finally:
+                self._pending.dec()
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, JSONResult]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: int | None,
+    ) -> JSONResult:
+        max_retries = self._max_retries if rate_limit_args is None else rate_limit_args
+        chat_id = data.get("chat_id")
+        if isinstance(chat_id, str) and chat_id.lstrip("-").isdigit():
+            chat_id = int(chat_id)
+
+        attempt = 0
+        while True:
+            await self._wait_turn(endpoint, chat_id)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                wait = _seconds(e.retry_after)
+                METRICS.counter("telegram_retry_after_total", endpoint=endpoint).inc()
+                self._resume_at = max(self._resume_at, self._clock() + wait)
+                if attempt >= max_retries:
+                    METRICS.counter("telegram_send_dropped_total", reason="retry_after").inc()
+                    raise
+                attempt += 1
+                json_log(
+                    LOGGER,
+                    logging.WARNING,
+                    "telegram_retry_after",
+                    endpoint=endpoint,
+                    chat_id=chat_id,
+                    retry_after=wait,
+                    attempt=attempt,
+                )
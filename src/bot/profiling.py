@@ -0,0 +1,284 @@
+"""
+On-demand sampling profiler for the event-loop thread.
+
+While a window is open, a daemon thread wakes every ``interval`` seconds, takes the loop
+thread's current stack from ``sys._current_frames()`` and files it under the handler and the
+Doprax endpoint it was running. Nothing is hooked into the loop, the handlers or the client,
+so with no window open the bot pays nothing. Each window writes two files:
+
+- ``profile-<stamp>.folded``: collapsed stacks, rooted at the handler and endpoint
+  (``status_cmd;doprax:GET /api/v1/vms/{vm_code}/status/;...;leaf 12``), for flamegraph.pl,
+  speedscope or inferno
+- ``profile-<stamp>.pstats``: the same samples as ``pstats`` data (call counts are sample
+  counts), for ``python -m pstats`` or snakeviz
+
+Only time spent on the loop thread shows up: a handler waiting on Doprax or Telegram is
+suspended and costs no samples, which is the point, since anything that does show up is
+holding up every other user.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+
+import bot
+from bot.doprax_client import DopraxClient
+from bot.utils import endpoint_template, json_log
+
+DEFAULT_SECONDS = 30
+MAX_SECONDS = 300
+IDLE = "(idle)"
+OTHER = "(other)"
+
+_BOT_DIR = os.path.dirname(bot.__file__) + os.sep
+_HANDLERS_DIR = os.path.join(_BOT_DIR, "handlers") + os.sep
+# Handler modules that only route or help; samples belong to the handler they serve.
+_NOT_HANDLERS = frozenset(os.path.join(_HANDLERS_DIR, m) for m in ("common.py", "text_router.py"))
+_DOPRAX_REQUEST = DopraxClient._request.__code__
+
+# (handler, Doprax endpoint or "", code objects from the outermost frame to the leaf)
+StackKey = tuple[str, str, tuple[CodeType, ...]]
+# pstats function key: (filename, first line, name)
+Func = tuple[str, int, str]
+
+
+class ProfilerBusy(Exception):
+    """A profiling window is already open."""
+
+
+@dataclass(frozen=True)
+class ProfileResult:
+    seconds: float
+    samples: int
+    folded_path: str
+    pstats_path: str
+    # Sample counts, largest first.
+    by_handler: list[tuple[str, int]]
+    by_endpoint: list[tuple[str, int]]
+
+
+@dataclass
+class _Timing:
+    """One pstats row, or one caller edge of it; call counts are sample counts."""
+
+    calls: int = 0
+    own: float = 0.0
+    cumulative: float = 0.0
+    callers: dict[Func, _Timing] = field(default_factory=dict)
+
+    def row(self) -> tuple[int, int, float, float]:
+        return self.calls, self.calls, self.own, self.cumulative
+
+
+def _short_path(filename: str) -> str:
+    for root in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1 :]
+    return filename
+
+
+def _is_idle(code: CodeType) -> bool:
+    # The loop waiting in select()/epoll() for I/O.
+    return code.co_name == "select" and code.co_filename.endswith("selectors.py")
+
+
+def stack_key(frame: FrameType) -> StackKey:
+    """Classify one sampled stack; ``frame`` is its innermost frame."""
+    codes: list[CodeType] = []
+    endpoint = ""
+    f: FrameType | None = frame
+    while f is not None:
+        code = f.f_code
+        codes.append(code)
+        if code is _DOPRAX_REQUEST and not endpoint:
+            local = f.f_locals
+            endpoint = f"{local.get('method', '')} {endpoint_template(str(local.get('url')))}"
+        f = f.f_back
+    codes.reverse()
+
+    handler = OTHER
+    if _is_idle(codes[-1]):
+        handler = IDLE
+    else:
+        # Outermost handler frame, else the outermost frame of our own code (a job, the
+        # update pipeline before a handler runs).
+        in_bot = [c for c in codes if c.co_filename.startswith(_BOT_DIR)]
+        handlers = [
+            c
+            for c in in_bot
+            if c.co_filename.startswith(_HANDLERS_DIR) and c.co_filename not in _NOT_HANDLERS
+        ]
+        if handlers:
+            handler = handlers[0].co_name
+        elif in_bot:
+            handler = in_bot[0].co_qualname
+    return handler, endpoint, tuple(codes)
+
+
+def _frame_label(code: CodeType) -> str:
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def write_folded(path: str, samples: Counter[StackKey]) -> None:
+    lines = Counter[str]()
+    for (handler, endpoint, codes), n in samples.items():
+        roots = [handler, f"doprax:{endpoint}"] if endpoint else [handler]
+        frames = roots + [_frame_label(c) for c in codes]
+        lines[";".join(s.replace(";", ",") for s in frames)] += n
+    with open(path, "w", encoding="utf-8") as fh:
+        for stack, n in sorted(lines.items()):
+            fh.write(f"{stack} {n}\n")
+
+
+def write_pstats(path: str, samples: Counter[StackKey], sample_seconds: float) -> None:
+    """Write ``samples`` in the marshal format ``pstats.Stats`` loads."""
+    stats: dict[Func, _Timing] = {}
+    for (_, _, codes), n in samples.items():
+        t = n * sample_seconds
+        funcs = [(c.co_filename, c.co_firstlineno, c.co_name) for c in codes]
+        seen: set[Func] = set()
+        for i, func in enumerate(funcs):
+            entry = stats.setdefault(func, _Timing())
+            leaf = i == len(funcs) - 1
+            if leaf:
+                entry.own += t
+            # Recursion: a function on the stack twice still only spent this sample once.
+            if func not in seen:
+                seen.add(func)
+                entry.calls += n
+                entry.cumulative += t
+            if i:
+                edge = entry.callers.setdefault(funcs[i - 1], _Timing())
+                edge.calls += n
+                edge.own += t if leaf else 0.0
+                edge.cumulative += t
+    # func -> (primitive calls, calls, own time, cumulative time, {caller: same four})
+    out = {
+        func: (*entry.row(), {k: v.row() for k, v in entry.callers.items()})
+        for func, entry in stats.items()
+    }
+    with open(path, "wb") as fh:
+        marshal.dump(out, fh)
+
+
+class SamplingProfiler:
+    """One profiling window at a time over the thread that calls :meth:`start`."""
+
+    def __init__(self, out_dir: str, logger: logging.Logger, interval: float = 0.005) -> None:
+        self._out_dir = out_dir
+        self._logger = logger
+        self._interval = interval
+        self._task: asyncio.Task[ProfileResult] | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self,
+        seconds: float,
+        on_done: Callable[[ProfileResult], Awaitable[None]] | None = None,
+    ) -> asyncio.Task[ProfileResult]:
+        """
+        Start sampling now, for ``seconds``; ``on_done`` gets the result once the files exist.
+        Call from the event loop thread, which is the one sampled.
+        """
+        if self.running:
+            raise ProfilerBusy()
+        samples: Counter[StackKey] = Counter()
+        self._stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), self._stop, samples),
+            name="profiler",
+            daemon=True,
+        )
+        json_log(self._logger, logging.INFO, "profile_started", seconds=seconds)
+        started = time.perf_counter()
+        sampler.start()
+        self._task = asyncio.create_task(self._window(seconds, started, sampler, samples, on_done))
+        return self._task
+
+    async def close(self) -> None:
+        """Abandon an open window without writing anything."""
+        # The task may be cancelled before it first runs, so stop the sampler here too.
+        self._stop.set()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def _sample(self, thread_id: int, stop: threading.Event, samples: Counter[StackKey]) -> None:
+        while not stop.wait(self._interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                samples[stack_key(frame)] += 1
+            del frame
+
+    async def _window(
+        self,
+        seconds: float,
+        started: float,
+        sampler: threading.Thread,
+        samples: Counter[StackKey],
+        on_done: Callable[[ProfileResult], Awaitable[None]] | None,
+    ) -> ProfileResult:
+        try:
+            await asyncio.sleep(max(0.0, started + seconds - time.perf_counter()))
+        finally:
+            self._stop.set()
+            sampler.join()
+        elapsed = time.perf_counter() - started
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        base = os.path.join(self._out_dir, f"profile-{stamp}-{os.getpid()}")
+        total = sum(samples.values())
+        await asyncio.to_thread(self._write, base, samples, elapsed / max(total, 1))
+
+        by_handler: Counter[str] = Counter()
+        by_endpoint: Counter[str] = Counter()
+        for (handler, endpoint, _), n in samples.items():
+            by_handler[handler] += n
+            if endpoint:
+                by_endpoint[endpoint] += n
+        result = ProfileResult(
+            seconds=round(elapsed, 3),
+            samples=total,
+            folded_path=f"{base}.folded",
+            pstats_path=f"{base}.pstats",
+            by_handler=by_handler.most_common(),
+            by_endpoint=by_endpoint.most_common(),
+        )
+        json_log(
+            self._logger,
+            logging.INFO,
+            "profile_written",
+            seconds=result.seconds,
+            samples=total,
+            folded=result.folded_path,
+            pstats=result.pstats_path,
+            top=dict(by_handler.most_common(5)),
+        )
+        if on_done is not None:
+            try:
+                await on_done(result)
+            except Exception as e:
+                json_log(
+                    self._logger, logging.WARNING, "profile_notify_failed", error=type(e).__name__
+                )
+        return result
+
+    def _write(self, base: str, samples: Counter[StackKey], sample_seconds: float) -> None:
+        os.makedirs(self._out_dir or ".", exist_ok=True)
+        write_folded(f"{base}.folded", samples)
+        write_pstats(f"{base}.pstats", samples, sample_seconds)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from telegram.ext import ContextTypes, Job, JobQueue
+
+from bot.accounts import DopraxClientPool
+from bot.i18n import I18N
+from bot.statuspoll import MessageSender, Notice, StatusFetcher
+from bot.storage import Storage, TrackedVM
+
+TERMINAL_STATUSES = frozenset(
+    {"RUNNING", "ACTIVE", "STOPPED", "OFF", "FAILED", "ERROR", "DELETED", "DESTROYED"}
+)
+
+
+def is_terminal(status: str) -> bool:
+    return status.strip().upper() in TERMINAL_STATUSES
+
+
+class ProvisioningTracker:
+    """
+    Follow newly created VMs until they reach a terminal state.
+
+    One JobQueue job ticks every ``tick_seconds``; each tick polls every tracked VM that is
+    due in a single concurrent batch, pushes one message per status change and backs off
+    exponentially per VM. Tracked VMs live in SQLite so tracking resumes after a restart.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        pool: DopraxClientPool,
+        logger: logging.Logger,
+        tick_seconds: float = 5.0,
+        base_delay: float = 5.0,
+        max_delay: float = 120.0,
+        max_age: float = 2 * 3600.0,
+        concurrency: int = 8,
+        clock: Callable[[], float] = time.time,
+        owns: Callable[[int], bool] | None = None,
+    ) -> None:
+        self._storage = storage
+        self._pool = pool
+        self.tick_seconds = tick_seconds
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._max_age = max_age
+        self._fetcher = StatusFetcher(pool, logger, "provisioning", concurrency)
+        self._clock = clock
+        # Worker mode: only resume VMs created by users routed to this process.
+        self._owns = owns
+        self._tracked: dict[tuple[str, str], TrackedVM] = {}
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self._tracked)
+
+    async def load(self) -> None:
+        """Resume tracking from storage."""
+        self._tracked = {
+            (v.account, v.vm_code): v
+            for v in await self._storage.list_tracked_vms()
+            if self._owns is None or self._owns(v.user_id)
+        }
+
+    def schedule(self, job_queue: JobQueue[Any]) -> Job[Any]:
+        return job_queue.run_repeating(
+            self._job, interval=self.tick_seconds, first=self.tick_seconds, name="provisioning"
+        )
+
+    async def _job(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        await self.poll_once(context.bot)
+
+    def _delay(self, attempts: int) -> float:
+        return min(self._max_delay, self._base_delay * (2.0 ** max(0, attempts - 1)))
+
+    async def track(
+        self,
+        user_id: int,
+        chat_id: int,
+        lang: str,
+        vm_code: str,
+        name: str,
+        status: str,
+    ) -> None:
+        account = await self._pool.account_for_user(user_id)
+        now = self._clock()
+        vm = TrackedVM(
+            account=account,
+            vm_code=vm_code,
+            user_id=user_id,
+            chat_id=chat_id,
+            lang=lang,
+            name=name,
+            last_status=status,
+            attempts=0,
+            next_check_at=now + self._base_delay,
+            created_at=int(now),
+        )
+        self._tracked[(account, vm_code)] = vm
+        await self._storage.track_vm(vm)
+
+    async def poll_once(self, bot: MessageSender) -> int:
+        """Run one batched polling cycle; returns the number of VMs polled."""
+        if self._running:
+            return 0
+        self._running = True
+        try:
+            now = self._clock()
+            due = [v for v in self._tracked.values() if v.next_check_at <= now]
+            if not due:
+                return 0
+            results = await self._fetcher.fetch_all((v.account, v.vm_code) for v in due)
+
+            notices: list[Notice] = []
+            updates: list[TrackedVM] = []
+            done: list[tuple[str, str]] = []
+            for vm, status in zip(due, results, strict=True):
+                key = (vm.account, vm.vm_code)
+                if status is None:
+                    done.append(key)
+                    continue
+                if status and status != vm.last_status:
+                    notices.append(self._notice(vm, status))
+                expired = now - vm.created_at >= self._max_age
+                if is_terminal(status) or expired:
+                    done.append(key)
+                    continue
+                attempts = vm.attempts + 1
+                updates.append(
+                    dataclasses.replace(
+                        vm,
+                        last_status=status or vm.last_status,
+                        attempts=attempts,
+                        next_check_at=now + self._delay(attempts),
+                    )
+                )
+
+            await self._fetcher.send_all(bot, notices)
+            for key in done:
+                self._tracked.pop(key, None)
+            for vm in updates:
+                self._tracked[(vm.account, vm.vm_code)] = vm
+            await self._storage.untrack_vms(done)
+            await self._storage.update_tracked_vms(updates)
+            return len(due)
+        finally:
+            self._running = False
+
+    def _notice(self, vm: TrackedVM, status: str) -> Notice:
+        text = I18N.t(
+            vm.lang,
+            "vm_status_changed",
+            name=vm.name or vm.vm_code,
+            code=vm.vm_code,
+            old=vm.last_status or "-",
+            status=status,
+        )
+        return Notice(vm.chat_id, vm.vm_code, text)
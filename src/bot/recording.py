@@ -0,0 +1,198 @@
+"""
+Recording of incoming Telegram updates for later replay.
+
+A recording is a newline-delimited JSON file, one update per line, written as it arrives:
+
+    {"ts":1760000000.123,"u":{"update_id":42,"message":{...}}}
+
+Nothing in the file identifies a person. Only the update fields the handlers read are kept
+(an allowlist; media, contacts, locations, polls and anything unknown are dropped). User and
+chat ids are replaced by salted hashes wherever they appear (consistent within one
+recording, so per-user ordering survives), user objects keep only their id, and free text
+keeps its shape but not its content: letters become ``x``, digits ``0``, punctuation and
+spacing stay, so lengths and entity offsets still line up. Commands and reply-keyboard
+labels are kept, since they decide which handler runs, and so is callback data. Typed wizard
+input (a location, a VM name) is masked like any other text, so on replay it takes the same
+validation path but may not resolve.
+
+Replay a recording with ``python -m bot.fakes.replay``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import IO, Any
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.handlers.text_router import MENU_ROUTES
+from bot.i18n import I18N
+
+# Allowlist of the update fields the handlers read, and how each is sanitized. Anything not
+# listed is dropped, so fields Telegram adds later never reach a recording.
+_KEEP = "keep"  # a scalar, kept as is
+_TEXT = "text"  # user-written text, masked
+_ID = "id"  # a bare user or chat id, hashed
+_DIGEST = "digest"  # an opaque token tied to a person, hashed
+_USER = "user"
+_CHAT = "chat"
+
+_ENTITY: dict[str, Any] = {"type": _KEEP, "offset": _KEEP, "length": _KEEP}
+_ORIGIN: dict[str, Any] = {
+    "type": _KEEP,
+    "date": _KEEP,
+    "sender_user": _USER,
+    "sender_chat": _CHAT,
+    "chat": _CHAT,
+    "message_id": _KEEP,
+}
+_MESSAGE: dict[str, Any] = {
+    "message_id": _KEEP,
+    "message_thread_id": _KEEP,
+    "date": _KEEP,
+    "edit_date": _KEEP,
+    "chat": _CHAT,
+    "from": _USER,
+    "sender_chat": _CHAT,
+    "via_bot": _USER,
+    "forward_origin": _ORIGIN,
+    "text": _TEXT,
+    "entities": [_ENTITY],
+    "caption": _TEXT,
+    "caption_entities": [_ENTITY],
+    "new_chat_members": [_USER],
+    "left_chat_member": _USER,
+    "users_shared": {"request_id": _KEEP, "users": [{"user_id": _ID}]},
+}
+_MESSAGE["reply_to_message"] = _MESSAGE
+_UPDATE: dict[str, Any] = {
+    "update_id": _KEEP,
+    "message": _MESSAGE,
+    "edited_message": _MESSAGE,
+    "callback_query": {
+        "id": _KEEP,
+        "from": _USER,
+        "message": _MESSAGE,
+        "inline_message_id": _KEEP,
+        "chat_instance": _DIGEST,
+        "data": _KEEP,
+    },
+    "inline_query": {
+        "id": _KEEP,
+        "from": _USER,
+        "query": _TEXT,
+        "offset": _KEEP,
+        "chat_type": _KEEP,
+    },
+}
+_LABELS = frozenset(I18N.t(lang, key) for lang in I18N.strings for key in MENU_ROUTES)
+
+
+def redact_text(text: str) -> str:
+    """Keep commands and known labels, mask everything else character by character."""
+    if text.strip() in _LABELS:
+        return text
+    head = ""
+    if text.startswith("/"):
+        command, sep, rest = text.partition(" ")
+        head, text = command + sep, rest
+    masked = "".join("0" if c.isdigit() else "x" if c.isalpha() else c for c in text)
+    return head + masked
+
+
+class UpdateSanitizer:
+    """Strips personal data from update payloads; ids hash with ``salt``."""
+
+    def __init__(self, salt: bytes | None = None) -> None:
+        self._salt = salt if salt is not None else os.urandom(16)
+
+    def _digest(self, value: str) -> int:
+        # 48 bits keeps hashed ids in Telegram's id range.
+        digest = hashlib.blake2b(value.encode(), digest_size=6, key=self._salt)
+        return int.from_bytes(digest.digest(), "big") or 1
+
+    def hash_id(self, value: int) -> int:
+        # The sign marks group chats and is kept.
+        hashed = self._digest(str(abs(value)))
+        return -hashed if value < 0 else hashed
+
+    def _user(self, user: dict[str, Any]) -> dict[str, Any]:
+        is_bot = bool(user.get("is_bot"))
+        out: dict[str, Any] = {
+            "id": self.hash_id(int(user["id"])),
+            "is_bot": is_bot,
+            "first_name": "bot" if is_bot else "user",
+        }
+        if "language_code" in user:
+            out["language_code"] = user["language_code"]
+        return out
+
+    def _chat(self, chat: dict[str, Any]) -> dict[str, Any]:
+        return {"id": self.hash_id(int(chat["id"])), "type": chat.get("type", "private")}
+
+    def sanitize(self, payload: dict[str, Any]) -> dict[str, Any]:
+        out: dict[str, Any] = self._apply(_UPDATE, payload)
+        return out
+
+    def _apply(self, rule: Any, value: Any) -> Any:
+        """Sanitize ``value`` by ``rule``; None means the value is dropped."""
+        if isinstance(rule, list):
+            if not isinstance(value, list):
+                return None
+            items = (self._apply(rule[0], v) for v in value)
+            return [v for v in items if v is not None]
+        if isinstance(rule, dict):
+            if not isinstance(value, dict):
+                return None
+            out = {}
+            for key, sub in rule.items():
+                if key in value:
+                    clean = self._apply(sub, value[key])
+                    if clean is not None:
+                        out[key] = clean
+            return out
+        if rule == _USER:
+            return self._user(value) if isinstance(value, dict) and "id" in value else None
+        if rule == _CHAT:
+            return self._chat(value) if isinstance(value, dict) and "id" in value else None
+        if rule == _TEXT:
+            return redact_text(value) if isinstance(value, str) else None
+        if rule == _ID:
+            return self.hash_id(value) if isinstance(value, int) else None
+        if rule == _DIGEST:
+            return str(self._digest(str(value)))
+        return value if isinstance(value, (str, int, float, bool)) else None
+
+
+class UpdateRecorder:
+    """
+    Appends sanitized updates to a recording. Register it as a ``TypeHandler`` in a group
+    that runs before deduplication, or call :meth:`record` with the raw update dict.
+    """
+
+    def __init__(self, path: str, salt: bytes | None = None) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._sanitizer = UpdateSanitizer(salt)
+        self._fh: IO[str] = open(path, "a", encoding="utf-8")  # noqa: SIM115
+
+    def record(self, payload: dict[str, Any]) -> None:
+        line = {"ts": round(time.time(), 3), "u": self._sanitizer.sanitize(payload)}
+        self._fh.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._fh.flush()
+
+    async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        self.record(update.to_dict())
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def load_recording(path: str) -> list[tuple[float, dict[str, Any]]]:
+    """Read a recording as ``(timestamp, update payload)`` pairs in file order."""
+    with open(path, encoding="utf-8") as fh:
+        rows = [json.loads(line) for line in fh if line.strip()]
+    return [(float(r["ts"]), r["u"]) for r in rows]
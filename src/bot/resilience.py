@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+
+
+class TokenBucket:
+    """
+    Token bucket with reservation semantics.
+
+    ``acquire`` takes the tokens immediately (the balance may go negative) and sleeps for the
+    deficit, so concurrent callers are served in arrival order without a polling loop.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(
+        self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, n: float = 1.0) -> bool:
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self._tokens >= n:
+            self._tokens -= n
+            return True
+        return False
+
+    def reserve(self, n: float = 1.0) -> float:
+        """Take ``n`` tokens now and return how long the caller must wait before using them."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        self._tokens -= n
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self, n: float = 1.0) -> None:
+        """Give back tokens from a reservation that will not be used."""
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + n)
+
+    async def acquire(self, n: float = 1.0) -> float:
+        """Wait until ``n`` tokens are available; returns the seconds waited."""
+        delay = self.reserve(n)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``threshold`` failures in a row the breaker opens and rejects calls for
+    ``cooldown`` seconds; then a single trial call is let through (half-open). Its outcome
+    closes the breaker again or re-opens it for another cooldown.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def release(self) -> None:
+        """Give back a half-open trial that ended without an outcome (cancelled, say)."""
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial = False
+        if self._opened_at is not None or self._failures >= self.threshold:
+            self._opened_at = self._clock()
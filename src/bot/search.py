@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import bisect
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from bot.accounts import DopraxClientPool
+from bot.cache import TTLCache
+from bot.utils import safe_get
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class VMDoc:
+    code: str
+    name: str
+    status: str
+    location: str
+
+    @classmethod
+    def from_vm(cls, vm: dict[str, Any]) -> VMDoc:
+        code = safe_get(
+            vm,
+            "vmCode",
+            default=safe_get(vm, "vm_code", default=safe_get(vm, "code", default="")),
+        )
+        return cls(
+            code=str(code).strip(),
+            name=str(safe_get(vm, "name", default="")).strip(),
+            status=str(safe_get(vm, "status", default="")).strip(),
+            location=str(
+                safe_get(vm, "locationName", default=safe_get(vm, "location", default=""))
+            ).strip(),
+        )
+
+    def tokens(self) -> set[str]:
+        out = {self.code.lower()} if self.code else set()
+        for field in (self.code, self.name, self.status, self.location):
+            out.update(tokenize(field))
+        return out
+
+
+class VMIndex:
+    """
+    In-memory inverted index over VM name, code, status and location.
+
+    Every query token is matched as a prefix against the sorted vocabulary (binary search),
+    and the posting sets of all tokens are intersected. ``update`` diffs a new inventory
+    against the indexed one and only re-indexes VMs that were added, changed or removed.
+    """
+
+    def __init__(self) -> None:
+        self._docs: dict[str, VMDoc] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._vocab: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update(self, vms: Iterable[dict[str, Any]]) -> tuple[int, int, int]:
+        """Sync the index with ``vms``; returns (added, changed, removed)."""
+        fresh = {d.code: d for d in map(VMDoc.from_vm, vms) if d.code}
+        added = changed = 0
+        for code, doc in fresh.items():
+            old = self._docs.get(code)
+            if old == doc:
+                continue
+            if old is None:
+                added += 1
+            else:
+                changed += 1
+                self._remove(old)
+            self._add(doc)
+        gone = [code for code in self._docs if code not in fresh]
+        for code in gone:
+            self._remove(self._docs[code])
+        return added, changed, len(gone)
+
+    def _add(self, doc: VMDoc) -> None:
+        self._docs[doc.code] = doc
+        for token in doc.tokens():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                bisect.insort(self._vocab, token)
+            posting.add(doc.code)
+
+    def _remove(self, doc: VMDoc) -> None:
+        self._docs.pop(doc.code, None)
+        for token in doc.tokens():
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(doc.code)
+            if not posting:
+                del self._postings[token]
+                i = bisect.bisect_left(self._vocab, token)
+                if i < len(self._vocab) and self._vocab[i] == token:
+                    del self._vocab[i]
+
+    def _prefix_matches(self, prefix: str) -> set[str]:
+        out: set[str] = set()
+        i = bisect.bisect_left(self._vocab, prefix)
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            out |= self._postings[self._vocab[i]]
+            i += 1
+        return out
+
+    def search(self, query: str, limit: int = 20) -> list[VMDoc]:
+        terms = tokenize(query)
+        if not terms:
+            hits: set[str] = set(self._docs)
+        else:
+            hits = self._prefix_matches(terms[0])
+            for term in terms[1:]:
+                if not hits:
+                    break
+                hits &= self._prefix_matches(term)
+
+        exact = set(terms)
+
+        def rank(code: str) -> tuple[int, str]:
+            doc = self._docs[code]
+            # Whole-token matches first, then alphabetical by name.
+            return (-len(exact & doc.tokens()), doc.name.lower() or code)
+
+        return [self._docs[c] for c in sorted(hits, key=rank)[:limit]]
+
+
+class InventorySearch:
+    """
+    Per-account ``VMIndex`` fed from the client's cached inventory snapshot.
+
+    Keystrokes never trigger a live ``list_vms``: the index is synced only when the snapshot
+    object changes, and answers are cached per (user, query) for ``result_ttl`` seconds.
+    Without a fresh snapshot the last index is searched; before the first one it is empty.
+    """
+
+    def __init__(self, pool: DopraxClientPool, result_ttl: float = 5.0) -> None:
+        self._pool = pool
+        self.result_ttl = result_ttl
+        self._indexes: dict[str, tuple[VMIndex, object]] = {}
+        self._results: TTLCache[tuple[int, str], list[VMDoc]] = TTLCache(result_ttl, maxsize=4096)
+
+    async def search(self, user_id: int, query: str, limit: int = 20) -> list[VMDoc]:
+        key = (user_id, " ".join(tokenize(query)))
+        return await self._results.get_or_load(key, lambda: self._search(user_id, query, limit))
+
+    async def _search(self, user_id: int, query: str, limit: int) -> list[VMDoc]:
+        account = await self._pool.account_for_user(user_id)
+        doprax = await self._pool.get(account)
+        vms = doprax.cached_vms()
+        index, indexed = self._indexes.get(account, (VMIndex(), None))
+        if vms is not None and vms is not indexed:
+            index.update(vms)
+            self._indexes[account] = (index, vms)
+        return index.search(query, limit)
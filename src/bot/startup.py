@@ -0,0 +1,116 @@
+"""
+Startup-time helpers.
+
+``lazy`` references a handler as ``"module:name"`` and imports the module the first time the
+handler runs, so wiring the application does not load every handler module up front.
+``StartupProfile`` times the import and init phases of a start; ``--startup-profile`` prints
+its report.
+"""
+
+from __future__ import annotations
+
+import importlib
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from functools import cache
+from types import ModuleType
+from typing import Any, TypeVar
+
+from bot.metrics import METRICS
+from bot.tracing import note_handler
+
+T = TypeVar("T")
+
+
+class LazyHandler:
+    """Async callable standing in for ``module:name`` until it is first awaited."""
+
+    def __init__(self, target: str) -> None:
+        module, sep, name = target.partition(":")
+        if not sep or not module or not name:
+            raise ValueError(f"expected 'module:name', got {target!r}")
+        self.target = target
+        self.name = name
+        self._module = module
+        self._fn: Callable[..., Awaitable[Any]] | None = None
+
+    def resolve(self) -> Callable[..., Awaitable[Any]]:
+        if self._fn is None:
+            self._fn = getattr(importlib.import_module(self._module), self.name)
+        return self._fn
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        note_handler(self.name)
+        return await self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"LazyHandler({self.target!r})"
+
+
+@cache
+def lazy(target: str) -> LazyHandler:
+    """Shared lazy reference to the handler ``target`` (``"package.module:function"``)."""
+    return LazyHandler(target)
+
+
+class StartupProfile:
+    """
+    Wall-clock durations of named startup phases, listed in the order they began.
+
+    Phases may nest or overlap (steps gathered concurrently); by convention their names are
+    indented under the enclosing phase, so child durations can add up to more than it.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self._clock = clock
+        self.started = clock()
+        self.phases: list[tuple[str, float]] = []
+        self.ready_at: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from construction until ready (or until now, before that)."""
+        end = self.ready_at if self.ready_at is not None else self._clock()
+        return end - self.started
+
+    def mark_ready(self) -> float:
+        self.ready_at = self._clock()
+        METRICS.histogram("startup_seconds").observe(self.elapsed)
+        return self.elapsed
+
+    def _begin(self, name: str) -> tuple[int, float]:
+        self.phases.append((name, 0.0))
+        return len(self.phases) - 1, self._clock()
+
+    def _end(self, index: int, started: float) -> None:
+        name, _ = self.phases[index]
+        seconds = self._clock() - started
+        self.phases[index] = (name, seconds)
+        METRICS.histogram("startup_phase_seconds", phase=name.strip()).observe(seconds)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        index, started = self._begin(name)
+        try:
+            yield
+        finally:
+            self._end(index, started)
+
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        index, started = self._begin(name)
+        try:
+            return await awaitable
+        finally:
+            self._end(index, started)
+
+    def import_module(self, name: str) -> ModuleType:
+        with self.phase(f"import {name}"):
+            return importlib.import_module(name)
+
+    def report(self) -> str:
+        width = max([len(name) for name, _ in self.phases] + [len("total (to ready)")])
+        lines = [f"{'phase':<{width}}  {'ms':>9}"]
+        lines += [f"{name:<{width}}  {seconds * 1000:9.1f}" for name, seconds in self.phases]
+        lines.append(f"{'total (to ready)':<{width}}  {self.elapsed * 1000:9.1f}")
+        return "\n".join(lines)
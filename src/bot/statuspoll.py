@@ -0,0 +1,94 @@
+"""
+Pieces shared by the background VM status pollers (provisioning tracker and ``/watch``):
+concurrency-limited status reads and the fan-out of change notifications.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Protocol
+
+from telegram.constants import ParseMode
+
+from bot.accounts import DopraxClientPool
+from bot.errors import DopraxError, DopraxNotFound
+from bot.utils import json_log, safe_get
+
+
+class MessageSender(Protocol):
+    """What the pollers need from a bot; ``ExtBot`` and the test fakes both fit."""
+
+    async def send_message(
+        self, chat_id: int, text: str, parse_mode: str | None = None
+    ) -> object: ...
+
+
+@dataclass(frozen=True)
+class Notice:
+    chat_id: int
+    vm_code: str
+    text: str
+
+
+class StatusFetcher:
+    """
+    Reads VM statuses with at most ``concurrency`` Doprax calls in flight. Transient errors
+    are logged as ``<event>_poll_failed`` and failed sends as ``<event>_notify_failed``.
+    """
+
+    def __init__(
+        self,
+        pool: DopraxClientPool,
+        logger: logging.Logger,
+        event: str,
+        concurrency: int = 8,
+    ) -> None:
+        self._pool = pool
+        self._logger = logger
+        self._event = event
+        self._sem = asyncio.Semaphore(concurrency)
+
+    async def fetch(self, account: str, vm_code: str) -> str | None:
+        """Current status, "" on a transient error, None if the VM no longer exists."""
+        async with self._sem:
+            try:
+                doprax = await self._pool.get(account)
+                st = await doprax.get_vm_status(vm_code)
+            except DopraxNotFound:
+                return None
+            except DopraxError as e:
+                json_log(
+                    self._logger,
+                    logging.WARNING,
+                    f"{self._event}_poll_failed",
+                    vm_code=vm_code,
+                    error=type(e).__name__,
+                )
+                return ""
+        return str(safe_get(st, "status", default="")).strip()
+
+    async def fetch_all(self, keys: Iterable[tuple[str, str]]) -> list[str | None]:
+        """Statuses of ``(account, vm_code)`` pairs, in order."""
+        return list(await asyncio.gather(*(self.fetch(a, c) for a, c in keys)))
+
+    async def send_all(self, bot: MessageSender, notices: Iterable[Notice]) -> None:
+        """Send every notice concurrently; a failed send is logged and does not stop others."""
+        await asyncio.gather(*(self._send(bot, n) for n in notices))
+
+    async def _send(self, bot: MessageSender, notice: Notice) -> None:
+        try:
+            await bot.send_message(
+                chat_id=notice.chat_id, text=notice.text, parse_mode=ParseMode.MARKDOWN
+            )
+        except Exception as e:
+            json_log(
+                self._logger,
+                logging.WARNING,
+                f"{self._event}_notify_failed",
+                vm_code=notice.vm_code,
+                chat_id=notice.chat_id,
+                error=type(e).__name__,
+            )
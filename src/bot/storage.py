@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import sqlite3
 import time
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any
 
 import aiosqlite
 
 from bot.states import State
+from bot.tracing import note_storage_round_trip
 
 
 @dataclass(frozen=True)
@@ -34,18 +36,56 @@ class CreateDraft:
     updated_at: int
 
 
+@dataclass(frozen=True)
+class TrackedVM:
+    account: str
+    vm_code: str
+    user_id: int
+    chat_id: int
+    lang: str
+    name: str
+    last_status: str
+    attempts: int
+    next_check_at: float
+    created_at: int
+
+
+@dataclass(frozen=True)
+class WatchSubscription:
+    account: str
+    vm_code: str
+    user_id: int
+    chat_id: int
+    lang: str
+    created_at: int
+
+
+class _TracedConnection(aiosqlite.Connection):
+    """
+    Counts every hop to the SQLite thread (execute, each fetch, commit) against the update
+    being traced; aiosqlite funnels connection and cursor calls alike through ``_execute``.
+    """
+
+    async def _execute(self, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        note_storage_round_trip()
+        return await super()._execute(fn, *args, **kwargs)
+
+
 class Storage:
     """SQLite persistence layer (async)."""
 
     def __init__(self, db_path: str) -> None:
         self._db_path = db_path
-        self._conn: Optional[aiosqlite.Connection] = None
+        self._conn: aiosqlite.Connection | None = None
 
     async def open(self) -> None:
-        self._conn = await aiosqlite.connect(self._db_path)
+        db_path = self._db_path
+        self._conn = await _TracedConnection(lambda: sqlite3.connect(db_path), iter_chunk_size=64)
         self._conn.row_factory = aiosqlite.Row
         await self._conn.execute("PRAGMA journal_mode=WAL;")
         await self._conn.execute("PRAGMA foreign_keys=ON;")
+        # Worker mode opens one connection per process; wait for the writer lock.
+        await self._conn.execute("PRAGMA busy_timeout=5000;")
         await self._init_schema()
 
     async def close(self) -> None:
@@ -53,6 +93,10 @@ class Storage:
             await self._conn.close()
             self._conn = None
 
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
     @property
     def conn(self) -> aiosqlite.Connection:
         if self._conn is None:
@@ -89,6 +133,53 @@ class Storage:
               user_id INTEGER PRIMARY KEY,
               last_ts INTEGER NOT NULL DEFAULT 0
             );
+
+            CREATE TABLE IF NOT EXISTS account_bindings (
+              user_id INTEGER PRIMARY KEY,
+              account TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS tracked_vms (
+              account TEXT NOT NULL,
+              vm_code TEXT NOT NULL,
+              user_id INTEGER NOT NULL,
+              chat_id INTEGER NOT NULL,
+              lang TEXT NOT NULL DEFAULT 'en',
+              name TEXT NOT NULL DEFAULT '',
+              last_status TEXT NOT NULL DEFAULT '',
+              attempts INTEGER NOT NULL DEFAULT 0,
+              next_check_at REAL NOT NULL DEFAULT 0,
+              created_at INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (account, vm_code)
+            );
+
+            CREATE TABLE IF NOT EXISTS watch_subscriptions (
+              account TEXT NOT NULL,
+              vm_code TEXT NOT NULL,
+              user_id INTEGER NOT NULL,
+              chat_id INTEGER NOT NULL,
+              lang TEXT NOT NULL DEFAULT 'en',
+              created_at INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (account, vm_code, user_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_watch_subscriptions_vm
+              ON watch_subscriptions(vm_code);
+            CREATE INDEX IF NOT EXISTS idx_watch_subscriptions_user
+              ON watch_subscriptions(user_id);
+
+            CREATE TABLE IF NOT EXISTS watched_vms (
+              account TEXT NOT NULL,
+              vm_code TEXT NOT NULL,
+              last_status TEXT NOT NULL DEFAULT '',
+              volatility REAL NOT NULL DEFAULT 0,
+              PRIMARY KEY (account, vm_code)
+            );
+
+            CREATE TABLE IF NOT EXISTS update_windows (
+              name TEXT PRIMARY KEY,
+              high INTEGER NOT NULL,
+              bits BLOB NOT NULL
+            );
             """
         )
         await self.conn.commit()
@@ -241,3 +332,169 @@ class Storage:
         )
         await self.conn.commit()
         return True
+
+    async def get_account(self, user_id: int) -> str | None:
+        """Return the Doprax account bound to this user, if any."""
+        row = await (
+            await self.conn.execute(
+                "SELECT account FROM account_bindings WHERE user_id=?;", (user_id,)
+            )
+        ).fetchone()
+        return str(row["account"]) if row is not None else None
+
+    async def set_account(self, user_id: int, account: str) -> None:
+        await self.conn.execute(
+            "INSERT INTO account_bindings(user_id, account) VALUES(?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET account=excluded.account;",
+            (user_id, account),
+        )
+        await self.conn.commit()
+
+    async def track_vm(self, vm: TrackedVM) -> None:
+        await self.conn.execute(
+            "INSERT OR REPLACE INTO tracked_vms(account, vm_code, user_id, chat_id, lang, name, "
+            "last_status, attempts, next_check_at, created_at) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            (
+                vm.account,
+                vm.vm_code,
+                vm.user_id,
+                vm.chat_id,
+                vm.lang,
+                vm.name,
+                vm.last_status,
+                vm.attempts,
+                vm.next_check_at,
+                vm.created_at,
+            ),
+        )
+        await self.conn.commit()
+
+    async def list_tracked_vms(self) -> list[TrackedVM]:
+        rows = await (await self.conn.execute("SELECT * FROM tracked_vms;")).fetchall()
+        return [
+            TrackedVM(
+                account=row["account"],
+                vm_code=row["vm_code"],
+                user_id=int(row["user_id"]),
+                chat_id=int(row["chat_id"]),
+                lang=row["lang"],
+                name=row["name"],
+                last_status=row["last_status"],
+                attempts=int(row["attempts"]),
+                next_check_at=float(row["next_check_at"]),
+                created_at=int(row["created_at"]),
+            )
+            for row in rows
+        ]
+
+    async def update_tracked_vms(self, vms: list[TrackedVM]) -> None:
+        """Persist status/backoff of many tracked VMs in one transaction."""
+        if not vms:
+            return
+        await self.conn.executemany(
+            "UPDATE tracked_vms SET last_status=?, attempts=?, next_check_at=? "
+            "WHERE account=? AND vm_code=?;",
+            [(v.last_status, v.attempts, v.next_check_at, v.account, v.vm_code) for v in vms],
+        )
+        await self.conn.commit()
+
+    async def untrack_vms(self, keys: list[tuple[str, str]]) -> None:
+        """Stop tracking (account, vm_code) pairs."""
+        if not keys:
+            return
+        await self.conn.executemany(
+            "DELETE FROM tracked_vms WHERE account=? AND vm_code=?;", keys
+        )
+        await self.conn.commit()
+
+    async def add_watch(self, sub: WatchSubscription) -> bool:
+        """Subscribe a user to a VM; returns False if already subscribed."""
+        cur = await self.conn.execute(
+            "INSERT OR IGNORE INTO watch_subscriptions(account, vm_code, user_id, chat_id, lang, "
+            "created_at) VALUES(?, ?, ?, ?, ?, ?);",
+            (sub.account, sub.vm_code, sub.user_id, sub.chat_id, sub.lang, sub.created_at),
+        )
+        await self.conn.commit()
+        return cur.rowcount > 0
+
+    async def remove_watch(self, account: str, vm_code: str, user_id: int) -> bool:
+        cur = await self.conn.execute(
+            "DELETE FROM watch_subscriptions WHERE account=? AND vm_code=? AND user_id=?;",
+            (account, vm_code, user_id),
+        )
+        await self.conn.commit()
+        return cur.rowcount > 0
+
+    async def count_watchers(self, account: str, vm_code: str) -> int:
+        cur = await self.conn.execute(
+            "SELECT COUNT(*) FROM watch_subscriptions WHERE account=? AND vm_code=?;",
+            (account, vm_code),
+        )
+        row = await cur.fetchone()
+        return int(row[0]) if row else 0
+
+    async def list_watches(self, user_id: int | None = None) -> list[WatchSubscription]:
+        if user_id is None:
+            cur = await self.conn.execute("SELECT * FROM watch_subscriptions;")
+        else:
+            cur = await self.conn.execute(
+                "SELECT * FROM watch_subscriptions WHERE user_id=? ORDER BY created_at;",
+                (user_id,),
+            )
+        return [
+            WatchSubscription(
+                account=row["account"],
+                vm_code=row["vm_code"],
+                user_id=int(row["user_id"]),
+                chat_id=int(row["chat_id"]),
+                lang=row["lang"],
+                created_at=int(row["created_at"]),
+            )
+            for row in await cur.fetchall()
+        ]
+
+    async def list_watched_vms(self) -> dict[tuple[str, str], tuple[str, float]]:
+        """(account, vm_code) -> (last_status, volatility) for watched VMs."""
+        rows = await (await self.conn.execute("SELECT * FROM watched_vms;")).fetchall()
+        return {
+            (row["account"], row["vm_code"]): (row["last_status"], float(row["volatility"]))
+            for row in rows
+        }
+
+    async def save_watched_vms(self, rows: list[tuple[str, str, str, float]]) -> None:
+        """Upsert (account, vm_code, last_status, volatility) rows in one transaction."""
+        if not rows:
+            return
+        await self.conn.executemany(
+            "INSERT INTO watched_vms(account, vm_code, last_status, volatility) "
+            "VALUES(?, ?, ?, ?) ON CONFLICT(account, vm_code) DO UPDATE SET "
+            "last_status=excluded.last_status, volatility=excluded.volatility;",
+            rows,
+        )
+        await self.conn.commit()
+
+    async def drop_watched_vm(self, account: str, vm_code: str) -> None:
+        """Forget a VM and every subscription to it."""
+        await self.conn.execute(
+            "DELETE FROM watch_subscriptions WHERE account=? AND vm_code=?;", (account, vm_code)
+        )
+        await self.conn.execute(
+            "DELETE FROM watched_vms WHERE account=? AND vm_code=?;", (account, vm_code)
+        )
+        await self.conn.commit()
+
+    async def load_update_window(self, name: str) -> tuple[int, bytes] | None:
+        """(highest update_id, bitmap) saved under ``name``, if any."""
+        cur = await self.conn.execute(
+            "SELECT high, bits FROM update_windows WHERE name=?;", (name,)
+        )
+        row = await cur.fetchone()
+        return (int(row["high"]), bytes(row["bits"])) if row else None
+
+    async def save_update_window(self, name: str, high: int, bits: bytes) -> None:
+        await self.conn.execute(
+            "INSERT INTO update_windows(name, high, bits) VALUES(?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET high=excluded.high, bits=excluded.bits;",
+            (name, high, bits),
+        )
+        await self.conn.commit()
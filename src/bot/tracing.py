@@ -0,0 +1,37 @@
+"""
+Per-update traces.
+
+Whoever dispatches an update may set ``TRACE`` to a fresh :class:`UpdateTrace` first (the
+replay harness does); handler wrappers and storage then note what the update did. The var
+is copied into the task processing the update, and with no trace set every hook is a single
+``ContextVar.get``.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+@dataclass
+class UpdateTrace:
+    # Name of the handler the update was routed to ("" when none ran).
+    handler: str = ""
+    # Storage execute/commit calls, i.e. hops to the SQLite thread.
+    storage_round_trips: int = 0
+
+
+TRACE: ContextVar[UpdateTrace | None] = ContextVar("update_trace", default=None)
+
+
+def note_handler(name: str) -> None:
+    # The first handler reached owns the update; handlers it delegates to do not rename it.
+    trace = TRACE.get()
+    if trace is not None and not trace.handler:
+        trace.handler = name
+
+
+def note_storage_round_trip() -> None:
+    trace = TRACE.get()
+    if trace is not None:
+        trace.storage_round_trips += 1
@@ -8,7 +8,11 @@ import secrets
 import time
 from dataclasses import dataclass
 
-SECRET_KEYS = ("TELEGRAM_BOT_TOKEN", "DOPRAX_API_KEY")
+SECRET_KEYS = ("TELEGRAM_BOT_TOKEN", "DOPRAX_API_KEY", "WEBHOOK_SECRET")
+
+
+def setup_logging(level: str) -> None:
+    logging.basicConfig(level=level, format="%(message)s")
 
 
 def new_correlation_id() -> str:
@@ -16,13 +20,19 @@ def new_correlation_id() -> str:
     return secrets.token_hex(6)
 
 
+def _secret_values() -> list[str]:
+    values = [(os.getenv(k) or "").strip() for k in SECRET_KEYS]
+    # DOPRAX_ACCOUNTS holds name=api_key pairs; only the keys are secret.
+    for item in (os.getenv("DOPRAX_ACCOUNTS") or "").split(","):
+        values.append(item.partition("=")[2].strip())
+    return [v for v in values if v]
+
+
 def redact_secrets(value: str) -> str:
     """Redact known secrets that may appear in logs."""
     redacted = value
-    for k in SECRET_KEYS:
-        s = (os.getenv(k) or "").strip()
-        if s:
-            redacted = redacted.replace(s, "***REDACTED***")
+    for s in _secret_values():
+        redacted = redacted.replace(s, "***REDACTED***")
     return redacted
 
 
@@ -100,6 +110,14 @@ def compact_lines(lines: Iterable[str], limit: int = 20) -> str:
     return "\n".join(out)
 
 
+_VM_PATH_RE = re.compile(r"^/api/v1/vms/[^/]+/")
+
+
+def endpoint_template(path: str) -> str:
+    """Collapse per-VM Doprax paths into a template (e.g. /api/v1/vms/{vm_code}/status/)."""
+    return _VM_PATH_RE.sub("/api/v1/vms/{vm_code}/", path)
+
+
 def safe_get(mapping: Mapping[str, Any], *path: str, default: Any = None) -> Any:
     """Safely get nested keys."""
     cur: Any = mapping
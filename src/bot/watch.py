@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from telegram.ext import ContextTypes, Job, JobQueue
+
+from bot.accounts import DopraxClientPool
+from bot.i18n import I18N
+from bot.provisioning import is_terminal
+from bot.statuspoll import MessageSender, Notice, StatusFetcher
+from bot.storage import Storage, WatchSubscription
+
+
+@dataclasses.dataclass
+class WatchedVM:
+    account: str
+    vm_code: str
+    subscribers: dict[int, WatchSubscription]
+    last_status: str = ""
+    # EWMA of "status changed on this poll" (0 = never changes, 1 = changes every poll).
+    volatility: float = 0.0
+    next_check_at: float = 0.0
+
+
+class WatchPoller:
+    """
+    Central poller behind ``/watch``.
+
+    Subscriptions are keyed by (account, vm_code); each watched VM is fetched at most once per
+    cycle however many users watch it, and a change is fanned out to every subscriber. The
+    per-VM interval shrinks towards ``min_interval`` while the status keeps changing (or is
+    transitional) and relaxes towards ``max_interval`` while it is stable.
+
+    In worker mode each VM is polled by the one worker ``owns_vm`` picks. Subscribers reach
+    any worker, so that worker re-reads the subscriptions of its VMs from storage every tick.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        pool: DopraxClientPool,
+        logger: logging.Logger,
+        tick_seconds: float = 5.0,
+        min_interval: float = 15.0,
+        max_interval: float = 300.0,
+        alpha: float = 0.5,
+        concurrency: int = 8,
+        clock: Callable[[], float] = time.time,
+        owns_vm: Callable[[str, str], bool] | None = None,
+    ) -> None:
+        self._storage = storage
+        self._pool = pool
+        self.tick_seconds = tick_seconds
+        self._min = min_interval
+        self._max = max(min_interval, max_interval)
+        self._alpha = alpha
+        self._fetcher = StatusFetcher(pool, logger, "watch", concurrency)
+        self._clock = clock
+        # Worker mode: only track the VMs this process polls.
+        self._owns_vm = owns_vm
+        self._watched: dict[tuple[str, str], WatchedVM] = {}
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self._watched)
+
+    def watched(self, account: str, vm_code: str) -> WatchedVM | None:
+        return self._watched.get((account, vm_code))
+
+    def _polls(self, account: str, vm_code: str) -> bool:
+        return self._owns_vm is None or self._owns_vm(account, vm_code)
+
+    async def load(self) -> None:
+        """Sync the in-memory watch set with storage; known VMs keep their schedule."""
+        known = set(self._watched)
+        state = await self._storage.list_watched_vms()
+        watched: dict[tuple[str, str], WatchedVM] = {}
+        for sub in await self._storage.list_watches():
+            if not self._polls(sub.account, sub.vm_code):
+                continue
+            key = (sub.account, sub.vm_code)
+            vm = watched.get(key)
+            if vm is None:
+                vm = self._watched.get(key)
+                if vm is None:
+                    last, vol = state.get(key, ("", 0.0))
+                    vm = WatchedVM(sub.account, sub.vm_code, {}, last_status=last, volatility=vol)
+                vm.subscribers = {}
+                watched[key] = vm
+            vm.subscribers[sub.user_id] = sub
+        # Keep VMs subscribed here while storage was being read.
+        for key, vm in self._watched.items():
+            if key not in known:
+                watched.setdefault(key, vm)
+        self._watched = watched
+
+    def schedule(self, job_queue: JobQueue[Any]) -> Job[Any]:
+        return job_queue.run_repeating(
+            self._job, interval=self.tick_seconds, first=self.tick_seconds, name="watch"
+        )
+
+    async def _job(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        await self.poll_once(context.bot)
+
+    def interval(self, vm: WatchedVM) -> float:
+        if vm.last_status and not is_terminal(vm.last_status):
+            return self._min
+        return self._max - (self._max - self._min) * vm.volatility
+
+    async def subscribe(
+        self, user_id: int, chat_id: int, lang: str, vm_code: str, status: str
+    ) -> bool:
+        """Watch ``vm_code`` for ``user_id``; returns False if already watching."""
+        account = await self._pool.account_for_user(user_id)
+        sub = WatchSubscription(account, vm_code, user_id, chat_id, lang, int(self._clock()))
+        added = await self._storage.add_watch(sub)
+        if not self._polls(account, vm_code):
+            # Another worker polls it and picks the subscription up on its next tick.
+            return added
+        key = (account, vm_code)
+        vm = self._watched.get(key)
+        if vm is None:
+            vm = WatchedVM(account, vm_code, {}, last_status=status)
+            vm.next_check_at = self._clock() + self.interval(vm)
+            self._watched[key] = vm
+            await self._storage.save_watched_vms([(account, vm_code, status, 0.0)])
+        vm.subscribers[user_id] = sub
+        return added
+
+    async def unsubscribe(self, user_id: int, vm_code: str) -> bool:
+        """
+        Stop watching ``vm_code`` for ``user_id`` under whichever account it was watched;
+        the user may have switched accounts since subscribing.
+        """
+        removed = False
+        for sub in await self._storage.list_watches(user_id):
+            if sub.vm_code != vm_code:
+                continue
+            account = sub.account
+            removed = await self._storage.remove_watch(account, vm_code, user_id) or removed
+            vm = self._watched.get((account, vm_code))
+            if vm is not None:
+                vm.subscribers.pop(user_id, None)
+                if not vm.subscribers:
+                    del self._watched[(account, vm_code)]
+            # Storage, not this process, knows about subscribers routed to other workers.
+            if not await self._storage.count_watchers(account, vm_code):
+                await self._storage.drop_watched_vm(account, vm_code)
+        return removed
+
+    async def poll_once(self, bot: MessageSender) -> int:
+        """Poll every due VM once and fan out changes; returns the number of VMs fetched."""
+        if self._running:
+            return 0
+        self._running = True
+        try:
+            if self._owns_vm is not None:
+                await self.load()
+            now = self._clock()
+            due = [v for v in self._watched.values() if v.next_check_at <= now and v.subscribers]
+            if not due:
+                return 0
+            results = await self._fetcher.fetch_all((v.account, v.vm_code) for v in due)
+
+            notices: list[Notice] = []
+            saved: list[tuple[str, str, str, float]] = []
+            for vm, status in zip(due, results, strict=True):
+                if status is None:
+                    notices.extend(
+                        self._notice(sub, "watch_gone", vm.last_status, "")
+                        for sub in vm.subscribers.values()
+                    )
+                    self._watched.pop((vm.account, vm.vm_code), None)
+                    await self._storage.drop_watched_vm(vm.account, vm.vm_code)
+                    continue
+                if status:
+                    changed = bool(vm.last_status) and status != vm.last_status
+                    if changed:
+                        notices.extend(
+                            self._notice(sub, "vm_status_changed", vm.last_status, status)
+                            for sub in vm.subscribers.values()
+                        )
+                    vm.volatility += self._alpha * (float(changed) - vm.volatility)
+                    vm.last_status = status
+                    saved.append((vm.account, vm.vm_code, vm.last_status, vm.volatility))
+                vm.next_check_at = now + self.interval(vm)
+
+            await self._fetcher.send_all(bot, notices)
+            await self._storage.save_watched_vms(saved)
+            return len(due)
+        finally:
+            self._running = False
+
+    def _notice(self, sub: WatchSubscription, key: str, old: str, status: str) -> Notice:
+        text = I18N.t(
+            sub.lang, key, name=sub.vm_code, code=sub.vm_code, old=old or "-", status=status
+        )
+        return Notice(sub.chat_id, sub.vm_code, text)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hmac
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from bot.httpserver import HttpRequest, HttpResponse, HttpServer, json_response
+from bot.metrics import METRICS
+from bot.utils import json_log
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+UpdateDispatcher = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class WebhookServer:
+    """
+    Receive Telegram updates over a webhook.
+
+    Each POST is authenticated with Telegram's secret-token header, parsed, put on a bounded
+    in-process queue and acknowledged immediately; ``workers`` tasks drain the queue into
+    ``dispatch``. A full queue answers 503 so Telegram retries later instead of the process
+    buffering without bound. ``GET /healthz`` reports queue depth.
+    """
+
+    def __init__(
+        self,
+        dispatch: UpdateDispatcher,
+        secret_token: str,
+        logger: logging.Logger,
+        path: str = "/telegram",
+        host: str = "0.0.0.0",
+        port: int = 8443,
+        queue_size: int = 1000,
+        workers: int = 8,
+    ) -> None:
+        self._dispatch = dispatch
+        self._secret = secret_token.encode("utf-8")
+        self._logger = logger
+        self.path = path
+        self._queue: asyncio.Queue[tuple[dict[str, Any], float]] = asyncio.Queue(queue_size)
+        self._workers_n = max(1, workers)
+        self._workers: list[asyncio.Task[None]] = []
+        self._http = HttpServer(self.handle, host=host, port=port)
+        self._depth = METRICS.gauge("webhook_queue_depth")
+
+    @property
+    def url(self) -> str:
+        return self._http.url + self.path
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self._workers_n)]
+        await self._http.start()
+        json_log(self._logger, logging.INFO, "webhook_listening", url=self.url)
+
+    async def close(self, drain_timeout: float = 10.0) -> None:
+        """Stop accepting updates, then give queued ones up to ``drain_timeout`` to finish."""
+        await self._http.close()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def handle(self, req: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        if req.path == "/healthz" and req.method == "GET":
+            return json_response(200, {"ok": True, "queue_depth": self._queue.qsize()})
+        if req.path != self.path:
+            return HttpResponse(404)
+        if req.method != "POST":
+            return HttpResponse(405)
+
+        token = req.headers.get(SECRET_HEADER, "").encode("utf-8")
+        if not hmac.compare_digest(token, self._secret):
+            return self._reject(401, "unauthorized", started)
+        try:
+            payload = req.json()
+        except (ValueError, UnicodeDecodeError):
+            return self._reject(400, "invalid", started)
+        if not isinstance(payload, dict) or "update_id" not in payload:
+            return self._reject(400, "invalid", started)
+
+        try:
+            self._queue.put_nowait((payload, time.perf_counter()))
+        except asyncio.QueueFull:
+            return self._reject(503, "queue_full", started)
+        self._depth.set(self._queue.qsize())
+        return self._ack(200, "accepted", started)
+
+    def _reject(self, status: int, outcome: str, started: float) -> HttpResponse:
+        if outcome == "queue_full":
+            json_log(
+                self._logger, logging.WARNING, "webhook_backpressure", depth=self._queue.qsize()
+            )
+        return self._ack(status, outcome, started)
+
+    @staticmethod
+    def _ack(status: int, outcome: str, started: float) -> HttpResponse:
+        METRICS.counter("webhook_updates_total", outcome=outcome).inc()
+        METRICS.histogram("webhook_ack_seconds").observe(time.perf_counter() - started)
+        return HttpResponse(status)
+
+    async def _worker(self) -> None:
+        while True:
+            payload, enqueued = await self._queue.get()
+            self._depth.set(self._queue.qsize())
+            METRICS.histogram("webhook_queue_wait_seconds").observe(time.perf_counter() - enqueued)
+            try:
+                await self._dispatch(payload)
+            except Exception as e:
+                json_log(
+                    self._logger,
+                    logging.ERROR,
+                    "webhook_dispatch_failed",
+                    update_id=payload.get("update_id"),
+                    error=type(e).__name__,
+                )
+            finally:
+                self._queue.task_done()
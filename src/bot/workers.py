@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import logging
+import secrets
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Protocol
+
+import httpx
+
+from bot.metrics import METRICS
+from bot.utils import json_log
+from bot.webhook import SECRET_HEADER
+
+# Path a worker's local update endpoint listens on.
+WORKER_PATH = "/update"
+
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash of keys (user ids, VM keys) onto ``nodes`` workers."""
+
+    def __init__(self, nodes: int, replicas: int = 64) -> None:
+        if nodes < 1:
+            raise ValueError("nodes must be >= 1")
+        ring = sorted(
+            (_point(f"{node}:{r}"), node) for node in range(nodes) for r in range(replicas)
+        )
+        self._points = [p for p, _ in ring]
+        self._nodes = [n for _, n in ring]
+
+    def node_for(self, key: int | str) -> int:
+        i = bisect.bisect(self._points, _point(str(key)))
+        return self._nodes[i % len(self._nodes)]
+
+
+@lru_cache(maxsize=8)
+def _ring(nodes: int) -> HashRing:
+    return HashRing(nodes)
+
+
+@dataclass(frozen=True)
+class WorkerSlot:
+    """Position of a worker process among ``count`` workers."""
+
+    index: int
+    count: int
+
+    def owns(self, user_id: int) -> bool:
+        return _ring(self.count).node_for(user_id) == self.index
+
+    def owns_vm(self, account: str, vm_code: str) -> bool:
+        """Whether this worker polls ``vm_code`` for ``/watch``, whoever subscribed to it."""
+        return _ring(self.count).node_for(f"{account}/{vm_code}") == self.index
+
+
+def routing_key(payload: dict[str, Any]) -> int:
+    """User id of a raw update (chat id if it has no user), without building PTB objects."""
+    for value in payload.values():
+        if not isinstance(value, dict):
+            continue
+        for field_name in ("from", "user", "chat"):
+            who = value.get(field_name)
+            uid = who.get("id") if isinstance(who, dict) else None
+            if isinstance(uid, int):
+                return uid
+    return int(payload.get("update_id", 0))
+
+
+class WorkerProcess(Protocol):
+    @property
+    def exitcode(self) -> int | None: ...
+
+    def is_alive(self) -> bool: ...
+
+    def terminate(self) -> None: ...
+
+    def kill(self) -> None: ...
+
+    def join(self, timeout: float | None = None) -> None: ...
+
+
+# (slot, port, secret) -> started process serving WORKER_PATH and /healthz on 127.0.0.1:port
+Spawner = Callable[[WorkerSlot, int, str], WorkerProcess]
+
+
+@dataclass
+class _Worker:
+    slot: WorkerSlot
+    port: int
+    process: WorkerProcess
+    queue: asyncio.Queue[dict[str, Any]]
+    started_at: float
+    failures: int = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+
+class Supervisor:
+    """
+    Receive updates once and route them to ``workers`` processes by consistent hash of the
+    user id, so each user's FSM state is only ever touched by one process.
+
+    Every worker has a bounded outbound queue drained by one forwarder, which keeps a user's
+    updates in order and gives the receiving side backpressure. Workers are health-checked
+    every ``health_interval`` seconds (``GET /healthz``) and restarted when their process has
+    exited or after ``max_failures`` failed checks past ``startup_grace``. Forwarding retries
+    for up to ``forward_timeout`` seconds, which covers a restart.
+    """
+
+    def __init__(
+        self,
+        spawn: Spawner,
+        workers: int,
+        logger: logging.Logger,
+        base_port: int = 8600,
+        health_interval: float = 5.0,
+        queue_size: int = 1000,
+        max_failures: int = 3,
+        startup_grace: float = 30.0,
+        forward_timeout: float = 30.0,
+        client: httpx.AsyncClient | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._spawn = spawn
+        self._count = max(1, workers)
+        self._logger = logger
+        self._base_port = base_port
+        self._health_interval = health_interval
+        self._queue_size = queue_size
+        self._max_failures = max_failures
+        self._startup_grace = startup_grace
+        self._forward_timeout = forward_timeout
+        self._owned_client = client is None
+        self._http = client or httpx.AsyncClient(timeout=10.0)
+        self._clock = clock
+        self.secret = secrets.token_urlsafe(32)
+        self._ring = _ring(self._count)
+        self._workers: list[_Worker] = []
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def worker_for(self, payload: dict[str, Any]) -> int:
+        return self._ring.node_for(routing_key(payload))
+
+    async def start(self) -> None:
+        for index in range(self._count):
+            slot = WorkerSlot(index, self._count)
+            port = self._base_port + index
+            self._workers.append(
+                _Worker(
+                    slot,
+                    port,
+                    self._spawn(slot, port, self.secret),
+                    asyncio.Queue(self._queue_size),
+                    self._clock(),
+                )
+            )
+        self._tasks = [asyncio.create_task(self._forward_loop(w)) for w in self._workers]
+        self._tasks.append(asyncio.create_task(self._monitor()))
+        json_log(self._logger, logging.INFO, "supervisor_started", workers=self._count)
+
+    async def forward(self, payload: dict[str, Any]) -> None:
+        """Queue ``payload`` for its worker; waits while that worker's queue is full."""
+        worker = self._workers[self.worker_for(payload)]
+        await worker.queue.put(payload)
+        METRICS.gauge("worker_pending", worker=worker.slot.index).set(worker.queue.qsize())
+
+    async def _forward_loop(self, worker: _Worker) -> None:
+        label = worker.slot.index
+        while True:
+            payload = await worker.queue.get()
+            METRICS.gauge("worker_pending", worker=label).set(worker.queue.qsize())
+            try:
+                await self._post(worker, payload)
+            finally:
+                worker.queue.task_done()
+
+    async def _post(self, worker: _Worker, payload: dict[str, Any]) -> None:
+        label = worker.slot.index
+        started = self._clock()
+        attempt = 0
+        reason = ""
+        while self._clock() - started <= self._forward_timeout:
+            try:
+                resp = await self._http.post(
+                    worker.base_url + WORKER_PATH,
+                    json=payload,
+                    headers={SECRET_HEADER: self.secret},
+                )
+                if resp.status_code == 200:
+                    METRICS.counter("worker_updates_total", worker=label).inc()
+                    METRICS.histogram("worker_forward_seconds", worker=label).observe(
+                        self._clock() - started
+                    )
+                    return
+                reason = str(resp.status_code)
+            except httpx.HTTPError as e:
+                reason = type(e).__name__
+            attempt += 1
+            await asyncio.sleep(min(2.0, 0.05 * 2**attempt))
+        METRICS.counter("worker_forward_failed_total", worker=label).inc()
+        json_log(
+            self._logger,
+            logging.ERROR,
+            "worker_forward_failed",
+            worker=label,
+            update_id=payload.get("update_id"),
+            reason=reason,
+        )
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self._health_interval)
+            await self.check_health()
+
+    async def check_health(self) -> None:
+        """One health pass over all workers; restarts dead or unresponsive ones."""
+        for worker in self._workers:
+            label = worker.slot.index
+            if not worker.process.is_alive():
+                self._restart(worker, reason=f"exited:{worker.process.exitcode}")
+                continue
+            try:
+                resp = await self._http.get(worker.base_url + "/healthz", timeout=2.0)
+                healthy = resp.status_code == 200
+                if healthy:
+                    depth = int(resp.json().get("queue_depth", 0))
+                    METRICS.gauge("worker_queue_depth", worker=label).set(depth)
+            except (httpx.HTTPError, ValueError):
+                healthy = False
+            METRICS.gauge("worker_up", worker=label).set(1 if healthy else 0)
+            if healthy:
+                worker.failures = 0
+                continue
+            if self._clock() - worker.started_at < self._startup_grace:
+                continue
+            worker.failures += 1
+            if worker.failures >= self._max_failures:
+                await asyncio.to_thread(self._stop_process, worker.process)
+                self._restart(worker, reason="unhealthy")
+
+    def _restart(self, worker: _Worker, reason: str) -> None:
+        label = worker.slot.index
+        worker.process.join(0)  # reap the old process
+        METRICS.counter("worker_restarts_total", worker=label).inc()
+        json_log(self._logger, logging.WARNING, "worker_restart", worker=label, reason=reason)
+        worker.process = self._spawn(worker.slot, worker.port, self.secret)
+        worker.started_at = self._clock()
+        worker.failures = 0
+
+    @staticmethod
+    def _stop_process(process: WorkerProcess, timeout: float = 10.0) -> None:
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join(1.0)
+
+    async def close(self, drain_timeout: float = 10.0) -> None:
+        """Forward what is already queued (up to ``drain_timeout``), then stop the workers."""
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                asyncio.gather(*(w.queue.join() for w in self._workers)), timeout=drain_timeout
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Joining blocks, so stop the processes off the event loop. Workers drain their own
+        # in-flight updates on SIGTERM, so give them the same budget plus time to close.
+        await asyncio.gather(
+            *(
+                asyncio.to_thread(self._stop_process, w.process, drain_timeout + 5.0)
+                for w in self._workers
+            )
+        )
+        if self._owned_client:
+            await self._http.aclose()
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import BadRequest
+
+
+class FakeBot:
+    """Records what handlers and pollers send through ``context.bot``."""
+
+    def __init__(self) -> None:
+        self.sent: list[dict] = []
+        self.calls: list[tuple[str, str]] = []
+        self.not_modified = False
+        self.last_message_id = 100
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append({"chat_id": chat_id, "text": text, **kwargs})
+        self.calls.append(("send", text))
+        self.last_message_id += 1
+        return SimpleNamespace(message_id=self.last_message_id)
+
+    async def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        if self.not_modified:
+            raise BadRequest("Message is not modified: specified new message content ...")
+        self.calls.append(("edit", text))
+
+
+@pytest.fixture
+def bot() -> FakeBot:
+    return FakeBot()
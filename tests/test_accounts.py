@@ -0,0 +1,46 @@
+import pytest
+
+from bot.accounts import DopraxClientPool
+from bot.config import parse_accounts
+from bot.doprax_client import DopraxConfig
+from bot.storage import Storage
+
+
+def test_parse_accounts():
+    assert parse_accounts(" ops=K1, lab=K2 ,") == {"ops": "K1", "lab": "K2"}
+    with pytest.raises(ValueError):
+        parse_accounts("ops")
+
+
+@pytest.mark.asyncio
+async def test_pool_binds_users_and_evicts_idle(tmp_path):
+    now = [0.0]
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.open()
+    pool = DopraxClientPool(
+        DopraxConfig(base_url="https://x", api_key="", dry_run=True),
+        {"default": "K0", "ops": "K1"},
+        storage,
+        idle_seconds=100,
+        clock=lambda: now[0],
+    )
+    try:
+        assert pool.open_accounts == []
+        await storage.set_account(42, "ops")
+        ops = await pool.for_user(42)
+        default = await pool.for_user(7)
+        assert ops is not default
+        assert await pool.for_user(42) is ops
+        assert pool.open_accounts == ["default", "ops"]
+        # Unknown bindings fall back to the default account.
+        await storage.set_account(8, "gone")
+        assert await pool.for_user(8) is default
+
+        now[0] = 50.0
+        await pool.get("ops")
+        now[0] = 120.0
+        assert await pool.evict_idle() == ["default"]
+        assert pool.open_accounts == ["ops"]
+    finally:
+        await pool.close()
+        await storage.close()
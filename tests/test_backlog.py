@@ -0,0 +1,116 @@
+import asyncio
+import logging
+
+import pytest
+from telegram import Update
+
+from bot.backlog import UpdateDedupe, UpdateWindow, collapse, replay_backlog
+from bot.fakes.updates import callback_update, message_update
+from bot.ordering import UserOrderedProcessor
+from bot.storage import Storage
+
+
+def test_window_remembers_recent_ids_and_slides():
+    w = UpdateWindow(size=16)
+    for i in (100, 101, 103):
+        assert not w.seen(i)
+        w.add(i)
+    assert w.seen(101) and not w.seen(102) and w.seen(103)
+    w.add(102)
+    assert w.seen(102)
+    # Jumping ahead frees the slots ids 104..119 reuse, and everything older counts as seen.
+    w.add(120)
+    assert not w.seen(110) and w.seen(104) and w.seen(120)
+
+    restored = UpdateWindow(size=16)
+    restored.restore(*w.dump())
+    assert restored.seen(120) and not restored.seen(119) and not restored.seen(121)
+    resized = UpdateWindow(size=32)
+    resized.restore(*w.dump())
+    assert resized.seen(119)
+
+
+def test_window_rebases_when_ids_fall_far_below_it(caplog):
+    dedupe = UpdateDedupe(Storage(":memory:"), logging.getLogger("test"), size=16)
+    assert dedupe.check(900_000_000) and not dedupe.check(900_000_000)
+    with caplog.at_level(logging.WARNING):
+        assert dedupe.check(123_456)
+    assert "update_sequence_reset" in caplog.text
+    assert dedupe.window.high == 123_456 and not dedupe.window.seen(123_457)
+    assert not dedupe.check(123_456) and dedupe.check(123_457)
+
+
+def test_collapse_drops_back_to_back_repeats_per_user():
+    tap = "1:VMLIST:r:0"
+    payloads = [
+        callback_update(1, 7, tap),
+        message_update(2, 8, "/list_vms"),
+        callback_update(3, 7, tap),
+        callback_update(4, 7, tap, message_id=2),
+        message_update(5, 8, "/list_vms"),
+        message_update(6, 8, "web"),
+        message_update(7, 8, "/list_vms"),
+    ]
+    assert [p["update_id"] for p in collapse(payloads)] == [3, 4, 5, 6, 7]
+
+
+class BacklogBot:
+    def __init__(self, payloads):
+        self.pending = [Update.de_json(p, None) for p in payloads]
+        self.calls = []
+
+    async def get_updates(self, offset=0, limit=100, timeout=0, allowed_updates=None):
+        self.calls.append(offset)
+        self.pending = [u for u in self.pending if u.update_id >= offset]
+        return self.pending[:limit]
+
+
+@pytest.mark.asyncio
+async def test_replay_drains_in_batches_and_skips_redeliveries(tmp_path):
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.open()
+    log = logging.getLogger("test")
+    dedupe = UpdateDedupe(storage, log, size=64)
+    assert dedupe.check(3)  # processed just before the restart
+    payloads = [message_update(i, 500 + i % 3, f"/help {i}") for i in range(1, 8)]
+    payloads.append(callback_update(8, 900, "1:MENU:list_vms"))
+    payloads.append(callback_update(9, 900, "1:MENU:list_vms"))
+    bot = BacklogBot(payloads)
+    seen = []
+
+    async def dispatch(payload):
+        if dedupe.check(payload["update_id"]):
+            seen.append(payload["update_id"])
+
+    try:
+        assert await replay_backlog(bot, dispatch, log, batch_size=5, dedupe=dedupe) == 8
+        # Users replay concurrently, so only each user's own order is fixed.
+        assert sorted(seen) == [1, 2, 4, 5, 6, 7, 9]
+        assert bot.calls == [0, 6, 10]
+
+        # The window survives a restart.
+        reloaded = UpdateDedupe(storage, log, size=64)
+        await reloaded.load()
+        assert not reloaded.check(9) and reloaded.check(10)
+    finally:
+        await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_replay_feeds_one_users_backlog_without_overflowing_their_queue():
+    proc = UserOrderedProcessor(max_pending=2)
+    payloads = [message_update(i, 500, f"/help {i}") for i in range(1, 8)]
+    payloads.append(message_update(8, 600, "/help"))
+    ran = []
+
+    async def work(update_id):
+        await asyncio.sleep(0.001)
+        ran.append(update_id)
+
+    async def dispatch(payload):
+        update = Update.de_json(payload, None)
+        await proc.process_update(update, work(update.update_id))
+
+    assert await replay_backlog(BacklogBot(payloads), dispatch, logging.getLogger("test")) == 8
+    # Seven updates from one user against a lane of 1 + 2: none is dropped as queue_full.
+    assert [i for i in ran if i != 8] == [1, 2, 3, 4, 5, 6, 7] and 8 in ran
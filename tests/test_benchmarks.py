@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _bench(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks", "--rounds", "2", "--min-time", "0.001", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_benchmarks_report_and_flag_regressions(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    run = _bench(
+        "-k", "i18n.", "-k", "keyboards.main_reply", "--save-baseline", "--baseline", str(baseline)
+    )
+    assert run.returncode == 0, run.stderr
+    rows = [json.loads(line) for line in run.stdout.splitlines()]
+    names = [r["name"] for r in rows]
+    assert names == sorted(names) and "i18n.t" in names and len(names) == 4
+    assert all(r["median_ns"] > 0 and r["rounds"] == 2 for r in rows)
+
+    # Pretend every benchmark used to be 1000x faster.
+    doc = json.loads(baseline.read_text())
+    for r in doc["results"].values():
+        r["median_ns"] = max(1, r["median_ns"] // 1000)
+    doc["results"].pop("i18n.t")
+    baseline.write_text(json.dumps(doc))
+
+    run = _bench(
+        "-k", "i18n.", "-k", "keyboards.main_reply", "--compare", "--baseline", str(baseline)
+    )
+    assert run.returncode == 1
+    status = {r["name"]: r["status"] for r in map(json.loads, run.stdout.splitlines())}
+    assert status["i18n.t"] == "new" and status["i18n.t_format"] == "regressed"
+    assert "REGRESSION i18n.t_format" in run.stderr
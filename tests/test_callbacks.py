@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bot.callbacks import MAX_BYTES, CallbackRouter, choice, pack, uint, unpack
+
+
+def test_pack_roundtrip_and_limits():
+    assert pack("CREATE", "prov", "Hetzner") == "1:CREATE:prov:Hetzner"
+    assert unpack(pack("VMLIST", "r", 3)) == ["VMLIST", "r", "3"]
+    with pytest.raises(ValueError):
+        pack("VMREF", "x" * MAX_BYTES)
+    with pytest.raises(ValueError):
+        pack("VMREF", "a:b")
+    # Unversioned payloads from before the codec, and other versions, are stale.
+    assert unpack("VMREF:vm_1") is None
+    assert unpack("2:VMREF:vm_1") is None
+    assert unpack("") is None
+    # The limit is in bytes, as in pack().
+    assert unpack("1:VMREF:" + "ی" * 30) is None
+
+
+class FakeQuery:
+    def __init__(self, data: str) -> None:
+        self.data = data
+        self.answers: list[str | None] = []
+
+    async def answer(self, text=None):
+        self.answers.append(text)
+
+
+def _update(data: str, language_code: str = "en"):
+    user = SimpleNamespace(id=1, language_code=language_code)
+    return SimpleNamespace(callback_query=FakeQuery(data), effective_user=user)
+
+
+@pytest.mark.asyncio
+async def test_router_dispatches_typed_params_and_rejects_cheaply():
+    calls: list[tuple] = []
+
+    def handler(name):
+        async def _h(update, context, *args):
+            calls.append((name, *args))
+
+        return _h
+
+    router = CallbackRouter()
+    router.add("VMLIST", handler("page"), uint)
+    router.add("VMLIST:r", handler("refresh"), uint)
+    router.add("CREATE:back", handler("back"))
+    router.add("CREATE:confirm", handler("confirm"), choice("create", "edit"))
+    with pytest.raises(ValueError):
+        router.add("CREATE:back", handler("dup"))
+
+    for data in ("1:VMLIST:4", "1:VMLIST:r:0", "1:CREATE:back", "1:CREATE:confirm:edit"):
+        await router(_update(data), None)
+    assert calls == [("page", 4), ("refresh", 0), ("back",), ("confirm", "edit")]
+
+    rejected = [
+        "VMLIST:4",  # pre-codec payload
+        "1:VMLIST:-1",  # not a uint
+        "1:VMLIST:r",  # missing parameter
+        "1:CREATE:back:extra",  # too many
+        "1:CREATE:confirm:delete",  # not an allowed choice
+        "1:NOPE:1",  # unknown route
+    ]
+    for data in rejected:
+        update = _update(data, language_code="fa")
+        await router(update, None)
+        assert len(update.callback_query.answers) == 1
+    assert len(calls) == 4
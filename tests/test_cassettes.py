@@ -0,0 +1,62 @@
+import httpx
+import pytest
+
+from bot.cassettes import REDACTED, Cassette, RecordingTransport
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.fakes.doprax import FakeDoprax, FleetConfig
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOPRAX_API_KEY", "live-secret-key")
+    cassette = tmp_path / "doprax.cassette"
+    path = str(cassette)
+    fake = FakeDoprax(fleet=FleetConfig(vms=7))
+
+    recorder = RecordingTransport(path, inner=fake.transport())
+    async with httpx.AsyncClient(
+        transport=recorder,
+        base_url="https://fake.local",
+        headers={"X-API-Key": "live-secret-key"},
+    ) as http:
+        dop = DopraxClient(
+            DopraxConfig(base_url="https://fake.local", api_key="live-secret-key", dry_run=False),
+            client=http,
+        )
+        live_vms = await dop.list_vms()
+        live_status = await dop.get_vm_status("vm_000003")
+        await http.post("/api/v1/vms/", json={"name": "x", "password": "hunter2"})
+
+    raw = cassette.read_text(encoding="utf-8")
+    assert "live-secret-key" not in raw
+    assert "hunter2" not in raw and REDACTED in raw
+
+    replay = DopraxClient(
+        DopraxConfig(
+            base_url="https://fake.local",
+            api_key="",
+            dry_run=False,
+            replay_path=path,
+            replay_speed=0,
+        )
+    )
+    await replay.open()
+    try:
+        assert await replay.list_vms() == live_vms
+        # Unknown VM codes fall back to the recorded endpoint template.
+        other = await replay.get_vm_status("vm_999999")
+    finally:
+        await replay.close()
+    assert other == live_status
+
+
+def test_cassette_round_robin(tmp_path):
+    path = tmp_path / "c.cassette"
+    path.write_text(
+        '{"method": "GET", "path": "/api/v1/os/", "status": 200, "elapsed_ms": 1, "body": 1}\n'
+        '{"method": "GET", "path": "/api/v1/os/", "status": 200, "elapsed_ms": 1, "body": 2}\n',
+        encoding="utf-8",
+    )
+    c = Cassette.load(str(path))
+    assert [c.match("GET", "/api/v1/os/").body for _ in range(3)] == [1, 2, 1]
+    assert c.match("POST", "/api/v1/os/") is None
@@ -0,0 +1,48 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from telegram import CallbackQuery, Chat, Message, Update, User
+
+from bot.handlers.common import MessageHashes, edit_or_send
+from bot.keyboards import status_refresh_inline
+
+
+def _callback_update(message_id: int) -> Update:
+    chat = Chat(id=1, type="private")
+    msg = Message(message_id=message_id, date=datetime.now(UTC), chat=chat)
+    user = User(id=7, first_name="u", is_bot=False)
+    query = CallbackQuery(id="q", from_user=user, chat_instance="c", data="VMREF:x", message=msg)
+    return Update(update_id=1, callback_query=query)
+
+
+@pytest.mark.asyncio
+async def test_edit_skipped_when_content_hash_unchanged(bot):
+    context = SimpleNamespace(bot=bot, bot_data={})
+    kb = status_refresh_inline("en", "vm_1")
+
+    assert await edit_or_send(_callback_update(5), context, "RUNNING @ t0", kb, fingerprint="R")
+    sent_id = bot.last_message_id
+    update = _callback_update(sent_id)
+
+    # Same fingerprint, different timestamp: no Telegram call at all.
+    assert not await edit_or_send(update, context, "RUNNING @ t1", kb, edit=True, fingerprint="R")
+    assert bot.calls == [("send", "RUNNING @ t0")]
+
+    assert await edit_or_send(update, context, "STOPPED @ t2", kb, edit=True, fingerprint="S")
+    assert bot.calls[-1] == ("edit", "STOPPED @ t2")
+
+    # Unknown message (e.g. after a restart) whose content Telegram already has.
+    bot.not_modified = True
+    assert not await edit_or_send(_callback_update(9), context, "x", kb, edit=True)
+    assert context.bot_data["message_hashes"].get(1, 9) == MessageHashes.digest("x", kb)
+
+
+def test_message_hashes_are_bounded():
+    hashes = MessageHashes(maxsize=2)
+    hashes.put(1, 1, "a")
+    hashes.put(1, 2, "b")
+    assert hashes.get(1, 1) == "a"  # refreshes recency
+    hashes.put(1, 3, "c")
+    assert hashes.get(1, 2) is None
+    assert len(hashes) == 2
@@ -0,0 +1,68 @@
+import httpx
+import pytest
+
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.errors import DopraxNotFound, DopraxServerError
+from bot.fakes.doprax import ChaosConfig, FakeDoprax, FleetConfig, LatencyModel
+from bot.httpserver import HttpServer
+
+
+def _client(fake: FakeDoprax) -> tuple[httpx.AsyncClient, DopraxClient]:
+    http = httpx.AsyncClient(transport=fake.transport(), base_url="https://fake.local")
+    dop = DopraxClient(
+        DopraxConfig(base_url="https://fake.local", api_key="k", dry_run=False), client=http
+    )
+    return http, dop
+
+
+@pytest.mark.asyncio
+async def test_fake_fleet_through_real_client_path():
+    fake = FakeDoprax(fleet=FleetConfig(vms=120, locations=4))
+    http, dop = _client(fake)
+    async with http:
+        vms = await dop.list_vms()
+        locs = await dop.get_locations()
+        os_list = await dop.get_os_list()
+        st = await dop.get_vm_status("vm_000007")
+        with pytest.raises(DopraxNotFound):
+            await dop.get_vm_status("nope")
+
+    assert len(vms) == 120
+    assert len(locs) == 4 and all(loc["machines"] for loc in locs)
+    assert {"ubuntu_22_04", "debian_12"} <= {x["slug"] for x in os_list}
+    assert st["vm_code"] == "vm_000007"
+
+
+@pytest.mark.asyncio
+async def test_fake_injects_server_errors():
+    fake = FakeDoprax(chaos=ChaosConfig(rate_5xx=1.0))
+    http, dop = _client(fake)
+    async with http:
+        with pytest.raises(DopraxServerError):
+            await dop.list_vms()
+
+
+def test_latency_model_specs():
+    import random
+
+    rng = random.Random(1)
+    assert LatencyModel("fixed:250", rng).sample() == 0.25
+    assert 0.01 <= LatencyModel("uniform:10:20", rng).sample() <= 0.02
+    with pytest.raises(ValueError):
+        LatencyModel("gauss:1", rng)
+
+
+@pytest.mark.asyncio
+async def test_fake_http_server_roundtrip():
+    fake = FakeDoprax(fleet=FleetConfig(vms=3), api_key="secret")
+    server = HttpServer(fake.handle)
+    await server.start()
+    try:
+        async with httpx.AsyncClient(base_url=server.url) as http:
+            denied = await http.get("/api/v1/vms/")
+            ok = await http.get("/api/v1/vms/", headers={"X-API-Key": "secret"})
+    finally:
+        await server.close()
+    assert denied.status_code == 401
+    assert ok.json()["success"] is True
+    assert len(ok.json()["data"]) == 3
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from bot.doprax_client import DopraxClient, DopraxConfig, HedgeBudget
+from bot.metrics import METRICS
+
+OS_EP = "/api/v1/os/"
+
+
+def test_hedge_budget_caps_ratio():
+    b = HedgeBudget(0.25)
+    granted = 0
+    for _ in range(100):
+        b.on_request()
+        granted += b.try_acquire()
+    assert granted == 25
+
+
+def _warm(dop: DopraxClient, endpoint: str, seconds: float, n: int = 30) -> None:
+    h = dop._get_wait(endpoint)
+    for _ in range(n):
+        h.observe(seconds)
+
+
+@pytest.mark.asyncio
+async def test_slow_get_is_hedged_and_loser_cancelled():
+    METRICS.reset()
+    calls = 0
+    cancelled = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return httpx.Response(200, json=[{"slug": "ubuntu_22_04"}])
+
+    cfg = DopraxConfig(
+        base_url="https://x", api_key="", dry_run=False, hedge=True, hedge_budget_pct=100
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="https://x"
+    ) as http:
+        dop = DopraxClient(cfg, http)
+        _warm(dop, OS_EP, 0.01)
+        started = time.perf_counter()
+        os_list = await dop.get_os_list()
+        elapsed = time.perf_counter() - started
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+
+    assert os_list == [{"slug": "ubuntu_22_04"}]
+    assert elapsed < 1
+    assert calls == 2
+    assert METRICS.counter("doprax_hedges_total", endpoint=OS_EP).value == 1
+    assert METRICS.counter("doprax_hedge_wins_total", endpoint=OS_EP).value == 1
+    # Both the winner and the cancelled loser count towards the next hedge delay.
+    assert dop._get_wait(OS_EP).samples == 32
+
+
+@pytest.mark.asyncio
+async def test_hedge_delay_is_per_client_and_ignores_posts():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"success": True, "vm": {"vm_code": "v"}})
+
+    cfg = DopraxConfig(base_url="https://x", api_key="", dry_run=False, hedge_min_samples=1)
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="https://x"
+    ) as http:
+        slow, fast = DopraxClient(cfg, http), DopraxClient(cfg, http)
+        _warm(slow, "/api/v1/vms/", 2.0)
+        await fast.create_vm({"name": "a"})
+        assert fast._hedge_delay("/api/v1/vms/") is None
+        assert slow._hedge_delay("/api/v1/vms/") == 2.0
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_budget_or_for_posts():
+    METRICS.reset()
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"success": True, "vm": {"vm_code": "v"}})
+
+    cfg = DopraxConfig(
+        base_url="https://x", api_key="", dry_run=False, hedge=True, hedge_budget_pct=0
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="https://x"
+    ) as http:
+        dop = DopraxClient(cfg, http)
+        _warm(dop, OS_EP, 0.001)
+        _warm(dop, "/api/v1/vms/", 0.001)
+        await dop.get_os_list()
+        await dop.create_vm({"name": "a"})
+
+    assert calls == 2
+    assert METRICS.counter("doprax_hedges_total", endpoint=OS_EP).value == 0
@@ -0,0 +1,32 @@
+from bot.keyboards import (
+    create_location_inline,
+    create_os_inline,
+    main_reply_keyboard,
+    settings_inline,
+    status_refresh_inline,
+    vm_list_page_inline,
+)
+
+
+def test_static_keyboards_built_once_per_language():
+    assert main_reply_keyboard("en") is main_reply_keyboard("en")
+    assert main_reply_keyboard("fa") is not main_reply_keyboard("en")
+    assert settings_inline("fa") is settings_inline("fa")
+
+
+def test_dynamic_keyboards_memoized_by_value():
+    assert status_refresh_inline("en", "vm_1") is status_refresh_inline("en", "vm_1")
+    assert status_refresh_inline("en", "vm_1") is not status_refresh_inline("en", "vm_2")
+    # Typed codes that cannot be packed get no Refresh button instead of an error.
+    assert status_refresh_inline("en", "a:b") is None
+    assert status_refresh_inline("en", "x" * 80) is None
+    # Unhashable inputs (lists) are keyed by value.
+    assert create_location_inline("en", [("Frankfurt", "fra")]) is create_location_inline(
+        "en", [("Frankfurt", "fra")]
+    )
+    assert create_os_inline("en", ["a", "b"], ["b", "a"]) is create_os_inline(
+        "en", ["a", "b"], {"a", "b"}
+    )
+    page = vm_list_page_inline("en", [("web", "vm_1")], 0, 1)
+    assert page is vm_list_page_inline("en", [("web", "vm_1")], 0, 1)
+    assert page is not vm_list_page_inline("en", [("web", "vm_1")], 0, 2)
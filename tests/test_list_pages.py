@@ -0,0 +1,55 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from telegram import Chat, Message, Update, User
+
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.fakes.doprax import FakeDoprax, FleetConfig
+from bot.handlers.list_vms import PAGE_SIZE, _render_page
+from bot.keyboards import vm_list_cursor
+
+
+def test_cursor_format():
+    assert vm_list_cursor(3) == "1:VMLIST:3"
+    assert vm_list_cursor(0, refresh=True) == "1:VMLIST:r:0"
+    assert len(vm_list_cursor(99999, refresh=True).encode()) <= 64
+
+
+@pytest.mark.asyncio
+async def test_pages_come_from_one_snapshot(bot):
+    fake = FakeDoprax(fleet=FleetConfig(vms=20))
+    async with httpx.AsyncClient(transport=fake.transport(), base_url="https://x") as http:
+        doprax = DopraxClient(
+            DopraxConfig(base_url="https://x", api_key="k", dry_run=False, inventory_ttl=60),
+            client=http,
+        )
+        context = SimpleNamespace(bot=bot, bot_data={})
+        msg = Message(
+            message_id=1,
+            date=datetime.now(UTC),
+            chat=Chat(id=1, type="private"),
+            from_user=User(id=1, first_name="u", is_bot=False),
+            text="/list_vms",
+        )
+        update = Update(update_id=1, message=msg)
+
+        before = fake.requests
+        for page in (0, 1, 2, 5):
+            vms, _ = await doprax.list_vms_snapshot()
+            await _render_page(update, context, "en", vms, 0.0, page)
+        assert fake.requests - before == 1
+
+        first, *_, last = bot.sent
+        rows = first["reply_markup"].inline_keyboard
+        assert len(rows) == PAGE_SIZE + 1
+        assert [b.callback_data for b in rows[-1]] == ["1:VMLIST:r:0", "1:VMLIST:1"]
+        assert "8 of 20" in first["text"]
+        # Out-of-range pages clamp to the last page.
+        rows = last["reply_markup"].inline_keyboard
+        assert len(rows) == 20 - 2 * PAGE_SIZE + 1
+        assert [b.callback_data for b in rows[-1]] == ["1:VMLIST:1", "1:VMLIST:r:2"]
+
+        await doprax.list_vms_snapshot(refresh=True)
+        assert fake.requests - before == 2
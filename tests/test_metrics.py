@@ -0,0 +1,52 @@
+import httpx
+import pytest
+
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.errors import DopraxNotFound
+from bot.metrics import METRICS, Histogram
+
+
+def test_histogram_quantiles_and_summary():
+    h = Histogram()
+    for ms in range(1, 101):
+        h.observe(ms / 1000)
+    assert h.quantile(0.5) == pytest.approx(0.05, abs=0.002)
+    assert h.quantile(0.95) == pytest.approx(0.095, abs=0.002)
+    s = h.summary()
+    assert s["count"] == 100 and s["max_ms"] == 100.0
+    assert Histogram().quantile(0.95) is None
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_by_endpoint_and_outcome():
+    METRICS.reset()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/missing/status/"):
+            return httpx.Response(404, json={"success": False})
+        return httpx.Response(200, json={"success": True, "data": {"status": "RUNNING"}})
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="https://x"
+    ) as http:
+        dop = DopraxClient(DopraxConfig(base_url="https://x", api_key="", dry_run=False), http)
+        await dop.get_vm_status("a")
+        await dop.get_vm_status("b")
+        with pytest.raises(DopraxNotFound):
+            await dop.get_vm_status("missing")
+
+    ep = "/api/v1/vms/{vm_code}/status/"
+    ok = METRICS.counter(
+        "doprax_requests_total", method="GET", endpoint=ep, status_class="2xx", outcome="ok"
+    )
+    nf = METRICS.counter(
+        "doprax_requests_total",
+        method="GET",
+        endpoint=ep,
+        status_class="4xx",
+        outcome="DopraxNotFound",
+    )
+    assert (ok.value, nf.value) == (2, 1)
+    assert METRICS.histogram("doprax_wait_seconds", method="GET", endpoint=ep).count == 3
+    assert METRICS.histogram("doprax_decode_seconds", endpoint=ep).count == 3
+    assert "doprax_requests_total" in METRICS.snapshot()
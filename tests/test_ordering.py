@@ -0,0 +1,129 @@
+import asyncio
+from datetime import UTC, datetime
+
+import pytest
+from telegram import CallbackQuery, Chat, Message, Update, User
+
+from bot.i18n import I18N
+from bot.ordering import UserOrderedProcessor
+
+
+def _message(update_id: int, user_id: int) -> Update:
+    msg = Message(
+        message_id=update_id,
+        date=datetime.now(UTC),
+        chat=Chat(id=user_id, type="private"),
+        from_user=User(id=user_id, first_name="u", is_bot=False),
+        text="hi",
+    )
+    return Update(update_id=update_id, message=msg)
+
+
+def _callback(update_id: int, user_id: int) -> Update:
+    user = User(id=user_id, first_name="u", is_bot=False)
+    query = CallbackQuery(id=str(update_id), from_user=user, chat_instance="c", data="1:x")
+    return Update(update_id=update_id, callback_query=query)
+
+
+@pytest.mark.asyncio
+async def test_same_user_runs_in_order_other_users_in_parallel():
+    proc = UserOrderedProcessor(max_concurrent_updates=16)
+    log: list[str] = []
+    gate = asyncio.Event()
+
+    async def work(name: str, block: bool = False) -> None:
+        log.append(f"start {name}")
+        if block:
+            await gate.wait()
+        log.append(f"end {name}")
+
+    tasks = [
+        asyncio.create_task(proc.process_update(_message(1, 1), work("a1", block=True))),
+        asyncio.create_task(proc.process_update(_message(2, 1), work("a2"))),
+        asyncio.create_task(proc.process_update(_message(3, 2), work("b1"))),
+    ]
+    await asyncio.sleep(0.01)
+    # User 2 is not held up by user 1; user 1's second update waits for the first.
+    assert log == ["start a1", "start b1", "end b1"]
+    assert proc.queued(1) == 1
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert log[3:] == ["end a1", "start a2", "end a2"]
+    assert proc.queued(1) == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_oldest_callback_and_stale_callbacks(monkeypatch):
+    answered: list[tuple[str, str | None]] = []
+
+    async def answer(self: CallbackQuery, text: str | None = None, **kwargs: object) -> bool:
+        answered.append((self.id, text))
+        return True
+
+    monkeypatch.setattr(CallbackQuery, "answer", answer)
+    now = [0.0]
+    proc = UserOrderedProcessor(max_pending=2, stale_callback_seconds=5, clock=lambda: now[0])
+    ran: list[int] = []
+    gate = asyncio.Event()
+
+    async def work(i: int) -> None:
+        if i == 0:
+            await gate.wait()
+        ran.append(i)
+
+    updates = [_message(0, 1), _callback(1, 1), _message(2, 1), _message(3, 1)]
+    tasks = []
+    for i, update in enumerate(updates):
+        tasks.append(asyncio.create_task(proc.process_update(update, work(i))))
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+    # The queue held [callback 1, message 2]; message 3 evicted the stale button press.
+    assert proc.queued(1) == 2
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert ran == [0, 2, 3]
+
+    # A callback that waited longer than stale_callback_seconds is skipped when its turn comes.
+    gate.clear()
+    tasks = [
+        asyncio.create_task(proc.process_update(_message(4, 1), work(0))),
+        asyncio.create_task(proc.process_update(_callback(5, 1), work(5))),
+    ]
+    await asyncio.sleep(0.01)
+    now[0] += 6
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert ran == [0, 2, 3, 0]
+    # Both dropped button presses were still answered, so no spinner is left behind.
+    assert answered == [
+        ("1", I18N.t("en", "rate_limited")),
+        ("5", I18N.t("en", "button_expired")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_in_flight_then_abandons_the_rest():
+    proc = UserOrderedProcessor(max_concurrent_updates=16)
+    done: list[str] = []
+    never = asyncio.Event()
+
+    async def work(name: str, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+        done.append(name)
+
+    async def stuck() -> None:
+        await never.wait()
+
+    tasks = [
+        asyncio.create_task(proc.process_update(_message(1, 1), work("quick", 0.01))),
+        # Queued behind the stuck update of the same user: counted, then abandoned.
+        asyncio.create_task(proc.process_update(_message(2, 2), stuck())),
+        asyncio.create_task(proc.process_update(_message(3, 2), work("behind", 0))),
+    ]
+    await asyncio.sleep(0)
+    assert proc.in_flight == 3
+
+    assert await proc.drain(0.1) == 2
+    assert done == ["quick"]
+    assert proc.in_flight == 0 and all(t.done() for t in tasks)
+    assert await proc.drain(0.1) == 0
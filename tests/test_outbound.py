@@ -0,0 +1,89 @@
+import pytest
+from telegram.error import RetryAfter
+
+from bot.metrics import METRICS
+from bot.outbound import FloodLimiter
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+def _limiter(clock: Clock, **kwargs) -> FloodLimiter:
+    return FloodLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+async def _ok(*args, **kwargs):
+    return True
+
+
+@pytest.mark.asyncio
+async def test_per_chat_bucket_paces_bursts_but_not_other_endpoints():
+    clock = Clock()
+    limiter = _limiter(clock, chat_rate=1.0, chat_burst=2)
+    for _ in range(4):
+        await limiter.process_request(_ok, (), {}, "sendMessage", {"chat_id": 1}, None)
+    assert clock.sleeps == [1.0, 1.0]
+    # Another chat and non-message endpoints are not held back by chat 1.
+    await limiter.process_request(_ok, (), {}, "sendMessage", {"chat_id": 2}, None)
+    await limiter.process_request(_ok, (), {}, "answerCallbackQuery", {}, None)
+    assert clock.sleeps == [1.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_and_retries_then_gives_up():
+    METRICS.reset()
+    clock = Clock()
+    limiter = _limiter(clock, max_retries=1)
+    calls = 0
+
+    async def flaky(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RetryAfter(3)
+        return {"ok": True}
+
+    assert await limiter.process_request(flaky, (), {}, "sendMessage", {"chat_id": 5}, None)
+    assert calls == 2 and clock.sleeps == [3.0]
+
+    async def always_429(*args, **kwargs):
+        raise RetryAfter(1)
+
+    with pytest.raises(RetryAfter):
+        await limiter.process_request(always_429, (), {}, "sendMessage", {"chat_id": 5}, None)
+    assert METRICS.counter("telegram_send_dropped_total", reason="retry_after").value == 1
+
+
+@pytest.mark.asyncio
+async def test_drops_instead_of_queueing_past_max_wait():
+    METRICS.reset()
+    clock = Clock()
+    waits: list[float] = []
+
+    async def no_time_passes(seconds: float) -> None:
+        waits.append(seconds)
+
+    limiter = FloodLimiter(
+        chat_rate=1.0, chat_burst=1, max_wait=2.0, clock=clock, sleep=no_time_passes
+    )
+    # A burst arriving at once: waits of 0, 1, 2, then 3 > max_wait is dropped.
+    for _ in range(3):
+        await limiter.process_request(_ok, (), {}, "sendMessage", {"chat_id": 1}, None)
+    with pytest.raises(RetryAfter):
+        await limiter.process_request(_ok, (), {}, "sendMessage", {"chat_id": 1}, None)
+    assert waits == [1.0, 2.0]
+    assert METRICS.counter("telegram_send_dropped_total", reason="max_wait").value == 1
+    # The dropped call's reservation was refunded.
+    clock.now = 3.0
+    await limiter.process_request(_ok, (), {}, "sendMessage", {"chat_id": 1}, None)
+    assert waits == [1.0, 2.0]
@@ -0,0 +1,71 @@
+import logging
+import pstats
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from bot.config import parse_user_ids
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.handlers import help as help_module
+from bot.profiling import ProfilerBusy, SamplingProfiler
+
+
+def _burn(seconds: float) -> None:
+    until = time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_profile_attributes_samples_to_handler_and_endpoint(tmp_path, monkeypatch):
+    async def lang(storage, user_id):
+        return "en"
+
+    async def slow_reply(*args, **kwargs):
+        _burn(0.15)
+
+    monkeypatch.setattr(help_module, "get_lang", lang)
+    monkeypatch.setattr(help_module, "reply_menu", slow_reply)
+    doprax = DopraxClient(DopraxConfig(base_url="https://x", api_key="k", dry_run=True))
+    monkeypatch.setattr(doprax, "_mock", lambda method, url, body: _burn(0.15))
+
+    profiler = SamplingProfiler(str(tmp_path), logging.getLogger("test"), interval=0.002)
+    task = profiler.start(0.5)
+    with pytest.raises(ProfilerBusy):
+        profiler.start(1)
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=1))
+    await help_module.help_cmd(update, None, SimpleNamespace(storage=None))
+    await doprax.get_vm_status("vm_000123")
+    result = await task
+
+    # A busy loop thread only lets the sampler in every switch interval (5ms).
+    assert not profiler.running and result.samples > 30
+    shares = dict(result.by_handler)
+    assert shares["help_cmd"] > 10 and shares["(idle)"] > 0
+    assert dict(result.by_endpoint)["GET /api/v1/vms/{vm_code}/status/"] > 10
+
+    folded = Path(result.folded_path).read_text().splitlines()
+    assert any(line.startswith("help_cmd;") and "_burn (" in line for line in folded)
+    assert any(";doprax:GET /api/v1/vms/{vm_code}/status/;" in line for line in folded)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in folded) == result.samples
+
+    stats = pstats.Stats(result.pstats_path)
+    burn = next(v for k, v in stats.stats.items() if k[2] == "_burn")
+    assert burn[1] > 20 and burn[3] > 0.1  # sample count and cumulative seconds
+
+
+@pytest.mark.asyncio
+async def test_closing_abandons_open_window(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), logging.getLogger("test"))
+    profiler.start(60)
+    assert profiler.running
+    await profiler.close()
+    assert not profiler.running and list(tmp_path.iterdir()) == []
+
+
+def test_parse_user_ids():
+    assert parse_user_ids(" 1, 22 ,,3") == frozenset({1, 22, 3})
+    with pytest.raises(ValueError):
+        parse_user_ids("1,alice")
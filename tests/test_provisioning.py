@@ -0,0 +1,66 @@
+import logging
+
+import httpx
+import pytest
+
+from bot.accounts import DopraxClientPool
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.fakes.doprax import FakeDoprax, FleetConfig
+from bot.provisioning import ProvisioningTracker, is_terminal
+from bot.storage import Storage
+
+
+def test_terminal_statuses():
+    assert is_terminal("running") and is_terminal("FAILED")
+    assert not is_terminal("PROVISIONING")
+
+
+@pytest.mark.asyncio
+async def test_tracker_batches_notifies_once_and_resumes(tmp_path, bot):
+    fake = FakeDoprax(fleet=FleetConfig(vms=0, provision_seconds=3600))
+    http = httpx.AsyncClient(transport=fake.transport(), base_url="https://x")
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.open()
+    pool = DopraxClientPool(
+        DopraxConfig(base_url="https://x", api_key="", dry_run=False),
+        {"default": "k"},
+        storage,
+        client_factory=lambda cfg: DopraxClient(cfg, client=http),
+    )
+    now = [1000.0]
+    log = logging.getLogger("test")
+    tracker = ProvisioningTracker(storage, pool, log, base_delay=5, clock=lambda: now[0])
+    try:
+        doprax = await pool.get("default")
+        a = await doprax.create_vm(
+            {"name": "a", "location_code": "loc-000", "machine_type_code": "m"}
+        )
+        b = await doprax.create_vm(
+            {"name": "b", "location_code": "loc-000", "machine_type_code": "m"}
+        )
+        await tracker.track(1, 11, "en", a["vm_code"], "a", a["status"])
+        await tracker.track(2, 22, "en", b["vm_code"], "b", b["status"])
+
+        assert await tracker.poll_once(bot) == 0  # not due yet
+        now[0] += 5
+        before = fake.requests
+        assert await tracker.poll_once(bot) == 2
+        assert fake.requests - before == 2
+        assert bot.sent == []  # still PROVISIONING
+
+        # Restart: a fresh tracker picks the VMs up from SQLite.
+        tracker = ProvisioningTracker(storage, pool, log, base_delay=5, clock=lambda: now[0])
+        await tracker.load()
+        assert len(tracker) == 2
+
+        fake.set_status(a["vm_code"], "RUNNING")
+        now[0] += 10
+        await tracker.poll_once(bot)
+        assert [m["chat_id"] for m in bot.sent] == [11]
+        assert "RUNNING" in bot.sent[0]["text"]
+        assert len(tracker) == 1
+        assert [v.vm_code for v in await storage.list_tracked_vms()] == [b["vm_code"]]
+    finally:
+        await pool.close()
+        await http.aclose()
+        await storage.close()
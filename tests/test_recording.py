@@ -0,0 +1,91 @@
+import json
+
+from bot.callbacks import pack
+from bot.fakes.replay import main as replay_main
+from bot.fakes.updates import callback_update, message_update
+from bot.i18n import I18N
+from bot.keyboards import CB
+from bot.recording import UpdateRecorder, UpdateSanitizer, load_recording, redact_text
+
+
+def test_redact_text_keeps_shape_commands_and_labels():
+    assert redact_text("Hello Ali, 42!") == "xxxxx xxx, 00!"
+    assert redact_text("/status vm_12ab") == "/status xx_00xx"
+    assert redact_text("/start") == "/start"
+    assert redact_text("سلام ۱۲") == "xxxx 00"
+    label = I18N.t("fa", "btn_list_vms")
+    assert redact_text(label) == label
+
+
+def test_sanitizer_hashes_ids_consistently_and_drops_personal_fields():
+    payload = message_update(5, 777, "/status vm_1")
+    msg = payload["message"]
+    msg["from"].update(username="ali", last_name="Rezaei", language_code="fa")
+    msg["photo"] = [{"file_id": "abc"}]
+    sara = {"id": 555, "is_bot": False, "first_name": "Sara", "username": "sara_k"}
+    msg["forward_origin"] = {"type": "user", "date": 1, "sender_user": sara}
+    msg["new_chat_members"] = [{"id": 556, "is_bot": False, "first_name": "Reza"}]
+    msg["left_chat_member"] = {"id": 557, "is_bot": False, "first_name": "Nima"}
+    msg["users_shared"] = {"request_id": 1, "users": [{"user_id": 558, "first_name": "Mina"}]}
+    msg["poll"] = {"id": "p1", "question": "Is Ali back?", "options": []}
+    group = {
+        "message": {
+            **msg,
+            "chat": {"id": -100123, "type": "supergroup", "title": "Ops"},
+            "forward_origin": {"type": "hidden_user", "date": 1, "sender_user_name": "Sara K"},
+        }
+    }
+
+    sanitizer = UpdateSanitizer(salt=b"a")
+    out = sanitizer.sanitize(payload)["message"]
+    assert out["from"] == {
+        "id": sanitizer.hash_id(777),
+        "is_bot": False,
+        "first_name": "user",
+        "language_code": "fa",
+    }
+    assert out["chat"] == {"id": out["from"]["id"], "type": "private"}
+    assert out["from"]["id"] != 777 and "photo" not in out
+    assert out["entities"] == msg["entities"] and out["text"] == "/status xx_0"
+
+    anon = {"id": sanitizer.hash_id(555), "is_bot": False, "first_name": "user"}
+    assert out["forward_origin"] == {"type": "user", "date": 1, "sender_user": anon}
+    assert [u["id"] for u in out["new_chat_members"]] == [sanitizer.hash_id(556)]
+    assert out["left_chat_member"]["id"] == sanitizer.hash_id(557)
+    assert out["users_shared"] == {"request_id": 1, "users": [{"user_id": sanitizer.hash_id(558)}]}
+    assert "poll" not in out
+
+    out_group = sanitizer.sanitize(group)["message"]
+    assert out_group["chat"]["id"] < 0
+    assert out_group["forward_origin"] == {"type": "hidden_user", "date": 1}
+    dumped = json.dumps([out, out_group])
+    for personal in ("ali", "Rezaei", "Sara", "sara_k", "Reza", "Nima", "Mina", "Ops"):
+        assert personal not in dumped
+    assert UpdateSanitizer(salt=b"a").hash_id(777) == sanitizer.hash_id(777)
+    assert UpdateSanitizer(salt=b"b").hash_id(777) != sanitizer.hash_id(777)
+
+
+def test_recording_round_trip_and_replay(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "1:unused")
+    monkeypatch.setenv("DRY_RUN", "1")
+    path = tmp_path / "updates.ndjson"
+    recorder = UpdateRecorder(str(path), salt=b"t")
+    update_id = 1
+    for user in (1, 2, 3):
+        for text in ("/start", "/help", "/list_vms"):
+            recorder.record(message_update(update_id, user, text))
+            update_id += 1
+    recorder.record(callback_update(update_id, 1, pack(CB.VM_REFRESH, "vm_000001")))
+    recorder.close()
+
+    recording = load_recording(str(path))
+    assert len(recording) == 10 and recording[0][1]["update_id"] == 1
+    assert 'first_name":"user1' not in path.read_text()
+
+    replay_main([str(path), "--speed", "max"])
+    out = capsys.readouterr().out
+    rows = {line.split()[0]: line.split() for line in out.splitlines()[2:-2]}
+    assert rows["start_cmd"][1] == "3" and rows["help_cmd"][1] == "3"
+    assert rows["status_refresh_callback"][1] == "1"
+    assert float(rows["start_cmd"][-1]) > 0  # storage round trips per update
+    assert "updates: 10 in" in out and "errors: 0" in out
@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+
+from bot.cache import TTLCache
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.resilience import CircuitBreaker, TokenBucket
+
+
+def test_token_bucket_reserves_in_order():
+    now = [0.0]
+    b = TokenBucket(rate=2.0, burst=2.0, clock=lambda: now[0])
+    assert b.try_acquire() and b.try_acquire()
+    assert not b.try_acquire()
+    assert b.reserve() == pytest.approx(0.5)
+    assert b.reserve() == pytest.approx(1.0)
+    now[0] = 1.0
+    assert b.try_acquire() is False
+    assert TokenBucket(rate=0, burst=1).reserve() == 0.0
+
+
+def test_circuit_breaker_open_half_open_close():
+    now = [0.0]
+    cb = CircuitBreaker(threshold=2, cooldown=10, clock=lambda: now[0])
+    cb.record_failure()
+    assert cb.allow()
+    cb.record_failure()
+    assert cb.state == "open" and not cb.allow()
+    now[0] = 10.0
+    assert cb.allow()  # single trial
+    assert not cb.allow()
+    cb.record_failure()
+    assert cb.state == "open"
+    now[0] = 20.0
+    assert cb.allow()
+    cb.record_success()
+    assert cb.state == "closed" and cb.allow()
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_single_flight_and_expiry():
+    now = [0.0]
+    cache: TTLCache[str, int] = TTLCache(ttl=5, clock=lambda: now[0])
+    calls = 0
+
+    async def loader() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(cache.fetch("k", loader) for _ in range(5)))
+    assert calls == 1
+    assert all(v == 1 for v, _ in results)
+
+    now[0] = 3.0
+    assert await cache.fetch("k", loader) == (1, 3.0)
+    now[0] = 6.0
+    assert await cache.get_or_load("k", loader) == 2
+    cache.invalidate("k")
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_does_not_cache_errors():
+    cache: TTLCache[str, int] = TTLCache(ttl=5)
+
+    async def boom() -> int:
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("k", boom)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_trial_is_not_stranded_by_odd_errors_or_cancellation():
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise httpx.RemoteProtocolError("server disconnected")
+        if calls == 2:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json={"success": True, "data": []})
+
+    cfg = DopraxConfig(
+        base_url="https://x", api_key="", dry_run=False, breaker_threshold=1, breaker_cooldown=0
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="https://x"
+    ) as http:
+        dop = DopraxClient(cfg, http)
+        dop._breaker.record_failure()
+        assert dop._breaker.state == "half_open"
+
+        # The protocol error is a failed trial; the retry (after backoff) gets the next one.
+        task = asyncio.create_task(dop.list_vms())
+        while calls < 2 and not task.done():
+            await asyncio.sleep(0.01)
+        # Cancelling the call that holds the trial hands it back.
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert dop._breaker.allow()
+        dop._breaker.release()
+
+        assert await dop.list_vms() == []
+        assert dop._breaker.state == "closed"
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bot.accounts import DopraxClientPool
+from bot.doprax_client import DopraxConfig
+from bot.errors import DopraxNetworkError
+from bot.handlers.inline_search import inline_search
+from bot.search import InventorySearch, VMIndex
+from bot.storage import Storage
+
+
+def _vm(code, name, status="RUNNING", loc="Frankfurt, Germany"):
+    return {"vmCode": code, "name": name, "status": status, "locationName": loc}
+
+
+def test_index_prefix_and_multi_term_search():
+    index = VMIndex()
+    assert index.update(
+        [
+            _vm("vm_1", "web-prod-1"),
+            _vm("vm_2", "web-staging", status="STOPPED"),
+            _vm("vm_3", "db-prod", loc="Helsinki, Finland"),
+        ]
+    ) == (3, 0, 0)
+    assert [d.code for d in index.search("web")] == ["vm_1", "vm_2"]
+    assert [d.code for d in index.search("prod hel")] == ["vm_3"]
+    assert [d.code for d in index.search("stop")] == ["vm_2"]
+    assert [d.code for d in index.search("vm_3")] == ["vm_3"]
+    assert index.search("nothing") == []
+    assert len(index.search("", limit=2)) == 2
+
+
+def test_index_updates_incrementally():
+    index = VMIndex()
+    index.update([_vm("vm_1", "alpha"), _vm("vm_2", "beta")])
+    assert index.update([_vm("vm_1", "alpha"), _vm("vm_2", "gamma"), _vm("vm_4", "delta")]) == (
+        1,
+        1,
+        0,
+    )
+    assert index.search("beta") == []
+    assert [d.code for d in index.search("gam")] == ["vm_2"]
+    assert index.update([_vm("vm_4", "delta")]) == (0, 0, 2)
+    assert index.search("alpha") == []
+    assert len(index) == 1
+
+
+@pytest.mark.asyncio
+async def test_inventory_search_uses_snapshot(tmp_path):
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.open()
+    pool = DopraxClientPool(
+        DopraxConfig(base_url="https://x", api_key="", dry_run=True, inventory_ttl=60),
+        {"default": ""},
+        storage,
+    )
+    try:
+        search = InventorySearch(pool)
+        # No snapshot yet: an empty answer rather than a live list_vms per keystroke.
+        assert await search.search(1, "") == []
+        search._results.invalidate()
+        doprax = await pool.get(await pool.account_for_user(1))
+        await doprax.list_vms_snapshot()
+        first = await search.search(1, "")
+        assert first
+        code = first[0].code
+        assert [d.code for d in await search.search(1, code)] == [code]
+        assert len(search._indexes) == 1
+    finally:
+        await pool.close()
+        await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_inline_search_answers_empty_when_doprax_fails():
+    answers = []
+
+    class FailingSearch:
+        result_ttl = 5.0
+
+        async def search(self, user_id, query):
+            raise DopraxNetworkError("down")
+
+    async def answer(results, **kwargs):
+        answers.append(results)
+
+    query = SimpleNamespace(from_user=SimpleNamespace(id=1), query="web", answer=answer)
+    await inline_search(SimpleNamespace(inline_query=query), None, None, FailingSearch())
+    assert answers == [[]]
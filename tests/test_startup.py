@@ -0,0 +1,63 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from bot.startup import LazyHandler, StartupProfile, lazy
+
+
+def test_app_wiring_does_not_import_handler_modules():
+    code = (
+        "import sys, bot.app; "
+        "print(sorted(m for m in sys.modules if m.startswith('bot.handlers.')))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert "create_vm" not in out and "list_vms" not in out
+    assert "text_router" in out
+
+
+CALLS: list[tuple] = []
+
+
+async def lazy_target(*args, **kwargs):
+    CALLS.append((args, kwargs))
+
+
+@pytest.mark.asyncio
+async def test_lazy_handler_imports_on_first_call():
+    handler = lazy("bot.handlers.help:help_cmd")
+    assert handler is lazy("bot.handlers.help:help_cmd")
+    from bot.handlers.help import help_cmd
+
+    assert handler.resolve() is help_cmd
+    with pytest.raises(ValueError):
+        LazyHandler("bot.handlers.help")
+
+    await lazy(f"{__name__}:lazy_target")(1, x=2)
+    assert CALLS == [((1,), {"x": 2})]
+
+
+@pytest.mark.asyncio
+async def test_profile_keeps_phase_order_and_overlap():
+    now = [0.0]
+    profile = StartupProfile(clock=lambda: now[0])
+
+    async def step(seconds: float) -> None:
+        await asyncio.sleep(0)
+        now[0] += seconds
+
+    with profile.phase("load config"):
+        now[0] += 0.01
+    with profile.phase("open resources"):
+        await asyncio.gather(profile.timed("  a", step(0.1)), profile.timed("  b", step(0.2)))
+    assert profile.mark_ready() == pytest.approx(0.31)
+    now[0] += 5  # after ready does not count
+
+    names = [name for name, _ in profile.phases]
+    assert names == ["load config", "open resources", "  a", "  b"]
+    report = profile.report().splitlines()
+    assert report[-1].split()[-1] == "310.0"
+    assert len(report) == 6
@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+import pytest
+
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.fakes.doprax import FakeDoprax, FleetConfig
+
+
+@pytest.mark.asyncio
+async def test_status_cache_single_flight_and_invalidation():
+    fake = FakeDoprax(fleet=FleetConfig(vms=3))
+    async with httpx.AsyncClient(transport=fake.transport(), base_url="https://x") as http:
+        doprax = DopraxClient(
+            DopraxConfig(base_url="https://x", api_key="k", dry_run=False, status_ttl=60),
+            client=http,
+        )
+        code = "vm_000001"
+        fake.set_status(code, "RUNNING")
+        before = fake.requests
+        results = await asyncio.gather(*(doprax.get_vm_status_cached(code) for _ in range(10)))
+        assert fake.requests - before == 1
+        assert all(st["status"] == "RUNNING" for st, _ in results)
+
+        fake.set_status(code, "STOPPED")
+        st, age = await doprax.get_vm_status_cached(code)
+        assert st["status"] == "RUNNING" and age >= 0
+        assert fake.requests - before == 1
+
+        # Fresh reads (pollers) refresh the shared entry.
+        assert (await doprax.get_vm_status(code))["status"] == "STOPPED"
+        assert (await doprax.get_vm_status_cached(code))[0]["status"] == "STOPPED"
+
+        fake.set_status(code, "RUNNING")
+        await doprax.create_vm({"name": "n", "location_code": "loc-000", "machine_type_code": "m"})
+        assert (await doprax.get_vm_status_cached(code))[0]["status"] == "RUNNING"
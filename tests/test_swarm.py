@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import RetryAfter
+
+from bot.callbacks import pack
+from bot.fakes.botapi import FakeBotAPI
+from bot.fakes.swarm import RATE_LIMITED_TEXT, percentile, report, run_swarm
+from bot.fakes.updates import callback_update, message_update
+from bot.httpserver import HttpServer
+from bot.keyboards import CB
+
+
+@pytest.mark.asyncio
+async def test_fake_bot_api_speaks_to_ptb():
+    api = FakeBotAPI()
+    server = HttpServer(api.handle)
+    await server.start()
+    seen = []
+    api.subscribe(7, seen.append)
+    bot = Bot("1:test", base_url=f"{server.url}/bot")
+    try:
+        await bot.initialize()
+        assert bot.username == "fake_doprax_bot"
+
+        api.push(message_update(0, 7, "/start"))
+        api.push(callback_update(0, 7, pack(CB.LANG, "en")))
+        updates = await bot.get_updates(timeout=1)
+        assert [u.update_id for u in updates] == [1, 2]
+        assert updates[0].message.text == "/start"
+        assert await bot.get_updates(offset=3, timeout=0) == ()
+        assert api.pending == 0
+
+        markup = InlineKeyboardMarkup([[InlineKeyboardButton("x", callback_data="1:VMSTAT:a")]])
+        sent = await bot.send_message(7, "12", reply_markup=markup)
+        await bot.edit_message_text("done", chat_id=7, message_id=sent.message_id)
+        await bot.answer_callback_query(updates[1].callback_query.id, text="ok")
+        assert sent.message_id == 1 and sent.reply_markup == markup
+        assert [(c.method, c.params["text"]) for c in seen] == [
+            ("sendMessage", "12"),
+            ("editMessageText", "done"),
+            ("answerCallbackQuery", "ok"),
+        ]
+
+        api.rate_429 = 1.0
+        with pytest.raises(RetryAfter):
+            await bot.send_message(7, "again")
+    finally:
+        await bot.shutdown()
+        api.close()
+        await server.close()
+
+
+async def _onboarding_bot(bot: Bot, stop: asyncio.Event, limited_user: int) -> None:
+    """Just enough of the real bot for the onboarding journey, through the Bot API."""
+    offset = 0
+    while not stop.is_set():
+        for update in await bot.get_updates(offset=offset, timeout=1):
+            offset = update.update_id + 1
+            chat = update.effective_chat.id
+            if update.message is not None:
+                keyboard = [[InlineKeyboardButton("English", callback_data=pack(CB.LANG, "en"))]]
+                await bot.send_message(chat, "lang?", reply_markup=InlineKeyboardMarkup(keyboard))
+            else:
+                await bot.answer_callback_query(update.callback_query.id)
+                text = RATE_LIMITED_TEXT if chat == limited_user else "menu"
+                await bot.send_message(chat, text)
+
+
+@pytest.mark.asyncio
+async def test_swarm_walks_journeys_and_reports():
+    api = FakeBotAPI()
+    server = HttpServer(api.handle)
+    await server.start()
+    bot = Bot("1:test", base_url=f"{server.url}/bot")
+    await bot.initialize()
+    stop = asyncio.Event()
+    loop = asyncio.create_task(_onboarding_bot(bot, stop, limited_user=100_003))
+    try:
+        stats = await run_swarm(api, users=8, duration=0, think_ms=5, step_timeout=5)
+    finally:
+        stop.set()
+        api.close()
+        await loop
+        await bot.shutdown()
+        await server.close()
+
+    assert stats.journeys["onboard"] == 7 and stats.stuck["onboard"] == 1
+    assert stats.rate_limited["onboard:pick_lang"] == 1
+    assert len(stats.latencies["onboard:start"]) == 8
+    assert stats.updates == 16 and not stats.timeouts
+    text = report(stats, api.calls)
+    assert "onboard:pick_lang" in text and "stuck: onboard=1" in text
+
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 0.5) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile(samples, 1.0) == 100.0
+    assert percentile([3.0], 0.9) == 3.0
@@ -0,0 +1,81 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from telegram import Chat, Message, Update, User
+
+from bot.handlers.common import HandlerDeps
+from bot.handlers.text_router import MENU_ROUTES, TextRoute, TextRouter
+from bot.i18n import I18N
+from bot.states import State
+from bot.storage import Storage
+
+
+class FakePool:
+    def __init__(self) -> None:
+        self.lookups = 0
+
+    async def for_user(self, user_id):
+        self.lookups += 1
+        return f"doprax-{user_id}"
+
+
+def _text_update(text: str, user_id: int = 7) -> Update:
+    msg = Message(
+        message_id=1,
+        date=datetime.now(UTC),
+        chat=Chat(id=user_id, type="private"),
+        from_user=User(id=user_id, first_name="u", is_bot=False),
+        text=text,
+    )
+    return Update(update_id=1, message=msg)
+
+
+def test_every_menu_label_resolves_in_both_languages():
+    router = TextRouter()
+    for key, route in MENU_ROUTES.items():
+        for lang in ("en", "fa"):
+            assert router.route_for_label(I18N.t(lang, key)) is route
+
+
+@pytest.mark.asyncio
+async def test_router_dispatches_in_process(tmp_path, bot):
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.open()
+    try:
+        await storage.ensure_user(7)
+        deps = HandlerDeps(storage=storage, logger=None)  # type: ignore[arg-type]
+        calls: list[tuple] = []
+
+        async def help_target(update, context, deps):
+            calls.append(("help",))
+
+        async def list_target(update, context, deps, doprax):
+            calls.append(("list", doprax))
+
+        async def status_target(update, context, deps, doprax):
+            calls.append(("status", update.message.text, doprax))
+
+        router = TextRouter(
+            menu_routes={
+                "btn_help": TextRoute(help_target),
+                "btn_list_vms": TextRoute(list_target, needs_doprax=True),
+            },
+            state_routes={State.STATUS_WAIT_CODE: TextRoute(status_target, needs_doprax=True)},
+        )
+        pool = FakePool()
+        context = SimpleNamespace(bot=bot, bot_data={})
+
+        await router(_text_update(I18N.t("fa", "btn_help")), context, deps, pool)
+        await router(_text_update(I18N.t("en", "btn_list_vms")), context, deps, pool)
+        # Free text with no pending prompt is ignored.
+        await router(_text_update("vm_123"), context, deps, pool)
+        await storage.set_state(7, State.STATUS_WAIT_CODE)
+        await router(_text_update(" vm_123 "), context, deps, pool)
+
+        assert calls == [("help",), ("list", "doprax-7"), ("status", " vm_123 ", "doprax-7")]
+        assert pool.lookups == 2
+        # Nothing is echoed back into the chat.
+        assert bot.sent == []
+    finally:
+        await storage.close()
@@ -0,0 +1,133 @@
+import logging
+
+import httpx
+import pytest
+
+from bot.accounts import DopraxClientPool
+from bot.doprax_client import DopraxClient, DopraxConfig
+from bot.fakes.doprax import FakeDoprax, FleetConfig
+from bot.storage import Storage
+from bot.watch import WatchPoller
+from bot.workers import WorkerSlot
+
+
+@pytest.mark.asyncio
+async def test_watch_dedupes_polls_fans_out_and_adapts(tmp_path, bot):
+    fake = FakeDoprax(fleet=FleetConfig(vms=2))
+    http = httpx.AsyncClient(transport=fake.transport(), base_url="https://x")
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.open()
+    pool = DopraxClientPool(
+        DopraxConfig(base_url="https://x", api_key="", dry_run=False),
+        {"default": "k", "other": "k"},
+        storage,
+        client_factory=lambda cfg: DopraxClient(cfg, client=http),
+    )
+    now = [1000.0]
+    log = logging.getLogger("test")
+    watcher = WatchPoller(
+        storage, pool, log, min_interval=10, max_interval=100, clock=lambda: now[0]
+    )
+    code = "vm_000000"
+    try:
+        fake.set_status(code, "RUNNING")
+        assert await watcher.subscribe(1, 11, "en", code, "RUNNING")
+        assert not await watcher.subscribe(1, 11, "en", code, "RUNNING")
+        for uid in (2, 3):
+            await watcher.subscribe(uid, uid * 11, "en", code, "RUNNING")
+        assert len(watcher) == 1
+
+        # Stable VM: checked at max_interval.
+        now[0] += 99
+        assert await watcher.poll_once(bot) == 0
+        now[0] += 1
+        before = fake.requests
+        assert await watcher.poll_once(bot) == 1
+        assert fake.requests - before == 1  # one fetch for three subscribers
+        assert bot.sent == []
+
+        fake.set_status(code, "STOPPED")
+        now[0] += 100
+        await watcher.poll_once(bot)
+        assert sorted(m["chat_id"] for m in bot.sent) == [11, 22, 33]
+        assert all("STOPPED" in m["text"] for m in bot.sent)
+        vm = watcher.watched("default", code)
+        assert vm is not None and vm.volatility == pytest.approx(0.5)
+        assert watcher.interval(vm) == pytest.approx(55.0)
+
+        # State survives a restart.
+        watcher = WatchPoller(storage, pool, log, min_interval=10, max_interval=100)
+        await watcher.load()
+        vm = watcher.watched("default", code)
+        assert vm is not None and len(vm.subscribers) == 3
+        assert vm.last_status == "STOPPED"
+
+        # Switching accounts after subscribing does not strand the subscription.
+        await storage.set_account(1, "other")
+        for uid in (1, 2, 3):
+            assert await watcher.unsubscribe(uid, code)
+        assert not await watcher.unsubscribe(1, code)
+        assert len(watcher) == 0
+        assert await storage.list_watches() == []
+        assert await storage.list_watched_vms() == {}
+    finally:
+        await pool.close()
+        await http.aclose()
+        await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_each_watched_vm_is_polled_by_one_worker(tmp_path, bot):
+    fake = FakeDoprax(fleet=FleetConfig(vms=2))
+    http = httpx.AsyncClient(transport=fake.transport(), base_url="https://x")
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.open()
+    pool = DopraxClientPool(
+        DopraxConfig(base_url="https://x", api_key="", dry_run=False),
+        {"default": "k"},
+        storage,
+        client_factory=lambda cfg: DopraxClient(cfg, client=http),
+    )
+    now = [1000.0]
+    log = logging.getLogger("test")
+    code = "vm_000000"
+    slots = [WorkerSlot(i, 2) for i in range(2)]
+    owner, other = sorted(slots, key=lambda s: not s.owns_vm("default", code))
+    workers = [
+        WatchPoller(
+            storage,
+            pool,
+            log,
+            min_interval=10,
+            max_interval=10,
+            clock=lambda: now[0],
+            owns_vm=slot.owns_vm,
+        )
+        for slot in (owner, other)
+    ]
+    try:
+        fake.set_status(code, "RUNNING")
+        # Users routed to different workers watch the same VM.
+        await workers[0].subscribe(1, 11, "en", code, "RUNNING")
+        await workers[1].subscribe(2, 22, "en", code, "RUNNING")
+        assert len(workers[1]) == 0
+
+        fake.set_status(code, "STOPPED")
+        now[0] += 10
+        before = fake.requests
+        assert [await w.poll_once(bot) for w in workers] == [1, 0]
+        assert fake.requests - before == 1
+        assert sorted(m["chat_id"] for m in bot.sent) == [11, 22]
+
+        # Unsubscribing on the other worker is seen by the owner; the last one drops state.
+        assert await workers[1].unsubscribe(2, code)
+        now[0] += 10
+        await workers[0].poll_once(bot)
+        vm = workers[0].watched("default", code)
+        assert vm is not None and list(vm.subscribers) == [1]
+        assert await workers[0].unsubscribe(1, code)
+        assert await storage.list_watched_vms() == {}
+    finally:
+        await pool.close()
+        await http.aclose()
+        await storage.close()
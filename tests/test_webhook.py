@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+import httpx
+import pytest
+from telegram import Update
+
+from bot.fakes.updates import message_update, post_updates, synthetic_updates
+from bot.metrics import METRICS
+from bot.webhook import WebhookServer
+
+
+@pytest.mark.asyncio
+async def test_webhook_auth_ack_and_backpressure():
+    METRICS.reset()
+    release = asyncio.Event()
+    seen: list[int] = []
+
+    async def dispatch(payload):
+        await release.wait()
+        seen.append(Update.de_json(payload, None).update_id)
+
+    server = WebhookServer(
+        dispatch,
+        "s3cret",
+        logging.getLogger("test"),
+        host="127.0.0.1",
+        port=0,
+        queue_size=2,
+        workers=1,
+    )
+    await server.start()
+    try:
+        async with httpx.AsyncClient() as http:
+            bad = await post_updates(
+                server.url, "wrong", [message_update(1, 7, "/start")], client=http
+            )
+            assert bad == [401]
+
+            # One update is held by the worker, two fill the queue, the rest are pushed back.
+            updates = synthetic_updates(5, users=3)
+            first = await post_updates(server.url, "s3cret", updates[:1], client=http)
+            await asyncio.sleep(0.05)
+            rest = await post_updates(server.url, "s3cret", updates[1:], concurrency=1, client=http)
+            assert first + rest == [200, 200, 200, 503, 503]
+
+            health = (await http.get(server.url.replace("/telegram", "/healthz"))).json()
+            assert health == {"ok": True, "queue_depth": 2}
+
+            release.set()
+        await server.close()
+        assert seen == [u["update_id"] for u in updates[:3]]
+        assert METRICS.histogram("webhook_ack_seconds").samples == 6
+        assert METRICS.counter("webhook_updates_total", outcome="queue_full").value == 2
+    finally:
+        release.set()
+        await server.close()
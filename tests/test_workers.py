@@ -0,0 +1,115 @@
+import json
+import logging
+
+import httpx
+import pytest
+
+from bot.doprax_client import DopraxClient, DopraxConfig, write_catalog_snapshot
+from bot.fakes.updates import callback_update, message_update
+from bot.metrics import METRICS
+from bot.workers import WORKER_PATH, HashRing, Supervisor, WorkerSlot, routing_key
+
+
+def test_hash_ring_balanced_and_consistent():
+    keys = range(100_000, 110_000)
+    four, five = HashRing(4), HashRing(5)
+    counts = [0] * 4
+    moved = 0
+    for k in keys:
+        counts[four.node_for(k)] += 1
+        moved += four.node_for(k) != five.node_for(k)
+    assert all(1500 < c < 3500 for c in counts)
+    # Adding a worker only moves roughly its fair share of users.
+    assert moved / len(keys) < 0.35
+
+    slots = [WorkerSlot(i, 4) for i in range(4)]
+    assert all(sum(s.owns(k) for s in slots) == 1 for k in range(1000))
+    assert all(sum(s.owns_vm("default", f"vm_{k}") for s in slots) == 1 for k in range(1000))
+
+
+def test_routing_key_reads_raw_payloads():
+    assert routing_key(message_update(1, 42, "/start")) == 42
+    assert routing_key(callback_update(2, 43, "1:MENU:list_vms")) == 43
+    assert routing_key({"update_id": 3, "inline_query": {"from": {"id": 44}, "query": ""}}) == 44
+    assert routing_key({"update_id": 4}) == 4
+
+
+class FakeProcess:
+    def __init__(self) -> None:
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def terminate(self) -> None:
+        self.alive = False
+
+    def kill(self) -> None:
+        self.alive = False
+
+    def join(self, timeout=None) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_supervisor_routes_in_order_and_restarts_dead_workers():
+    received: dict[int, list[dict]] = {}
+    spawned: list[tuple[int, FakeProcess]] = []
+
+    def spawn(slot, port, secret):
+        process = FakeProcess()
+        spawned.append((slot.index, process))
+        return process
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/healthz":
+            return httpx.Response(200, json={"ok": True, "queue_depth": 0})
+        assert request.url.path == WORKER_PATH
+        received.setdefault(request.url.port, []).append(json.loads(request.content))
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        sup = Supervisor(spawn, 3, logging.getLogger("test"), base_port=9000, client=http)
+        await sup.start()
+        for i in range(30):
+            await sup.forward(message_update(i, 500 + i % 6, "/help"))
+        await sup.close()
+
+    assert sum(len(v) for v in received.values()) == 30
+    for port, updates in received.items():
+        slot = WorkerSlot(port - 9000, 3)
+        users = {u["message"]["from"]["id"] for u in updates}
+        assert all(slot.owns(uid) for uid in users)
+        for uid in users:
+            ids = [u["update_id"] for u in updates if u["message"]["from"]["id"] == uid]
+            assert ids == sorted(ids)
+
+    # A worker whose process died is respawned on the next health pass.
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        sup = Supervisor(spawn, 2, logging.getLogger("test"), client=http)
+        await sup.start()
+        spawned[-1][1].alive = False
+        before = METRICS.counter("worker_restarts_total", worker=1).value
+        await sup.check_health()
+        assert METRICS.counter("worker_restarts_total", worker=1).value == before + 1
+        assert spawned[-1][0] == 1 and spawned[-1][1].alive
+        await sup.close()
+
+
+@pytest.mark.asyncio
+async def test_workers_read_catalog_from_shared_snapshot(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    write_catalog_snapshot(path, {"locations": [{"name": "Snap"}], "os": [{"slug": "snap_os"}]})
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(500)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        cfg = DopraxConfig(base_url="https://x", api_key="k", dry_run=False, catalog_snapshot=path)
+        doprax = DopraxClient(cfg, client=http)
+        assert await doprax.get_locations() == [{"name": "Snap"}]
+        assert await doprax.get_os_list() == [{"slug": "snap_os"}]
+    assert calls == []